@@ -4,6 +4,8 @@ from typing import List, Dict
 
 import polars as pl
 
+from baggers import BaggerTableDeltas
+
 
 class BaggerExplorer:
     """Tool for exploring and analyzing enhanced bagger analysis results."""
@@ -20,23 +22,32 @@ class BaggerExplorer:
     def load_data(self):
         """Load all available data files."""
         try:
-            # Load main results
+            # Daily updates not compacted yet are layered over the three tables
             results_file = self.data_dir / "bagger_analysis_milestones.parquet"
-            if results_file.exists():
-                self.results_df = pl.read_parquet(results_file)
-                print(f"✅ Loaded {len(self.results_df)} ticker results")
-
-            # Load milestones
-            milestones_file = self.data_dir / "milestones.parquet"
-            if milestones_file.exists():
-                self.milestones_df = pl.read_parquet(milestones_file)
-                print(f"✅ Loaded {len(self.milestones_df)} milestone events")
-
-            # Load transitions
-            transitions_file = self.data_dir / "transitions.parquet"
-            if transitions_file.exists():
-                self.transitions_df = pl.read_parquet(transitions_file)
-                print(f"✅ Loaded {len(self.transitions_df)} transition events")
+            deltas = BaggerTableDeltas(str(results_file))
+            updates = deltas.updates()
+            if updates:
+                self.results_df, self.milestones_df, self.transitions_df = deltas.load()
+                print(f"✅ Loaded {len(self.results_df)} ticker results, {len(self.milestones_df)} "
+                      f"milestone events and {len(self.transitions_df)} transition events "
+                      f"(including {len(updates)} daily updates)")
+            else:
+                # Load main results
+                if results_file.exists():
+                    self.results_df = pl.read_parquet(results_file)
+                    print(f"✅ Loaded {len(self.results_df)} ticker results")
+
+                # Load milestones
+                milestones_file = self.data_dir / "milestones.parquet"
+                if milestones_file.exists():
+                    self.milestones_df = pl.read_parquet(milestones_file)
+                    print(f"✅ Loaded {len(self.milestones_df)} milestone events")
+
+                # Load transitions
+                transitions_file = self.data_dir / "transitions.parquet"
+                if transitions_file.exists():
+                    self.transitions_df = pl.read_parquet(transitions_file)
+                    print(f"✅ Loaded {len(self.transitions_df)} transition events")
 
             # Load comprehensive report
             report_file = self.data_dir / "comprehensive_report.json"
@@ -218,7 +229,7 @@ class BaggerExplorer:
         milestone_stats = (self.milestones_df
                            .group_by("multiple")
                            .agg([
-            pl.count().alias("count"),
+            pl.len().alias("count"),
             pl.col("days_from_start").mean().alias("avg_days_to_reach"),
             pl.col("maintained_for_days").mean().alias("avg_maintained_days"),
             pl.col("days_from_start").min().alias("fastest_days"),
@@ -270,7 +281,7 @@ class BaggerExplorer:
         # Current status breakdown
         status_counts = (self.results_df
                          .group_by("current_bagger_type")
-                         .agg(pl.count().alias("count"))
+                         .agg(pl.len().alias("count"))
                          .sort("count", descending=True))
 
         print(f"\n📊 CURRENT STATUS DISTRIBUTION ({total_tickers:,} total tickers):")
@@ -324,7 +335,7 @@ class BaggerExplorer:
                                   .with_columns(pl.col("date").str.to_date().alias("transition_date"))
                                   .filter(pl.col("transition_date") >= pl.col("transition_date").max() - pl.duration(days=365))
                                   .group_by("to_status")
-                                  .agg(pl.count().alias("count"))
+                                  .agg(pl.len().alias("count"))
                                   .sort("count", descending=True))
 
             if len(recent_transitions) > 0:
@@ -0,0 +1,188 @@
+import argparse
+import time
+from typing import List, Optional
+
+import polars as pl
+
+from baggers import MILESTONE_LEVELS, STATUS_CODES, TIME_IN_STATUS_COLUMNS, bagger_status_expr, status_name
+from parquet import PartitionDeltaStore
+
+
+def _date_str(expr: pl.Expr) -> pl.Expr:
+    return expr.dt.to_string("%Y-%m-%d")
+
+
+def _first_date_at_or_above(level: float) -> pl.Expr:
+    return pl.col("date").filter(pl.col("return_multiple") >= level).first()
+
+
+def _maintained_from_first_hit(level: float) -> pl.Expr:
+    """Days in the run above ``level`` that starts at its first hit (0 if never hit)."""
+    run = pl.col(f"above_{level}x_run")
+    first_hit_run = run.filter(pl.col("return_multiple") >= level).first()
+    return (run == first_hit_run).sum()
+
+
+def bagger_summary_query(prices: pl.LazyFrame, min_days: int = 252) -> pl.LazyFrame:
+    """Per-ticker bagger summary for a whole universe as one lazy query.
+
+    Mirrors TickerBaggerAnalyzer.analyze_ticker followed by
+    save_results_to_parquet: per-row columns are window expressions over
+    ``code``, and one group_by reduces them to a row per ticker.
+
+    Args:
+        prices: Frame with ``code``, ``date`` (Date) and ``adjusted_close``
+        min_days: Minimum number of trading days required
+
+    Returns:
+        LazyFrame with the save_results_to_parquet schema, sorted by ticker
+    """
+    rows = (prices
+            .select(["code", "date", pl.col("adjusted_close").alias("price")])
+            # Same order of checks as analyze_ticker: raw length, then the
+            # length after dropping unusable prices
+            .filter(pl.len().over("code") >= min_days)
+            .filter(pl.col("price").is_not_null() & (pl.col("price") > 0))
+            .filter(pl.len().over("code") >= min_days)
+            .sort(["code", "date"])
+            .with_columns((pl.col("price") / pl.col("price").first().over("code"))
+                          .alias("return_multiple"))
+            .with_columns(pl.col("return_multiple").cum_max().over("code").alias("peak_so_far"))
+            .with_columns([
+                bagger_status_expr(),
+                ((pl.col("peak_so_far") - pl.col("return_multiple")) / pl.col("peak_so_far"))
+                .alias("drawdown"),
+                *[(pl.col("return_multiple") >= level).rle_id().over("code")
+                  .alias(f"above_{level}x_run") for level in (10, 100)],
+            ])
+            .with_columns(pl.col("status_code").rle_id().over("code").alias("status_run")))
+
+    peak_idx = pl.col("return_multiple").arg_max()
+    drawdown_idx = pl.col("drawdown").arg_max()
+    current_run = pl.col("status_run") == pl.col("status_run").last()
+    max_multiple = pl.col("return_multiple").max()
+
+    summary = (rows
+               .group_by("code")
+               .agg([
+                   pl.col("price").first().alias("start_price"),
+                   pl.col("price").last().alias("final_price"),
+                   pl.col("date").first().alias("start_date"),
+                   pl.col("date").last().alias("final_date"),
+                   pl.len().alias("total_days"),
+                   pl.col("status_code").last().alias("current_status"),
+                   pl.col("return_multiple").last().alias("current_return_multiple"),
+                   max_multiple.alias("max_return_multiple"),
+                   pl.col("price").get(peak_idx).alias("max_price"),
+                   pl.col("date").get(peak_idx).alias("max_date"),
+                   (peak_idx + 1).alias("days_to_peak"),
+                   _first_date_at_or_above(10).alias("first_10x_date"),
+                   _first_date_at_or_above(100).alias("first_100x_date"),
+                   pl.col("date").filter(pl.col("return_multiple") >= 10).last().alias("last_10x_date"),
+                   pl.col("date").filter(pl.col("return_multiple") >= 100).last().alias("last_100x_date"),
+                   pl.col("drawdown").max().alias("max_drawdown_from_peak"),
+                   pl.col("date").get(drawdown_idx).alias("max_drawdown_date"),
+                   pl.col("status_code").last().alias("current_streak_status"),
+                   current_run.sum().alias("current_streak_days"),
+                   pl.col("date").filter(current_run).first().alias("current_streak_start_date"),
+                   *[(pl.col("status_code") == STATUS_CODES[status]).sum().alias(name)
+                     for name, status in TIME_IN_STATUS_COLUMNS.items()],
+                   pl.sum_horizontal([(max_multiple >= level).cast(pl.Int64)
+                                      for level in MILESTONE_LEVELS]).alias("milestones_hit"),
+                   pl.col("status_run").max().alias("transitions_count"),
+                   _first_date_at_or_above(2).alias("first_2x_date"),
+                   _first_date_at_or_above(5).alias("first_5x_date"),
+                   _maintained_from_first_hit(10).alias("days_above_10x"),
+                   _maintained_from_first_hit(100).alias("days_above_100x"),
+               ]))
+
+    date_columns = ["start_date", "final_date", "max_date", "first_10x_date", "first_100x_date",
+                    "last_10x_date", "last_100x_date", "max_drawdown_date",
+                    "current_streak_start_date", "first_2x_date", "first_5x_date"]
+    count_columns = ["total_days", "days_to_peak", "current_streak_days",
+                     *TIME_IN_STATUS_COLUMNS, "milestones_hit", "transitions_count",
+                     "days_above_10x", "days_above_100x"]
+
+    return (summary
+            .with_columns([
+                *[_date_str(pl.col(name)) for name in date_columns],
+                *[pl.col(name).cast(pl.Int64) for name in count_columns],
+                status_name(pl.col("current_status")).alias("current_bagger_type"),
+                status_name(pl.col("current_streak_status")).alias("current_streak_type"),
+            ])
+            .select([
+                pl.col("code").alias("ticker"),
+                "start_price", "final_price", "start_date", "final_date", "total_days",
+                "current_bagger_type", "current_return_multiple", "max_return_multiple",
+                "max_price", "max_date", "days_to_peak",
+                "first_10x_date", "first_100x_date", "last_10x_date", "last_100x_date",
+                "max_drawdown_from_peak", "max_drawdown_date",
+                "current_streak_type", "current_streak_days", "current_streak_start_date",
+                *TIME_IN_STATUS_COLUMNS,
+                "milestones_hit", "transitions_count",
+                "first_2x_date", "first_5x_date", "days_above_10x", "days_above_100x",
+            ])
+            .sort("ticker"))
+
+
+def scan_prices(partitioned_data_dir: str) -> pl.LazyFrame:
+    """Lazy (code, date, adjusted_close) scan of a store, deltas included."""
+    scan = PartitionDeltaStore(partitioned_data_dir).scan().select(["code", "date", "adjusted_close"])
+    if scan.collect_schema()["date"] == pl.Utf8:
+        return scan.with_columns(pl.col("date").str.to_date())
+    return scan.with_columns(pl.col("date").cast(pl.Date))
+
+
+def analyze_universe(partitioned_data_dir: str = "stock_data_partitioned", min_days: int = 252,
+                     codes_per_batch: Optional[int] = None) -> pl.DataFrame:
+    """Run the bagger summary over every ticker in a store.
+
+    Args:
+        partitioned_data_dir: Partitioned or sorted store
+        min_days: Minimum number of trading days required
+        codes_per_batch: Run the query on this many tickers at a time to
+            bound memory (default: the whole universe in one query)
+
+    Returns:
+        Frame with the save_results_to_parquet schema
+    """
+    started = time.perf_counter()
+    prices = scan_prices(partitioned_data_dir)
+
+    if codes_per_batch is None:
+        result = bagger_summary_query(prices, min_days).collect()
+    else:
+        codes: List[str] = (prices.select(pl.col("code").unique()).collect()
+                            .get_column("code").sort().to_list())
+        parts = []
+        for i in range(0, len(codes), codes_per_batch):
+            batch_codes = codes[i:i + codes_per_batch]
+            parts.append(bagger_summary_query(
+                prices.filter(pl.col("code").is_in(batch_codes)), min_days).collect())
+            print(f"  {min(i + codes_per_batch, len(codes)):,}/{len(codes):,} tickers")
+        result = pl.concat(parts)
+
+    print(f"Analyzed {len(result):,} tickers in {time.perf_counter() - started:.1f}s")
+    return result
+
+
+def main() -> None:
+    """Run the whole-universe bagger engine and save the summary."""
+    parser = argparse.ArgumentParser(description="Bagger analysis of every ticker in one lazy query")
+    parser.add_argument("--data-dir", default="stock_data_partitioned")
+    parser.add_argument("--min-days", type=int, default=252)
+    # Not bagger_analysis_milestones.parquet: that summary is paired with the
+    # milestones.parquet/transitions.parquet written next to it, which this
+    # engine does not produce
+    parser.add_argument("--output", default="bagger_engine_summary.parquet")
+    parser.add_argument("--codes-per-batch", type=int,
+                        help="Process this many tickers per query to bound memory")
+    args = parser.parse_args()
+
+    result = analyze_universe(args.data_dir, args.min_days, args.codes_per_batch)
+    result.write_parquet(args.output, compression='snappy')
+    print(f"Bagger analysis saved to {args.output}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,413 @@
+import argparse
+import datetime
+import json
+import time
+from pathlib import Path
+from typing import List, Optional, Tuple
+
+import polars as pl
+import pyarrow.parquet as pq
+
+from baggers import (MILESTONE_LEVELS, STATUS_CODES, TIME_IN_STATUS_COLUMNS, BaggerResult,
+                     BaggerTableDeltas, analyze_all_tickers, bagger_status_expr, status_name)
+from parquet import SQLitePartitionedConverter
+
+# Levels whose first and last dates appear in the summary even when they
+# are not milestones
+SUMMARY_LEVELS = (10, 100)
+
+
+def _level_key(level: float) -> str:
+    return f"{level:g}x"
+
+
+def _to_date(value: Optional[str]) -> Optional[datetime.date]:
+    return datetime.date.fromisoformat(value) if value else None
+
+
+class BaggerStateStore:
+    """Persisted per-ticker bagger state that advances one trading day at a time.
+
+    Every ticker is one row of ``bagger_state.parquet`` holding what is
+    needed to extend its BaggerResult without the history: start price,
+    running peak, current status and streak, time in each status, max
+    drawdown, and for every ladder level the first hit, its price and day
+    number and the maintained run (plus whether that run is still open).
+    A daily update joins the new bulk day onto the state and recomputes
+    every field with column expressions, so the cost is one row per ticker.
+    """
+
+    def __init__(self, state_path: str = "bagger_state.parquet",
+                 milestone_levels: Optional[List[float]] = None):
+        """Initialize the store.
+
+        Args:
+            state_path: State file
+            milestone_levels: Ladder used when building a new state (an
+                existing state keeps the ladder it was built with)
+        """
+        self.state_path = Path(state_path)
+        self.milestone_levels = sorted(milestone_levels or MILESTONE_LEVELS)
+        if self.state_path.exists():
+            metadata = pq.read_schema(self.state_path).metadata or {}
+            if b"milestone_levels" in metadata:
+                self.milestone_levels = json.loads(metadata[b"milestone_levels"])
+
+    @property
+    def tracked_levels(self) -> List[float]:
+        return sorted(set(self.milestone_levels) | set(SUMMARY_LEVELS))
+
+    def _state_row(self, result: BaggerResult) -> dict:
+        """State record equivalent to a full-history BaggerResult."""
+        row = {
+            "code": result.ticker,
+            "start_price": result.start_price,
+            "start_date": _to_date(result.start_date),
+            "last_date": _to_date(result.final_date),
+            "final_price": result.final_price,
+            "total_days": result.total_days,
+            "current_return_multiple": result.current_return_multiple,
+            "peak_so_far": result.max_return_multiple,
+            "max_price": result.max_price,
+            "max_date": _to_date(result.max_date),
+            "days_to_peak": result.days_to_peak,
+            "status_code": STATUS_CODES[result.current_bagger_type],
+            "streak_days": result.current_streak_days,
+            "streak_start_date": _to_date(result.current_streak_start_date),
+            "transitions_count": len(result.transitions),
+            "max_drawdown_from_peak": result.max_drawdown_from_peak,
+            "max_drawdown_date": _to_date(result.max_drawdown_date),
+            "last_10x_date": _to_date(result.last_10x_date),
+            "last_100x_date": _to_date(result.last_100x_date),
+            "milestones_hit": sum(1 for m in result.milestones if m.multiple in self.milestone_levels),
+        }
+        for column, status in TIME_IN_STATUS_COLUMNS.items():
+            row[column] = result.time_in_status.get(status, 0)
+
+        milestones = {m.multiple: m for m in result.milestones}
+        for level in self.tracked_levels:
+            key = _level_key(level)
+            milestone = milestones.get(level)
+            row[f"{key}_first_date"] = _to_date(milestone.date) if milestone else None
+            row[f"{key}_first_price"] = milestone.price if milestone else None
+            row[f"{key}_days_from_start"] = milestone.days_from_start if milestone else None
+            row[f"{key}_maintained"] = milestone.maintained_for_days if milestone else 0
+            # Still open if the run from the first hit reaches the last day
+            row[f"{key}_open"] = (milestone is not None and
+                                  milestone.days_from_start - 1 + milestone.maintained_for_days
+                                  == result.total_days)
+        return row
+
+    def _schema(self) -> dict:
+        schema = {
+            "code": pl.Utf8, "start_price": pl.Float64, "start_date": pl.Date,
+            "last_date": pl.Date, "final_price": pl.Float64, "total_days": pl.Int64,
+            "current_return_multiple": pl.Float64, "peak_so_far": pl.Float64,
+            "max_price": pl.Float64, "max_date": pl.Date, "days_to_peak": pl.Int64,
+            "status_code": pl.UInt8, "streak_days": pl.Int64, "streak_start_date": pl.Date,
+            "transitions_count": pl.Int64, "max_drawdown_from_peak": pl.Float64,
+            "max_drawdown_date": pl.Date, "last_10x_date": pl.Date, "last_100x_date": pl.Date,
+            "milestones_hit": pl.Int64,
+        }
+        schema.update({column: pl.Int64 for column in TIME_IN_STATUS_COLUMNS})
+        for level in self.tracked_levels:
+            key = _level_key(level)
+            schema.update({
+                f"{key}_first_date": pl.Date, f"{key}_first_price": pl.Float64,
+                f"{key}_days_from_start": pl.Int64, f"{key}_maintained": pl.Int64,
+                f"{key}_open": pl.Boolean,
+            })
+        return schema
+
+    def save(self, state: pl.DataFrame) -> None:
+        """Write the state atomically, recording its ladder in the file metadata."""
+        table = state.sort("code").to_arrow()
+        table = table.replace_schema_metadata({
+            **(table.schema.metadata or {}),
+            b"milestone_levels": json.dumps(self.milestone_levels).encode("utf-8"),
+        })
+        tmp_path = self.state_path.with_suffix(".tmp")
+        pq.write_table(table, tmp_path, compression="snappy")
+        tmp_path.replace(self.state_path)
+
+    def load(self) -> pl.DataFrame:
+        return pl.read_parquet(self.state_path)
+
+    def build(self, partitioned_data_dir: str = "stock_data_partitioned", workers: int = 1) -> pl.DataFrame:
+        """Create the state from the full history of every ticker.
+
+        Args:
+            partitioned_data_dir: Partitioned or sorted store
+            workers: Worker processes for the one-off full analysis
+
+        Returns:
+            The new state
+        """
+        results = analyze_all_tickers(partitioned_data_dir, min_days=1, workers=workers,
+                                      milestone_levels=self.tracked_levels)
+        state = pl.DataFrame([self._state_row(r) for r in results], schema=self._schema())
+        self.save(state)
+        print(f"Bagger state for {len(state):,} tickers written to {self.state_path}")
+        return state
+
+    def advance(self, state: pl.DataFrame,
+                day_df: pl.DataFrame) -> Tuple[pl.DataFrame, pl.DataFrame, pl.DataFrame]:
+        """Advance the state by one bulk day.
+
+        Rows with unusable prices, and tickers whose state already covers the
+        date, are skipped, so replaying a day is a no-op. Tickers not in the
+        state start a new history on this day.
+
+        Args:
+            state: Current state
+            day_df: One day's rows with ``code``, ``date`` and ``adjusted_close``
+
+        Returns:
+            (new state, updated state rows, new transitions)
+        """
+        day = (day_df
+               .select(["code",
+                        pl.col("date").str.to_date() if day_df.schema["date"] == pl.Utf8
+                        else pl.col("date").cast(pl.Date),
+                        pl.col("adjusted_close").alias("price")])
+               .filter(pl.col("price").is_not_null() & (pl.col("price") > 0))
+               .unique(subset="code", keep="last"))
+
+        rows = (day
+                .join(state, on="code", how="left")
+                .filter(pl.col("last_date").is_null() | (pl.col("date") > pl.col("last_date"))))
+
+        # New tickers start from an empty history
+        fresh = {
+            "start_price": pl.col("price"), "start_date": pl.col("date"),
+            "total_days": 0, "peak_so_far": 0.0, "max_drawdown_from_peak": -1.0,
+            "streak_days": 0, "transitions_count": 0, "milestones_hit": 0,
+            **{column: 0 for column in TIME_IN_STATUS_COLUMNS},
+            **{f"{_level_key(level)}_maintained": 0 for level in self.tracked_levels},
+            **{f"{_level_key(level)}_open": False for level in self.tracked_levels},
+        }
+        rows = rows.with_columns([pl.col(name).fill_null(value) for name, value in fresh.items()])
+
+        multiple = pl.col("return_multiple")
+        rows = (rows
+                .with_columns([
+                    (pl.col("price") / pl.col("start_price")).alias("return_multiple"),
+                    (pl.col("total_days") + 1).alias("total_days"),
+                    pl.col("status_code").alias("prev_status_code"),
+                    pl.col("peak_so_far").alias("prev_peak"),
+                ])
+                .with_columns(pl.max_horizontal("prev_peak", "return_multiple").alias("peak_so_far"))
+                .with_columns(bagger_status_expr())
+                .with_columns([
+                    ((pl.col("peak_so_far") - multiple) / pl.col("peak_so_far")).alias("drawdown"),
+                    (pl.col("status_code") == pl.col("prev_status_code")).fill_null(False)
+                    .alias("same_status"),
+                ]))
+
+        new_peak = multiple > pl.col("prev_peak")
+        new_drawdown = pl.col("drawdown") > pl.col("max_drawdown_from_peak")
+        updates = [
+            pl.col("date").alias("last_date"),
+            pl.col("price").alias("final_price"),
+            multiple.alias("current_return_multiple"),
+            pl.when(new_peak).then(pl.col("price")).otherwise(pl.col("max_price")).alias("max_price"),
+            pl.when(new_peak).then(pl.col("date")).otherwise(pl.col("max_date")).alias("max_date"),
+            pl.when(new_peak).then(pl.col("total_days")).otherwise(pl.col("days_to_peak"))
+            .alias("days_to_peak"),
+            pl.when(pl.col("same_status")).then(pl.col("streak_days") + 1).otherwise(1)
+            .alias("streak_days"),
+            pl.when(pl.col("same_status")).then(pl.col("streak_start_date")).otherwise(pl.col("date"))
+            .alias("streak_start_date"),
+            (pl.col("transitions_count")
+             + (pl.col("prev_status_code").is_not_null() & ~pl.col("same_status")).cast(pl.Int64))
+            .alias("transitions_count"),
+            pl.when(new_drawdown).then(pl.col("drawdown")).otherwise(pl.col("max_drawdown_from_peak"))
+            .alias("max_drawdown_from_peak"),
+            pl.when(new_drawdown).then(pl.col("date")).otherwise(pl.col("max_drawdown_date"))
+            .alias("max_drawdown_date"),
+            *[(pl.col(column) + (pl.col("status_code") == STATUS_CODES[status]).cast(pl.Int64))
+              .alias(column) for column, status in TIME_IN_STATUS_COLUMNS.items()],
+            *[pl.when(multiple >= level).then(pl.col("date")).otherwise(pl.col(f"last_{level}x_date"))
+              .alias(f"last_{level}x_date") for level in SUMMARY_LEVELS],
+        ]
+
+        newly_hit = {}
+        for level in self.tracked_levels:
+            key = _level_key(level)
+            above = multiple >= level
+            newly_hit[level] = pl.col(f"{key}_first_date").is_null() & above
+            still_open = pl.col(f"{key}_open") & above
+            updates += [
+                pl.when(newly_hit[level]).then(pl.col("date")).otherwise(pl.col(f"{key}_first_date"))
+                .alias(f"{key}_first_date"),
+                pl.when(newly_hit[level]).then(pl.col("price")).otherwise(pl.col(f"{key}_first_price"))
+                .alias(f"{key}_first_price"),
+                pl.when(newly_hit[level]).then(pl.col("total_days"))
+                .otherwise(pl.col(f"{key}_days_from_start")).alias(f"{key}_days_from_start"),
+                pl.when(newly_hit[level] | still_open).then(pl.col(f"{key}_maintained") + 1)
+                .otherwise(pl.col(f"{key}_maintained")).alias(f"{key}_maintained"),
+                (newly_hit[level] | still_open).alias(f"{key}_open"),
+            ]
+        updates.append((pl.col("milestones_hit")
+                        + pl.sum_horizontal([newly_hit[level].cast(pl.Int64)
+                                             for level in self.milestone_levels]))
+                       .alias("milestones_hit"))
+        rows = rows.with_columns(updates)
+
+        transitions = (rows
+                       .filter(pl.col("prev_status_code").is_not_null() & ~pl.col("same_status"))
+                       .select([
+                           pl.col("code").alias("ticker"),
+                           status_name(pl.col("prev_status_code")).alias("from_status"),
+                           status_name(pl.col("status_code")).alias("to_status"),
+                           pl.col("date").dt.to_string("%Y-%m-%d").alias("date"),
+                           "price",
+                           "return_multiple",
+                           pl.col("total_days").alias("days_from_start"),
+                       ]))
+
+        updated = rows.select(list(self._schema()))
+        new_state = pl.concat([state.filter(~pl.col("code").is_in(updated["code"].implode())), updated])
+        return new_state.sort("code"), updated, transitions
+
+    def summary(self, state: pl.DataFrame, min_days: int = 252) -> pl.DataFrame:
+        """State rows as save_results_to_parquet summary rows."""
+        def date_str(name: str) -> pl.Expr:
+            return pl.col(name).dt.to_string("%Y-%m-%d")
+
+        def milestone_date(level: float) -> pl.Expr:
+            if level in self.milestone_levels:
+                return date_str(f"{_level_key(level)}_first_date")
+            return pl.lit(None, dtype=pl.Utf8)
+
+        def maintained(level: float) -> pl.Expr:
+            if level in self.milestone_levels:
+                return pl.col(f"{_level_key(level)}_maintained")
+            return pl.lit(0, dtype=pl.Int64)
+
+        return (state
+                .filter(pl.col("total_days") >= min_days)
+                .select([
+                    pl.col("code").alias("ticker"),
+                    "start_price", "final_price",
+                    date_str("start_date").alias("start_date"),
+                    date_str("last_date").alias("final_date"),
+                    "total_days",
+                    status_name(pl.col("status_code")).alias("current_bagger_type"),
+                    "current_return_multiple",
+                    pl.col("peak_so_far").alias("max_return_multiple"),
+                    "max_price",
+                    date_str("max_date").alias("max_date"),
+                    "days_to_peak",
+                    date_str(f"{_level_key(10)}_first_date").alias("first_10x_date"),
+                    date_str(f"{_level_key(100)}_first_date").alias("first_100x_date"),
+                    date_str("last_10x_date").alias("last_10x_date"),
+                    date_str("last_100x_date").alias("last_100x_date"),
+                    "max_drawdown_from_peak",
+                    date_str("max_drawdown_date").alias("max_drawdown_date"),
+                    status_name(pl.col("status_code")).alias("current_streak_type"),
+                    pl.col("streak_days").alias("current_streak_days"),
+                    date_str("streak_start_date").alias("current_streak_start_date"),
+                    *TIME_IN_STATUS_COLUMNS,
+                    "milestones_hit", "transitions_count",
+                    milestone_date(2).alias("first_2x_date"),
+                    milestone_date(5).alias("first_5x_date"),
+                    maintained(10).alias("days_above_10x"),
+                    maintained(100).alias("days_above_100x"),
+                ]))
+
+    def milestones(self, state: pl.DataFrame, min_days: int = 252) -> pl.DataFrame:
+        """State rows as long milestone records (one per ticker and level hit)."""
+        state = state.filter(pl.col("total_days") >= min_days)
+        frames = [
+            state
+            .filter(pl.col(f"{_level_key(level)}_first_date").is_not_null())
+            .select([
+                pl.col("code").alias("ticker"),
+                pl.lit(level, dtype=pl.Float64).alias("multiple"),
+                pl.col(f"{_level_key(level)}_first_date").dt.to_string("%Y-%m-%d").alias("date"),
+                pl.col(f"{_level_key(level)}_first_price").alias("price"),
+                pl.col(f"{_level_key(level)}_days_from_start").alias("days_from_start"),
+                pl.col(f"{_level_key(level)}_maintained").alias("maintained_for_days"),
+            ])
+            for level in self.milestone_levels
+        ]
+        return pl.concat(frames).sort(["ticker", "multiple"])
+
+
+def update_day(store: BaggerStateStore, day_df: pl.DataFrame, date_str: str,
+               summary_file: str = "bagger_analysis_milestones.parquet",
+               output_dir: str = "bagger_updates", min_days: int = 252,
+               max_delta_updates: int = 20) -> None:
+    """Advance the state by one day and record the changes to the outputs.
+
+    Writes ``changed_<date>.parquet`` (summary rows that changed) and
+    ``transitions_<date>.parquet`` (new transitions) to ``output_dir``, and
+    the changed summary, milestone and transition rows as one
+    BaggerTableDeltas update next to ``summary_file``. The base tables are
+    only rewritten once more than ``max_delta_updates`` updates are waiting.
+    """
+    started = time.perf_counter()
+    previous = store.load()
+    state, updated, transitions = store.advance(previous, day_df)
+    store.save(state)
+
+    changed = store.summary(updated, min_days)
+    # Only milestone rows that differ from yesterday's (new levels, longer runs)
+    milestones = store.milestones(updated, min_days).join(
+        store.milestones(previous.filter(pl.col("code").is_in(updated["code"].implode())), min_days),
+        on=["ticker", "multiple", "date", "price", "days_from_start", "maintained_for_days"],
+        how="anti")
+
+    out = Path(output_dir)
+    out.mkdir(parents=True, exist_ok=True)
+    changed.write_parquet(out / f"changed_{date_str}.parquet", compression='snappy')
+    transitions.write_parquet(out / f"transitions_{date_str}.parquet", compression='snappy')
+
+    deltas = BaggerTableDeltas(summary_file)
+    deltas.append(date_str, changed, milestones, transitions)
+    if deltas.needs_compaction(max_delta_updates):
+        deltas.compact()
+
+    print(f"{date_str}: {len(updated):,} tickers advanced, {len(changed):,} summary rows changed, "
+          f"{len(milestones):,} milestone rows changed, {len(transitions):,} new transitions "
+          f"in {time.perf_counter() - started:.2f}s")
+
+
+def main() -> None:
+    """Build the bagger state or advance it by new trading days."""
+    parser = argparse.ArgumentParser(description="Incremental bagger state for daily updates")
+    parser.add_argument("--state", default="bagger_state.parquet")
+    parser.add_argument("--build", action="store_true", help="Build the state from the full history")
+    parser.add_argument("--data-dir", default="stock_data_partitioned")
+    parser.add_argument("--workers", type=int, default=1, help="Worker processes for --build")
+    parser.add_argument("--update", nargs="+", metavar="DATE", help="Advance the state by these dates")
+    parser.add_argument("--db", default="stock_data.db", help="SQLite database the new days are read from")
+    parser.add_argument("--summary", default="bagger_analysis_milestones.parquet")
+    parser.add_argument("--output-dir", default="bagger_updates")
+    parser.add_argument("--min-days", type=int, default=252)
+    parser.add_argument("--max-delta-updates", type=int, default=20,
+                        help="Fold the daily updates into the summary tables once more are waiting")
+    parser.add_argument("--compact", action="store_true",
+                        help="Fold every daily update into the summary tables now")
+    args = parser.parse_args()
+
+    store = BaggerStateStore(args.state)
+    if args.build:
+        store.build(args.data_dir, workers=args.workers)
+
+    source = SQLitePartitionedConverter(args.db)
+    for date_str in sorted(args.update or []):
+        day_df = source.read_day(date_str)
+        if day_df is None:
+            print(f"No rows for {date_str} in {args.db}")
+            continue
+        update_day(store, day_df, date_str, args.summary, args.output_dir, args.min_days,
+                   args.max_delta_updates)
+
+    if args.compact:
+        BaggerTableDeltas(args.summary).compact()
+
+
+if __name__ == "__main__":
+    main()
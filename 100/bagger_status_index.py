@@ -0,0 +1,290 @@
+import argparse
+import datetime
+import time
+from pathlib import Path
+from typing import List, Optional, Sequence
+
+import numpy as np
+import polars as pl
+import pyarrow.parquet as pq
+
+from bagger_engine import scan_prices
+from baggers import BAGGER_STATUSES, bagger_status_expr, status_name
+
+# Index record kinds; on the same date they sort in this order
+EVENT_TYPES = ("start", "transition", "checkpoint", "end")
+EVENT_CODES = {name: code for code, name in enumerate(EVENT_TYPES)}
+
+INDEX_SCHEMA = {
+    "ticker": pl.Utf8,
+    "date": pl.Date,
+    "event": pl.UInt8,
+    "prev_status_code": pl.UInt8,
+    "status_code": pl.UInt8,
+    "status_since": pl.Date,
+    "price": pl.Float64,
+    "return_multiple": pl.Float64,
+    "peak_so_far": pl.Float64,
+}
+
+
+def status_event_query(prices: pl.LazyFrame, min_days: int = 1, checkpoint_days: int = 21) -> pl.LazyFrame:
+    """Index records for a set of tickers.
+
+    Every ticker gets a ``start`` record on its first day, a ``transition``
+    record whenever its bagger status changes, a ``checkpoint`` every
+    ``checkpoint_days`` trading days and an ``end`` record on its last day.
+    Statuses follow TickerBaggerAnalyzer (multiples from the first day).
+
+    Args:
+        prices: Frame with ``code``, ``date`` (Date) and ``adjusted_close``
+        min_days: Minimum number of trading days required
+        checkpoint_days: Trading days between checkpoints, which bounds how
+            stale a snapshot's multiple and peak can be
+
+    Returns:
+        LazyFrame with INDEX_SCHEMA, sorted by (ticker, date, event)
+    """
+    day = pl.int_range(pl.len()).over("code")
+    rows = (prices
+            .select(["code", "date", pl.col("adjusted_close").alias("price")])
+            .filter(pl.col("price").is_not_null() & (pl.col("price") > 0))
+            .filter(pl.len().over("code") >= min_days)
+            .sort(["code", "date"])
+            .with_columns((pl.col("price") / pl.col("price").first().over("code"))
+                          .alias("return_multiple"))
+            .with_columns(pl.col("return_multiple").cum_max().over("code").alias("peak_so_far"))
+            .with_columns(bagger_status_expr())
+            .with_columns([
+                pl.col("status_code").shift(1).over("code").alias("prev_status_code"),
+                day.alias("day"),
+                (day == pl.len().over("code") - 1).alias("is_last"),
+            ])
+            .with_columns(
+                pl.when(pl.col("day") == 0).then(EVENT_CODES["start"])
+                .when(pl.col("status_code") != pl.col("prev_status_code")).then(EVENT_CODES["transition"])
+                .when(pl.col("day") % checkpoint_days == 0).then(EVENT_CODES["checkpoint"])
+                .cast(pl.UInt8)
+                .alias("event"))
+            .with_columns(pl.when(pl.col("event") <= EVENT_CODES["transition"]).then(pl.col("date"))
+                          .forward_fill().over("code").alias("status_since")))
+
+    columns = [pl.col("code").alias("ticker"), *[name for name in INDEX_SCHEMA if name != "ticker"]]
+    events = rows.filter(pl.col("event").is_not_null())
+    # The last day also gets an end record, even when it is a transition
+    ends = (rows
+            .filter(pl.col("is_last"))
+            .with_columns(pl.lit(EVENT_CODES["end"], dtype=pl.UInt8).alias("event")))
+    return (pl.concat([events.select(columns), ends.select(columns)])
+            .cast(INDEX_SCHEMA)
+            .sort(["ticker", "date", "event"]))
+
+
+class StatusChangeIndex:
+    """Persisted point-in-time index of every ticker's bagger status.
+
+    ``bagger_status_index.parquet`` holds the records of status_event_query,
+    sorted by (ticker, date). Loaded, each row gets a ticker-then-day key, so
+    "last record on or before D" for the whole universe is one searchsorted
+    of one query per ticker.
+
+    Status and the date it began are exact for any date. Multiple, peak
+    and price are those of the last record on or before the date, at most
+    ``checkpoint_days`` trading days earlier (``as_of_date`` says which).
+    """
+
+    INDEX_FILE = "bagger_status_index.parquet"
+
+    def __init__(self, index_path: str = INDEX_FILE):
+        self.index_path = Path(index_path)
+        self._records = None
+        self._keys = None
+        self._ticker_starts = None
+
+    def build(self, partitioned_data_dir: str = "stock_data_partitioned", min_days: int = 1,
+              checkpoint_days: int = 21, codes_per_batch: int = 1000) -> int:
+        """Write the index from the full price history.
+
+        Args:
+            partitioned_data_dir: Partitioned or sorted store
+            min_days: Minimum number of trading days required
+            checkpoint_days: Trading days between checkpoint records
+            codes_per_batch: Tickers per query, bounds memory
+
+        Returns:
+            Number of records written
+        """
+        started = time.perf_counter()
+        prices = scan_prices(partitioned_data_dir)
+        codes: List[str] = (prices.select(pl.col("code").unique()).collect()
+                            .get_column("code").sort().to_list())
+
+        metadata = {b"checkpoint_days": str(checkpoint_days).encode("utf-8"),
+                    b"min_days": str(min_days).encode("utf-8")}
+        tmp_path = self.index_path.with_suffix(".tmp")
+        schema = pl.DataFrame(schema=INDEX_SCHEMA).to_arrow().schema.with_metadata(metadata)
+        records = 0
+        with pq.ParquetWriter(tmp_path, schema, compression="snappy") as writer:
+            # Batches are in ticker order, so the file stays sorted
+            for i in range(0, len(codes), codes_per_batch):
+                batch_codes = codes[i:i + codes_per_batch]
+                batch = status_event_query(prices.filter(pl.col("code").is_in(batch_codes)),
+                                           min_days, checkpoint_days).collect()
+                writer.write_table(batch.to_arrow().cast(schema))
+                records += len(batch)
+                print(f"  {min(i + codes_per_batch, len(codes)):,}/{len(codes):,} tickers")
+        tmp_path.replace(self.index_path)
+        self._records = None
+
+        print(f"Status index with {records:,} records written to {self.index_path} "
+              f"in {time.perf_counter() - started:.1f}s")
+        return records
+
+    @property
+    def checkpoint_days(self) -> Optional[int]:
+        metadata = pq.read_schema(self.index_path).metadata or {}
+        value = metadata.get(b"checkpoint_days")
+        return int(value) if value is not None else None
+
+    def load(self) -> pl.DataFrame:
+        """Read the index and build the search keys (once)."""
+        if self._records is None:
+            records = pl.read_parquet(self.index_path)
+            ticker_ids = records["ticker"].rle_id().to_numpy().astype(np.int64)
+            days = records["date"].cast(pl.Int32).to_numpy().astype(np.int64)
+            # Ticker in the high bits, days (shifted non-negative) in the low ones
+            self._keys = (ticker_ids << 32) + (days + 2 ** 31)
+            self._ticker_starts = np.flatnonzero(np.diff(ticker_ids, prepend=-1))
+            self._records = records
+        return self._records
+
+    def snapshot(self, date: datetime.date, include_ended: bool = False) -> pl.DataFrame:
+        """Every ticker's bagger status, multiple and peak on ``date``.
+
+        Args:
+            date: Point in time
+            include_ended: Also return tickers whose history ended before
+                ``date`` (with their final values)
+
+        Returns:
+            One row per ticker listed by ``date``: ticker, status,
+            status_since, return_multiple, peak_so_far, price and as_of_date
+        """
+        records = self.load()
+        if isinstance(date, str):
+            date = datetime.date.fromisoformat(date)
+        day = (date - datetime.date(1970, 1, 1)).days
+
+        ticker_ids = np.arange(len(self._ticker_starts), dtype=np.int64)
+        positions = np.searchsorted(self._keys, (ticker_ids << 32) + (day + 2 ** 31), side="right") - 1
+        # Tickers whose first record is after the date were not listed yet
+        positions = positions[positions >= self._ticker_starts]
+
+        rows = records[positions]
+        if not include_ended:
+            rows = rows.filter((pl.col("event") != EVENT_CODES["end"]) | (pl.col("date") == date))
+        return rows.select([
+            "ticker",
+            status_name(pl.col("status_code")).alias("status"),
+            "status_since",
+            "return_multiple",
+            "peak_so_far",
+            "price",
+            pl.col("date").alias("as_of_date"),
+        ])
+
+    def status_counts_over_time(self, dates: Optional[Sequence[datetime.date]] = None) -> pl.DataFrame:
+        """Daily count of listed tickers in each bagger status.
+
+        Start records add a ticker to its status, transitions move it and
+        end records drop it the day after its last day; a cumulative sum of
+        these changes gives the counts, read as of each requested date.
+
+        Args:
+            dates: Dates to report (default: every weekday the index covers)
+
+        Returns:
+            ``date``, one column per BaggerType value and ``tickers``
+        """
+        records = self.load()
+        changes = records.filter(pl.col("event") != EVENT_CODES["checkpoint"])
+        is_end = pl.col("event") == EVENT_CODES["end"]
+        entered = (changes
+                   .filter(pl.col("event") <= EVENT_CODES["transition"])
+                   .select(["date", "status_code", pl.lit(1).alias("change")]))
+        left = (changes
+                .filter(pl.col("event") != EVENT_CODES["start"])
+                .select([
+                    pl.when(is_end).then(pl.col("date") + pl.duration(days=1))
+                    .otherwise(pl.col("date")).alias("date"),
+                    pl.when(is_end).then(pl.col("status_code"))
+                    .otherwise(pl.col("prev_status_code")).alias("status_code"),
+                    pl.lit(-1).alias("change"),
+                ]))
+
+        status_columns = [status.value for status in BAGGER_STATUSES]
+        daily_changes = (pl.concat([entered, left])
+                         .group_by("date")
+                         .agg([(pl.col("change") * (pl.col("status_code") == code)).sum().alias(name)
+                               for code, name in enumerate(status_columns)])
+                         .sort("date"))
+        counts = daily_changes.with_columns([pl.col(name).cum_sum() for name in status_columns])
+
+        if dates is None:
+            dates = pl.date_range(records["date"].min(), records["date"].max(), "1d", eager=True)
+            dates = dates.filter(dates.dt.weekday() <= 5)
+        requested = pl.DataFrame({"date": pl.Series(list(dates), dtype=pl.Date)}).sort("date")
+        return (requested
+                .join_asof(counts, on="date", strategy="backward")
+                .with_columns([pl.col(name).fill_null(0) for name in status_columns])
+                .with_columns(pl.sum_horizontal(status_columns).alias("tickers")))
+
+
+def main() -> None:
+    """Build the status-change index or query it."""
+    parser = argparse.ArgumentParser(description="Point-in-time bagger status index")
+    parser.add_argument("--index", default=StatusChangeIndex.INDEX_FILE)
+    parser.add_argument("--build", action="store_true", help="Build the index from the price history")
+    parser.add_argument("--data-dir", default="stock_data_partitioned")
+    parser.add_argument("--min-days", type=int, default=1)
+    parser.add_argument("--checkpoint-days", type=int, default=21,
+                        help="Trading days between checkpoint records (default: 21)")
+    parser.add_argument("--codes-per-batch", type=int, default=1000)
+    parser.add_argument("--snapshot", metavar="DATE", help="Universe snapshot on this date")
+    parser.add_argument("--breadth", action="store_true", help="Daily status counts over time")
+    parser.add_argument("--output", help="Write the snapshot or breadth series to this Parquet file")
+    args = parser.parse_args()
+
+    index = StatusChangeIndex(args.index)
+    if args.build:
+        index.build(args.data_dir, args.min_days, args.checkpoint_days, args.codes_per_batch)
+
+    if not index.index_path.exists():
+        print(f"❌ Index {index.index_path} not found, build it with --build")
+        return
+
+    if args.snapshot or args.breadth:
+        started = time.perf_counter()
+        records = index.load()
+        print(f"Loaded {len(records):,} index records in {time.perf_counter() - started:.2f}s")
+
+    result = None
+    if args.snapshot:
+        started = time.perf_counter()
+        result = index.snapshot(datetime.date.fromisoformat(args.snapshot))
+        print(f"Snapshot of {len(result):,} tickers on {args.snapshot} "
+              f"in {(time.perf_counter() - started) * 1000:.1f} ms")
+        print(result.group_by("status").len().sort("len", descending=True))
+    if args.breadth:
+        started = time.perf_counter()
+        result = index.status_counts_over_time()
+        print(f"Breadth series of {len(result):,} days in {time.perf_counter() - started:.2f}s")
+        print(result.tail(5))
+
+    if result is not None and args.output:
+        result.write_parquet(args.output, compression='snappy')
+        print(f"Saved to {args.output}")
+
+
+if __name__ == "__main__":
+    main()
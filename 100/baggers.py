@@ -1,11 +1,22 @@
-from collections import defaultdict
+import abc
+import contextlib
+import multiprocessing
+import os
+import shutil
+import time
+from array import array
+from collections.abc import Mapping, Sequence
 from dataclasses import dataclass
 from enum import Enum
 from pathlib import Path
 from typing import List, Dict
-from typing import Optional, Tuple
+from typing import Optional, Tuple, Union
 
+import numpy as np
 import polars as pl
+import pyarrow.parquet as pq
+
+from parquet import PartitionDeltaStore, PartitionManifest, SortedParquetDataset, TickerArrowCache
 
 
 class BaggerType(Enum):
@@ -17,7 +28,98 @@ class BaggerType(Enum):
     NO_BAGGER = "no_bagger"
 
 
-@dataclass
+# Return multiples tracked as milestones
+MILESTONE_LEVELS = [2, 3, 5, 10, 20, 50, 100, 200, 500, 1000]
+
+# Integer status codes are positions in BaggerType
+BAGGER_STATUSES = list(BaggerType)
+STATUS_CODES = {status: code for code, status in enumerate(BAGGER_STATUSES)}
+
+# Summary column -> status counted in it
+TIME_IN_STATUS_COLUMNS = {
+    "days_as_no_bagger": BaggerType.NO_BAGGER,
+    "days_as_multibagger": BaggerType.MULTIBAGGER,
+    "days_as_hundred_bagger": BaggerType.HUNDRED_BAGGER,
+    "days_as_fallen_multibagger": BaggerType.FALLEN_MULTIBAGGER,
+    "days_as_fallen_hundred_bagger": BaggerType.FALLEN_HUNDRED_BAGGER,
+}
+
+# The three linked output tables (joined on ticker): column -> dtype
+SUMMARY_SCHEMA = {
+    "ticker": pl.Utf8,
+    "start_price": pl.Float64,
+    "final_price": pl.Float64,
+    "start_date": pl.Utf8,
+    "final_date": pl.Utf8,
+    "total_days": pl.Int64,
+    "current_bagger_type": pl.Utf8,
+    "current_return_multiple": pl.Float64,
+    "max_return_multiple": pl.Float64,
+    "max_price": pl.Float64,
+    "max_date": pl.Utf8,
+    "days_to_peak": pl.Int64,
+    "first_10x_date": pl.Utf8,
+    "first_100x_date": pl.Utf8,
+    "last_10x_date": pl.Utf8,
+    "last_100x_date": pl.Utf8,
+    "max_drawdown_from_peak": pl.Float64,
+    "max_drawdown_date": pl.Utf8,
+    "current_streak_type": pl.Utf8,
+    "current_streak_days": pl.Int64,
+    "current_streak_start_date": pl.Utf8,
+    **{column: pl.Int64 for column in TIME_IN_STATUS_COLUMNS},
+    "milestones_hit": pl.Int64,
+    "transitions_count": pl.Int64,
+    "first_2x_date": pl.Utf8,
+    "first_5x_date": pl.Utf8,
+    "days_above_10x": pl.Int64,
+    "days_above_100x": pl.Int64,
+}
+MILESTONE_SCHEMA = {
+    "ticker": pl.Utf8,
+    "multiple": pl.Float64,
+    "date": pl.Utf8,
+    "price": pl.Float64,
+    "days_from_start": pl.Int64,
+    "maintained_for_days": pl.Int64,
+}
+TRANSITION_SCHEMA = {
+    "ticker": pl.Utf8,
+    "from_status": pl.Utf8,
+    "to_status": pl.Utf8,
+    "date": pl.Utf8,
+    "price": pl.Float64,
+    "return_multiple": pl.Float64,
+    "days_from_start": pl.Int64,
+}
+
+
+def bagger_status_expr() -> pl.Expr:
+    """Native polars version of TickerBaggerAnalyzer._classify_bagger.
+
+    Maps ``return_multiple`` and ``peak_so_far`` to a UInt8 ``status_code``
+    column (index into BAGGER_STATUSES) without a Python call per row.
+    """
+    return (pl.when(pl.col("return_multiple") >= 100)
+            .then(STATUS_CODES[BaggerType.HUNDRED_BAGGER])
+            .when(pl.col("return_multiple") >= 10)
+            .then(STATUS_CODES[BaggerType.MULTIBAGGER])
+            .when(pl.col("peak_so_far") >= 100)
+            .then(STATUS_CODES[BaggerType.FALLEN_HUNDRED_BAGGER])
+            .when(pl.col("peak_so_far") >= 10)
+            .then(STATUS_CODES[BaggerType.FALLEN_MULTIBAGGER])
+            .otherwise(STATUS_CODES[BaggerType.NO_BAGGER])
+            .cast(pl.UInt8)
+            .alias("status_code"))
+
+
+def status_name(expr: pl.Expr) -> pl.Expr:
+    """Status code -> BaggerType value."""
+    return expr.replace_strict({code: status.value for code, status in enumerate(BAGGER_STATUSES)},
+                               return_dtype=pl.Utf8)
+
+
+@dataclass(slots=True)
 class BaggerTransition:
     """Represents a transition between bagger states."""
     from_status: BaggerType
@@ -28,7 +130,7 @@ class BaggerTransition:
     days_from_start: int
 
 
-@dataclass
+@dataclass(slots=True)
 class BaggerMilestone:
     """Represents when a stock hits specific return multiples."""
     multiple: float  # e.g., 10.0 for 10x, 100.0 for 100x
@@ -38,7 +140,7 @@ class BaggerMilestone:
     maintained_for_days: Optional[int] = None  # How long it stayed above this level
 
 
-@dataclass
+@dataclass(slots=True)
 class BaggerResult:
     """Result with full time-series analysis."""
     ticker: str
@@ -60,14 +162,14 @@ class BaggerResult:
     max_date: str
     days_to_peak: int
 
-    # Milestone tracking
-    milestones: List[BaggerMilestone]
+    # Milestone tracking (a MilestoneArray when produced by the analyzer)
+    milestones: Sequence[BaggerMilestone]
 
-    # Transition history
-    transitions: List[BaggerTransition]
+    # Transition history (a TransitionArray when produced by the analyzer)
+    transitions: Sequence[BaggerTransition]
 
     # Time spent in each status
-    time_in_status: Dict[BaggerType, int]  # days spent in each status
+    time_in_status: Mapping[BaggerType, int]  # days spent in each status (a StatusDays)
 
     # Advanced metrics
     first_10x_date: Optional[str] = None
@@ -85,16 +187,199 @@ class BaggerResult:
     current_streak_start_date: Optional[str] = None
 
 
+class StatusDays(Mapping):
+    """Read-only ``Dict[BaggerType, int]`` backed by one small int array.
+
+    Every status is a key (0 if never held), like the dict the analyzer used
+    to build, and it compares equal to such a dict.
+    """
+    __slots__ = ("_days",)
+
+    def __init__(self, days):
+        """Initialize from day counts indexed by STATUS_CODES."""
+        self._days = array("q", (int(d) for d in days))
+
+    def __getitem__(self, status: BaggerType) -> int:
+        return self._days[STATUS_CODES[status]]
+
+    def __iter__(self):
+        return iter(BAGGER_STATUSES)
+
+    def __len__(self) -> int:
+        return len(BAGGER_STATUSES)
+
+    def __repr__(self) -> str:
+        return f"StatusDays({dict(self)!r})"
+
+
+class _RecordArray(Sequence):
+    """Sequence of dataclass views over one packed numpy record array.
+
+    Stands in for a list of small dataclasses: len(), iteration, indexing
+    and slicing work as before, with views built on access (subclasses set
+    ``dtype`` and implement ``_view``). A ticker's
+    records cost one array header plus ``dtype.itemsize`` bytes each,
+    instead of an object holding boxed floats and a date string per entry.
+    """
+    __slots__ = ("records",)
+    dtype: np.dtype = None
+
+    def __init__(self, records: np.ndarray):
+        self.records = records
+
+    @classmethod
+    def from_columns(cls, **columns):
+        """Build from one array-like per field of ``dtype``."""
+        records = np.empty(len(next(iter(columns.values()))), dtype=cls.dtype)
+        for name, values in columns.items():
+            records[name] = values
+        return cls(records)
+
+    @abc.abstractmethod
+    def _view(self, record):
+        """Dataclass view of one record."""
+
+    def __len__(self) -> int:
+        return len(self.records)
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            return type(self)(self.records[index])
+        return self._view(self.records[index])
+
+    def __eq__(self, other) -> bool:
+        if not isinstance(other, Sequence):
+            return NotImplemented
+        return len(self) == len(other) and all(a == b for a, b in zip(self, other))
+
+    __hash__ = None
+
+    def __repr__(self) -> str:
+        return f"{type(self).__name__}({list(self)!r})"
+
+
+class TransitionArray(_RecordArray):
+    """A ticker's transitions, 30 bytes each; indexing yields BaggerTransition."""
+    __slots__ = ()
+    dtype = np.dtype([("from_code", np.uint8), ("to_code", np.uint8), ("date", "datetime64[D]"),
+                      ("price", np.float64), ("return_multiple", np.float64),
+                      ("days_from_start", np.int32)])
+
+    @classmethod
+    def from_transitions(cls, transitions: Sequence[BaggerTransition]) -> "TransitionArray":
+        """Pack a list of BaggerTransitions (returned as is if already packed)."""
+        if isinstance(transitions, cls):
+            return transitions
+        return cls.from_columns(from_code=[STATUS_CODES[t.from_status] for t in transitions],
+                                to_code=[STATUS_CODES[t.to_status] for t in transitions],
+                                date=[t.date for t in transitions],
+                                price=[t.price for t in transitions],
+                                return_multiple=[t.return_multiple for t in transitions],
+                                days_from_start=[t.days_from_start for t in transitions])
+
+    def _view(self, record) -> BaggerTransition:
+        return BaggerTransition(
+            from_status=BAGGER_STATUSES[record["from_code"]],
+            to_status=BAGGER_STATUSES[record["to_code"]],
+            date=str(record["date"]),
+            price=float(record["price"]),
+            return_multiple=float(record["return_multiple"]),
+            days_from_start=int(record["days_from_start"])
+        )
+
+    def to_frame(self) -> pl.DataFrame:
+        """Rows of the transitions table, without the ticker column."""
+        return pl.DataFrame({
+            "from_status": self.records["from_code"],
+            "to_status": self.records["to_code"],
+            "date": np.datetime_as_string(self.records["date"], unit="D"),
+            "price": self.records["price"],
+            "return_multiple": self.records["return_multiple"],
+            "days_from_start": self.records["days_from_start"].astype(np.int64),
+        }).with_columns([status_name(pl.col("from_status")), status_name(pl.col("to_status"))])
+
+
+class MilestoneArray(_RecordArray):
+    """A ticker's milestones, 32 bytes each; indexing yields BaggerMilestone."""
+    __slots__ = ()
+    dtype = np.dtype([("multiple", np.float64), ("date", "datetime64[D]"), ("price", np.float64),
+                      ("days_from_start", np.int32), ("maintained_for_days", np.int32)])
+
+    @classmethod
+    def from_milestones(cls, milestones: Sequence[BaggerMilestone]) -> "MilestoneArray":
+        """Pack a list of BaggerMilestones (returned as is if already packed)."""
+        if isinstance(milestones, cls):
+            return milestones
+        return cls.from_columns(multiple=[m.multiple for m in milestones],
+                                date=[m.date for m in milestones],
+                                price=[m.price for m in milestones],
+                                days_from_start=[m.days_from_start for m in milestones],
+                                maintained_for_days=[m.maintained_for_days or 0 for m in milestones])
+
+    def _view(self, record) -> BaggerMilestone:
+        return BaggerMilestone(
+            multiple=float(record["multiple"]),
+            date=str(record["date"]),
+            price=float(record["price"]),
+            days_from_start=int(record["days_from_start"]),
+            maintained_for_days=int(record["maintained_for_days"])
+        )
+
+    def to_frame(self) -> pl.DataFrame:
+        """Rows of the milestones table, without the ticker column."""
+        return pl.DataFrame({
+            "multiple": self.records["multiple"],
+            "date": np.datetime_as_string(self.records["date"], unit="D"),
+            "price": self.records["price"],
+            "days_from_start": self.records["days_from_start"].astype(np.int64),
+            "maintained_for_days": self.records["maintained_for_days"].astype(np.int64),
+        })
+
+
 class TickerBaggerAnalyzer:
     """Analyzer that tracks full bagger journey over time."""
 
-    def __init__(self, partitioned_data_dir: str = "stock_data_partitioned"):
+    def __init__(self, partitioned_data_dir: str = "stock_data_partitioned",
+                 cache_dir: Optional[str] = None,
+                 milestone_levels: Optional[List[float]] = None):
         """Initialize the analyzer.
 
         Args:
             partitioned_data_dir: Directory containing partitioned parquet files
+            cache_dir: Optional directory for memory-mapped Arrow copies of the
+                hot columns, filled on first load and reused on later runs
+            milestone_levels: Return multiples reported as milestones
+                (default: MILESTONE_LEVELS)
         """
         self.partitioned_data_dir = Path(partitioned_data_dir)
+        self.milestone_levels = sorted(milestone_levels or MILESTONE_LEVELS)
+        # 10x and 100x dates are always reported, so they ride along in the ladder
+        self._ladder = np.array(sorted(set(self.milestone_levels) | {10, 100}), dtype=np.float64)
+        # A directory written with --layout sorted is read through its ticker index
+        self.sorted_dataset = (SortedParquetDataset(partitioned_data_dir)
+                               if SortedParquetDataset.exists(partitioned_data_dir) else None)
+        self.delta_store = PartitionDeltaStore(partitioned_data_dir)
+        self._deltas = None  # appended days not yet compacted, by code
+        # Row counts from the manifest let short histories be rejected
+        # without opening their files
+        self.manifest = (PartitionManifest(partitioned_data_dir)
+                         if PartitionManifest.exists(partitioned_data_dir) else None)
+        self._manifest_rows = None
+        self.cache = TickerArrowCache(cache_dir) if cache_dir else None
+        self._delta_mtimes = None  # code -> newest delta file with rows for it
+
+    def _get_deltas(self) -> Dict[str, pl.DataFrame]:
+        """Load all delta files once; they are small next to the base partitions."""
+        if self._deltas is None:
+            self._deltas = self.delta_store.load_deltas()
+        return self._deltas
+
+    def _known_row_count(self, ticker: str) -> int:
+        """Upper bound on a ticker's rows from the manifest plus uncompacted deltas."""
+        if self._manifest_rows is None:
+            self._manifest_rows = self.manifest.row_counts()
+        delta = self._get_deltas().get(ticker)
+        return self._manifest_rows.get(ticker, 0) + (len(delta) if delta is not None else 0)
 
     def analyze_ticker(self, ticker: str, min_days: int = 252, debug: bool = False) -> Optional[BaggerResult]:
         """Analyze a single ticker with comprehensive time-series bagger tracking.
@@ -108,56 +393,101 @@ class TickerBaggerAnalyzer:
             BaggerResult if ticker can be analyzed, None otherwise
         """
         try:
-            # Load ticker data
-            ticker_data = self._load_ticker_data(ticker)
-            if ticker_data is None:
-                if debug:
-                    print(f"DEBUG: {ticker} - No data file found")
-                return None
-
-            if len(ticker_data) < min_days:
-                if debug:
-                    print(f"DEBUG: {ticker} - Insufficient data: {len(ticker_data)} < {min_days} days")
-                return None
+            df = self._prepare_frame(ticker, min_days, debug)
+            return self._perform_comprehensive_analysis(df, ticker) if df is not None else None
 
-            # Sort by date and clean data
-            df = (ticker_data
-                  .sort("date")
-                  .with_columns([
-                pl.col("date").str.to_date(),
-                pl.col("adjusted_close").alias("price")
-            ])
-                  .filter(pl.col("price").is_not_null() & (pl.col("price") > 0)))
-
-            if len(df) < min_days:
-                if debug:
-                    print(f"DEBUG: {ticker} - After filtering: {len(df)} < {min_days} days")
-                return None
+        except Exception as e:
+            if debug:
+                print(f"ERROR analyzing {ticker}: {e}")
+            return None
 
-            # Calculate return multiples
-            start_price = df["price"][0]
-            if start_price <= 0:
-                if debug:
-                    print(f"DEBUG: {ticker} - Invalid start price: {start_price}")
-                return None
+    def analyze_ticker_into(self, builder: "BaggerTableBuilder", ticker: str,
+                            min_days: int = 252, debug: bool = False) -> bool:
+        """Analyze a single ticker straight into columnar output tables.
 
-            df = df.with_columns([
-                (pl.col("price") / start_price).alias("return_multiple")
-            ])
+        Same analysis as analyze_ticker; the result goes straight into
+        ``builder`` and is not kept, so only the builder's packed columns
+        and record arrays stay in memory.
 
-            # Add historical peak for fallen bagger classification
-            df = df.with_columns([
-                pl.col("return_multiple").cum_max().alias("peak_so_far")
-            ])
+        Args:
+            builder: Table builder receiving the ticker's rows
+            ticker: Stock ticker symbol to analyze
+            min_days: Minimum number of trading days required
+            debug: Print debug information
 
-            # Perform comprehensive analysis
-            return self._perform_comprehensive_analysis(df, ticker)
+        Returns:
+            True if the ticker was analyzed
+        """
+        try:
+            df = self._prepare_frame(ticker, min_days, debug)
+            if df is None:
+                return False
+            builder.add_result(self._perform_comprehensive_analysis(df, ticker))
+            return True
 
         except Exception as e:
             if debug:
                 print(f"ERROR analyzing {ticker}: {e}")
+            return False
+
+    def _prepare_frame(self, ticker: str, min_days: int, debug: bool) -> Optional[pl.DataFrame]:
+        """Load, clean and classify a ticker's history (None if it is too short or unusable)."""
+        if self.manifest is not None and self._known_row_count(ticker) < min_days:
+            if debug:
+                print(f"DEBUG: {ticker} - Manifest: {self._known_row_count(ticker)} < {min_days} days")
+            return None
+
+        # Load ticker data
+        ticker_data = self._load_ticker_data(ticker)
+        if ticker_data is None:
+            if debug:
+                print(f"DEBUG: {ticker} - No data file found")
+            return None
+
+        if len(ticker_data) < min_days:
+            if debug:
+                print(f"DEBUG: {ticker} - Insufficient data: {len(ticker_data)} < {min_days} days")
+            return None
+
+        # Sort by date and clean data (CSV-derived partitions store the
+        # date as text, SQLite-derived ones as a real Date)
+        if ticker_data.schema["date"] == pl.Utf8:
+            date_expr = pl.col("date").str.to_date()
+        else:
+            date_expr = pl.col("date").cast(pl.Date)
+        df = (ticker_data
+              .sort("date")
+              .with_columns([
+                  date_expr,
+                  pl.col("adjusted_close").alias("price")
+              ])
+              .filter(pl.col("price").is_not_null() & (pl.col("price") > 0)))
+
+        if len(df) < min_days:
+            if debug:
+                print(f"DEBUG: {ticker} - After filtering: {len(df)} < {min_days} days")
+            return None
+
+        # Calculate return multiples
+        start_price = df["price"][0]
+        if start_price <= 0:
+            if debug:
+                print(f"DEBUG: {ticker} - Invalid start price: {start_price}")
             return None
 
+        df = df.with_columns([
+            (pl.col("price") / start_price).alias("return_multiple")
+        ])
+
+        # Add historical peak for fallen bagger classification
+        df = df.with_columns([
+            pl.col("return_multiple").cum_max().alias("peak_so_far")
+        ])
+
+        # Classify every day once; transitions, time in status and
+        # streaks all read this column
+        return df.with_columns(bagger_status_expr())
+
     def _perform_comprehensive_analysis(self, df: pl.DataFrame, ticker: str) -> BaggerResult:
         """Perform comprehensive time-series analysis of bagger status."""
 
@@ -176,11 +506,12 @@ class TickerBaggerAnalyzer:
         days_to_peak = max_return_idx + 1
 
         current_return_multiple = df["return_multiple"][-1]
-        current_peak = df["peak_so_far"][-1]
-        current_bagger_type = self._classify_bagger(current_return_multiple, current_peak)
+        current_bagger_type = BAGGER_STATUSES[df["status_code"][-1]]
 
-        # Track milestones
-        milestones = self._find_milestones(df)
+        # Track milestones (first hit, last hit and maintained run for
+        # every ladder level in one pass)
+        ladder = self._milestone_ladder(df)
+        milestones = self._find_milestones(df, ladder)
 
         # Track transitions with corrected logic
         transitions = self._track_transitions_fixed(df)
@@ -189,10 +520,8 @@ class TickerBaggerAnalyzer:
         time_in_status = self._calculate_time_in_status_fixed(df)
 
         # Advanced metrics
-        first_10x_date = self._find_first_milestone_date(df, 10.0)
-        first_100x_date = self._find_first_milestone_date(df, 100.0)
-        last_10x_date = self._find_last_milestone_date(df, 10.0)
-        last_100x_date = self._find_last_milestone_date(df, 100.0)
+        first_10x_date, last_10x_date = self._milestone_dates(df, ladder, 10)
+        first_100x_date, last_100x_date = self._milestone_dates(df, ladder, 100)
 
         # Drawdown analysis
         max_drawdown_from_peak, max_drawdown_date = self._calculate_max_drawdown(df)
@@ -227,142 +556,99 @@ class TickerBaggerAnalyzer:
             current_streak_start_date=current_streak_start_date
         )
 
-    def _find_milestones(self, df: pl.DataFrame) -> List[BaggerMilestone]:
-        """Find when stock hit specific return multiples - optimized version."""
-        milestones = []
-        milestone_levels = [2, 3, 5, 10, 20, 50, 100, 200, 500, 1000]
-
-        for level in milestone_levels:
-            # Find first time it hit this level using polars operations
-            above_level = df.with_row_index("idx").filter(pl.col("return_multiple") >= level)
-
-            if len(above_level) > 0:
-                first_row = above_level.row(0, named=True)
-                first_idx = first_row["idx"]  # row index
-
-                # Count consecutive days above this level from first hit
-                maintained_days = 0
-                remaining_data = df.slice(first_idx)
-                for val in remaining_data["return_multiple"]:
-                    if val >= level:
-                        maintained_days += 1
-                    else:
-                        break
-
-                milestone = BaggerMilestone(
-                    multiple=level,
-                    date=str(first_row["date"]),  # date
-                    price=first_row["price"],  # price
-                    days_from_start=first_idx + 1,
-                    maintained_for_days=maintained_days
-                )
-                milestones.append(milestone)
-
-        return milestones
-
-    def _track_transitions_fixed(self, df: pl.DataFrame) -> List[BaggerTransition]:
-        """Track transitions between bagger states over time - fixed version."""
-        transitions = []
+    def _milestone_ladder(self, df: pl.DataFrame) -> Dict[float, Tuple[int, int, int]]:
+        """First-hit index, last-hit index and maintained days for every ladder level.
 
-        if len(df) == 0:
-            return transitions
-
-        # Add bagger status column using vectorized operations
-        df_with_status = df.with_columns([
-            pl.struct(["return_multiple", "peak_so_far"])
-            .map_elements(
-                lambda x: self._classify_bagger(x["return_multiple"], x["peak_so_far"]).value,
-                return_dtype=pl.Utf8
-            )
-            .alias("bagger_status")
-        ])
-
-        # Find state changes efficiently
-        df_with_changes = df_with_status.with_columns([
-            (pl.col("bagger_status") != pl.col("bagger_status").shift(1)).alias("status_changed")
-        ])
+        peak_so_far is monotone, so every level's first hit comes from one
+        searchsorted; last hits come from a searchsorted on the suffix max.
+        Maintained runs walk the run-length encoding of each day's ladder
+        bucket, which has far fewer runs than there are days. Levels that
+        were never reached cost nothing beyond the searchsorted.
 
-        # Get rows where status changed
-        change_rows = df_with_changes.filter(pl.col("status_changed") | (pl.int_range(pl.len()) == 0))
+        Returns:
+            {level: (first_idx, last_idx, maintained_days)} for levels that were hit
+        """
+        multiples = df["return_multiple"].to_numpy()
+        peaks = df["peak_so_far"].to_numpy()
+        n = len(multiples)
+        levels = self._ladder
+
+        first_idx = np.searchsorted(peaks, levels, side="left")
+        hit = first_idx < n
+        if not hit.any():
+            return {}
+
+        # Suffix max reversed is non-decreasing: how many trailing days
+        # still reach each level gives the last hit
+        suffix_max_reversed = np.maximum.accumulate(multiples[::-1])
+        last_idx = n - 1 - np.searchsorted(suffix_max_reversed, levels, side="left")
+
+        # Runs of the ladder bucket (number of levels at or below each day's multiple)
+        buckets = np.searchsorted(levels, multiples, side="right")
+        run_starts = np.flatnonzero(np.diff(buckets, prepend=-1))
+        run_values = buckets[run_starts]
+        run_ends = np.append(run_starts[1:], n)
+
+        ladder = {}
+        for k in np.flatnonzero(hit):
+            # The first hit starts a run; it lasts while the bucket stays above k
+            run = np.searchsorted(run_starts, first_idx[k])
+            below = np.flatnonzero(run_values[run:] <= k)
+            end = run_ends[run + below[0] - 1] if len(below) else n
+            ladder[float(levels[k])] = (int(first_idx[k]), int(last_idx[k]), int(end - first_idx[k]))
+        return ladder
+
+    def _find_milestones(self, df: pl.DataFrame,
+                         ladder: Dict[float, Tuple[int, int, int]]) -> MilestoneArray:
+        """Build milestones for the configured levels from the ladder pass."""
+        hit_levels = [float(level) for level in self.milestone_levels if float(level) in ladder]
+        first_idx = [ladder[level][0] for level in hit_levels]
+        return MilestoneArray.from_columns(
+            multiple=hit_levels,
+            date=df["date"].gather(first_idx).to_numpy(),
+            price=df["price"].gather(first_idx).to_numpy(),
+            days_from_start=[idx + 1 for idx in first_idx],
+            maintained_for_days=[ladder[level][2] for level in hit_levels]
+        )
 
-        prev_status = None
-        for i, row in enumerate(change_rows.iter_rows(named=True)):
-            current_status = BaggerType(row["bagger_status"])
+    @staticmethod
+    def _milestone_dates(df: pl.DataFrame, ladder: Dict[float, Tuple[int, int, int]],
+                         level: float) -> Tuple[Optional[str], Optional[str]]:
+        """First and last date at or above ``level``."""
+        if float(level) not in ladder:
+            return None, None
+        first_idx, last_idx, _ = ladder[float(level)]
+        return str(df["date"][first_idx]), str(df["date"][last_idx])
 
-            if i == 0:
-                prev_status = current_status
-                continue
+    def _track_transitions_fixed(self, df: pl.DataFrame) -> TransitionArray:
+        """Track transitions between bagger states over time - fixed version."""
+        # Days whose status differs from the previous day's
+        status_codes = df["status_code"].to_numpy()
+        idx = np.flatnonzero(status_codes[1:] != status_codes[:-1]) + 1
+        return TransitionArray.from_columns(
+            from_code=status_codes[idx - 1],
+            to_code=status_codes[idx],
+            date=df["date"].gather(idx).to_numpy(),
+            price=df["price"].gather(idx).to_numpy(),
+            return_multiple=df["return_multiple"].gather(idx).to_numpy(),
+            days_from_start=idx + 1
+        )
 
-            # Create transition
-            transition = BaggerTransition(
-                from_status=prev_status,
-                to_status=current_status,
-                date=str(row["date"]),
-                price=row["price"],
-                return_multiple=row["return_multiple"],
-                days_from_start=row["__index_level_0__"] if "__index_level_0__" in row else i + 1
-            )
-            transitions.append(transition)
-            prev_status = current_status
-
-        return transitions
-
-    def _calculate_time_in_status_fixed(self, df: pl.DataFrame) -> Dict[BaggerType, int]:
+    def _calculate_time_in_status_fixed(self, df: pl.DataFrame) -> StatusDays:
         """Calculate total days spent in each bagger status - fixed version."""
-        time_in_status = {status: 0 for status in BaggerType}
-
-        # Vectorized status calculation
-        df_with_status = df.with_columns([
-            pl.struct(["return_multiple", "peak_so_far"])
-            .map_elements(
-                lambda x: self._classify_bagger(x["return_multiple"], x["peak_so_far"]).value,
-                return_dtype=pl.Utf8
-            )
-            .alias("bagger_status")
-        ])
-
-        # Count days in each status
-        status_counts = df_with_status.group_by("bagger_status").agg(pl.len().alias("days"))
-
-        for row in status_counts.iter_rows(named=True):
-            status = BaggerType(row["bagger_status"])
-            time_in_status[status] = row["days"]
-
-        return time_in_status
+        return StatusDays(np.bincount(df["status_code"].to_numpy(), minlength=len(BAGGER_STATUSES)))
 
     def _analyze_current_streak_fixed(self, df: pl.DataFrame) -> Tuple[BaggerType, int, Optional[str]]:
         """Analyze the current streak of bagger status - fixed version."""
         if len(df) == 0:
             return BaggerType.NO_BAGGER, 0, None
 
-        # Get current status
-        current_return = df["return_multiple"][-1]
-        current_peak = df["peak_so_far"][-1]
-        current_status = self._classify_bagger(current_return, current_peak)
-
-        # Add status column and work backwards to find streak start
-        df_with_status = df.with_columns([
-            pl.struct(["return_multiple", "peak_so_far"])
-            .map_elements(
-                lambda x: self._classify_bagger(x["return_multiple"], x["peak_so_far"]).value,
-                return_dtype=pl.Utf8
-            )
-            .alias("bagger_status")
-        ])
-
-        # Find where current streak started
-        streak_days = 1
-        streak_start_date = str(df["date"][-1])
+        # The current streak is the last run of the status column
+        last_run = df["status_code"].rle()[-1]
+        streak_days = last_run["len"]
+        streak_start_date = str(df["date"][len(df) - streak_days])
 
-        for i in range(len(df_with_status) - 2, -1, -1):
-            status = BaggerType(df_with_status["bagger_status"][i])
-            if status == current_status:
-                streak_days += 1
-                streak_start_date = str(df["date"][i])
-            else:
-                break
-
-        return current_status, streak_days, streak_start_date
+        return BAGGER_STATUSES[last_run["value"]], streak_days, streak_start_date
 
     def _classify_bagger(self, return_multiple: float, peak_so_far: float) -> BaggerType:
         """Classify bagger type based on current return and historical peak."""
@@ -380,20 +666,6 @@ class TickerBaggerAnalyzer:
             else:
                 return BaggerType.NO_BAGGER
 
-    def _find_first_milestone_date(self, df: pl.DataFrame, milestone: float) -> Optional[str]:
-        """Find the first date when stock hit a specific return multiple."""
-        above_milestone = df.filter(pl.col("return_multiple") >= milestone)
-        if len(above_milestone) > 0:
-            return str(above_milestone["date"][0])
-        return None
-
-    def _find_last_milestone_date(self, df: pl.DataFrame, milestone: float) -> Optional[str]:
-        """Find the last date when stock was above a specific return multiple."""
-        above_milestone = df.filter(pl.col("return_multiple") >= milestone)
-        if len(above_milestone) > 0:
-            return str(above_milestone["date"][-1])
-        return None
-
     def _calculate_max_drawdown(self, df: pl.DataFrame) -> Tuple[float, Optional[str]]:
         """Calculate maximum drawdown from peak and when it occurred."""
         if len(df) == 0:
@@ -410,42 +682,102 @@ class TickerBaggerAnalyzer:
 
         return max_drawdown, max_drawdown_date
 
+    def _source_mtime(self, ticker: str) -> float:
+        """Newest modification time of anything a ticker's rows are read from.
+
+        Only delta files that hold rows for the ticker count, so a nightly
+        append leaves the cache entries of untouched tickers valid.
+        """
+        if self._delta_mtimes is None:
+            self._delta_mtimes = self.delta_store.code_mtimes()
+        if self.sorted_dataset is not None:
+            source = self.sorted_dataset.file_for(ticker)
+        else:
+            source = self.partitioned_data_dir / f"code={ticker}" / "data.parquet"
+        try:
+            source_mtime = source.stat().st_mtime if source is not None else 0.0
+        except FileNotFoundError:
+            source_mtime = 0.0
+        return max(source_mtime, self._delta_mtimes.get(ticker, 0.0))
+
     def _load_ticker_data(self, ticker: str) -> Optional[pl.DataFrame]:
+        """Load data for a specific ticker, through the Arrow cache when enabled."""
+        if self.cache is None:
+            return self._read_ticker_source(ticker)
+
+        source_mtime = self._source_mtime(ticker)
+        cached = self.cache.get(ticker, source_mtime)
+        if cached is not None:
+            return cached
+
+        df = self._read_ticker_source(ticker)
+        if df is not None:
+            self.cache.put(ticker, df)
+        return df
+
+    def _read_ticker_source(self, ticker: str) -> Optional[pl.DataFrame]:
         """Load data for a specific ticker from partitioned parquet files."""
+        delta = self._get_deltas().get(ticker)
+        if self.sorted_dataset is not None:
+            try:
+                return self.delta_store.merge(self.sorted_dataset.load(ticker), delta)
+            except Exception:
+                return None
+
         ticker_dir = self.partitioned_data_dir / f"code={ticker}"
         parquet_file = ticker_dir / "data.parquet"
 
-        if not parquet_file.exists():
+        if not parquet_file.exists() and delta is None:
             return None
 
         try:
-            return pl.read_parquet(parquet_file)
+            base = pl.read_parquet(parquet_file) if parquet_file.exists() else None
+            return self.delta_store.merge(base, delta)
         except Exception:
             return None
 
     def get_available_tickers(self) -> List[str]:
         """Get list of all available tickers in the partitioned data."""
-        tickers = []
-        for partition_dir in self.partitioned_data_dir.iterdir():
-            if partition_dir.is_dir() and partition_dir.name.startswith("code="):
-                ticker = partition_dir.name.replace("code=", "")
-                tickers.append(ticker)
+        if self.manifest is not None:
+            tickers = self.manifest.codes()
+        elif self.sorted_dataset is not None:
+            tickers = self.sorted_dataset.codes()
+        else:
+            tickers = []
+            for partition_dir in self.partitioned_data_dir.iterdir():
+                if partition_dir.is_dir() and partition_dir.name.startswith("code="):
+                    ticker = partition_dir.name.replace("code=", "")
+                    tickers.append(ticker)
+        # Tickers listed since the last compaction only exist in the deltas
+        tickers.extend(set(self._get_deltas()) - set(tickers))
         return sorted(tickers)
 
 
-def save_results_to_parquet(results: List[BaggerResult],
-                            output_file: str = "bagger_analysis_milestones.parquet"):
-    """Save results to parquet with flattened structure."""
-    if not results:
-        print("No results to save")
-        return
+class BaggerTableBuilder:
+    """Columnar accumulator for the summary, milestone and transition tables.
 
-    # Flatten the data structure
-    flattened_data = []
+    Every table row comes from a BaggerResult through add_result. Summary
+    values go to per-column lists; milestones and transitions are kept as
+    the results' packed record arrays and stacked once in flush(). flush()
+    turns everything collected so far into three frames and starts over, so
+    callers can write a batch at a time and keep memory bounded.
+    """
 
-    for result in results:
-        # Create base record
-        base_record = {
+    def __init__(self):
+        self._reset()
+
+    def _reset(self) -> None:
+        self._summary = {column: [] for column in SUMMARY_SCHEMA}
+        self._milestones: List[Tuple[str, MilestoneArray]] = []
+        self._transitions: List[Tuple[str, TransitionArray]] = []
+
+    def __len__(self) -> int:
+        return len(self._summary["ticker"])
+
+    def add_result(self, result: BaggerResult) -> None:
+        """Append a BaggerResult's summary row, milestones and transitions."""
+        milestones = {m.multiple: m for m in result.milestones}
+        row = {
             "ticker": result.ticker,
             "start_price": result.start_price,
             "final_price": result.final_price,
@@ -467,110 +799,448 @@ def save_results_to_parquet(results: List[BaggerResult],
             "current_streak_type": result.current_streak_type.value,
             "current_streak_days": result.current_streak_days,
             "current_streak_start_date": result.current_streak_start_date,
-
-            # Time in status
-            "days_as_no_bagger": result.time_in_status.get(BaggerType.NO_BAGGER, 0),
-            "days_as_multibagger": result.time_in_status.get(BaggerType.MULTIBAGGER, 0),
-            "days_as_hundred_bagger": result.time_in_status.get(BaggerType.HUNDRED_BAGGER, 0),
-            "days_as_fallen_multibagger": result.time_in_status.get(BaggerType.FALLEN_MULTIBAGGER, 0),
-            "days_as_fallen_hundred_bagger": result.time_in_status.get(BaggerType.FALLEN_HUNDRED_BAGGER, 0),
-
-            # Milestone counts
+            **{column: result.time_in_status.get(status, 0)
+               for column, status in TIME_IN_STATUS_COLUMNS.items()},
             "milestones_hit": len(result.milestones),
             "transitions_count": len(result.transitions),
+            "first_2x_date": milestones[2].date if 2 in milestones else None,
+            "first_5x_date": milestones[5].date if 5 in milestones else None,
+            "days_above_10x": milestones[10].maintained_for_days if 10 in milestones else 0,
+            "days_above_100x": milestones[100].maintained_for_days if 100 in milestones else 0,
+        }
+        for column, values in self._summary.items():
+            values.append(row[column])
+
+        if len(result.milestones):
+            self._milestones.append((result.ticker, MilestoneArray.from_milestones(result.milestones)))
+        if len(result.transitions):
+            self._transitions.append((result.ticker, TransitionArray.from_transitions(result.transitions)))
+
+    @staticmethod
+    def _stack(entries: List[Tuple[str, _RecordArray]], schema: dict) -> pl.DataFrame:
+        """One frame from every ticker's record array, with a leading ticker column."""
+        if not entries:
+            return pl.DataFrame(schema=schema)
+        tickers = pl.Series("ticker", [ticker for ticker, _ in entries])
+        arrays = [array for _, array in entries]
+        owners = np.repeat(np.arange(len(arrays)), [len(array) for array in arrays])
+        stacked = type(arrays[0])(np.concatenate([array.records for array in arrays]))
+        return stacked.to_frame().insert_column(0, tickers.gather(owners)).cast(schema)
+
+    def flush(self) -> Tuple[pl.DataFrame, pl.DataFrame, pl.DataFrame]:
+        """Return (summary, milestones, transitions) collected so far and reset."""
+        summary = pl.DataFrame(self._summary, schema=SUMMARY_SCHEMA)
+        milestones = self._stack(self._milestones, MILESTONE_SCHEMA)
+        transitions = self._stack(self._transitions, TRANSITION_SCHEMA)
+        self._reset()
+        return summary, milestones, transitions
+
+
+TABLE_SCHEMAS = {"summary": SUMMARY_SCHEMA, "milestones": MILESTONE_SCHEMA,
+                 "transitions": TRANSITION_SCHEMA}
+
+
+def table_paths(summary_file: str) -> Dict[str, Path]:
+    """Paths of the three linked output tables for a summary file."""
+    summary_path = Path(summary_file)
+    return {
+        "summary": summary_path,
+        "milestones": summary_path.parent / "milestones.parquet",
+        "transitions": summary_path.parent / "transitions.parquet",
+    }
+
+
+class BaggerTableWriter:
+    """Streams batches of the three output tables into Parquet files.
+
+    The summary goes to ``summary_file``; ``milestones.parquet`` and
+    ``transitions.parquet`` are written next to it, where BaggerExplorer
+    looks for them. Each file is written under a temporary name and only
+    moved into place by close(), so readers never see a partial table.
+    """
+
+    def __init__(self, summary_file: str = "bagger_analysis_milestones.parquet"):
+        self.paths = table_paths(summary_file)
+        self.schemas = TABLE_SCHEMAS
+        self.rows = {name: 0 for name in self.paths}
+        self._writers: Dict[str, pq.ParquetWriter] = {}
+
+    def _tmp_path(self, name: str) -> Path:
+        return self.paths[name].with_suffix(".parquet.tmp")
+
+    def write(self, summary: pl.DataFrame, milestones: pl.DataFrame, transitions: pl.DataFrame) -> None:
+        """Append one batch (typically a BaggerTableBuilder.flush()) to the files."""
+        for name, frame in (("summary", summary), ("milestones", milestones), ("transitions", transitions)):
+            if len(frame) == 0:
+                continue
+            table = frame.to_arrow()
+            if name not in self._writers:
+                self.paths[name].parent.mkdir(parents=True, exist_ok=True)
+                self._writers[name] = pq.ParquetWriter(self._tmp_path(name), table.schema,
+                                                       compression="snappy")
+            self._writers[name].write_table(table)
+            self.rows[name] += len(frame)
+
+    def close(self, discard: bool = False) -> None:
+        """Finish the files and move them into place (or delete them with ``discard``)."""
+        for name in self.paths:
+            if name not in self._writers:
+                if discard:
+                    continue
+                # Still write an empty table, so a rerun never leaves a stale file behind
+                self._writers[name] = pq.ParquetWriter(
+                    self._tmp_path(name), pl.DataFrame(schema=self.schemas[name]).to_arrow().schema,
+                    compression="snappy")
+            self._writers[name].close()
+            if discard:
+                self._tmp_path(name).unlink(missing_ok=True)
+            else:
+                self._tmp_path(name).replace(self.paths[name])
+        self._writers = {}
+
+
+class BaggerTableDeltas:
+    """Daily changes to the three output tables, kept next to them until compacted.
+
+    Each daily update is written once as ``_bagger_delta/update-NNNNNN-<date>/``
+    with the changed summary rows, the changed milestone rows and the day's
+    new transitions, so an update costs the size of the day's changes rather
+    than of the whole tables. load() layers the updates over the base files
+    (the newest summary row per ticker and milestone row per ticker and level
+    win, transitions are appended) and compact() folds them into the base
+    files through BaggerTableWriter.
+    """
+
+    DELTA_DIR = "_bagger_delta"
+    # Rows are replaced on these keys; transitions have one row per ticker and day
+    KEYS = {"summary": ["ticker"], "milestones": ["ticker", "multiple"],
+            "transitions": ["ticker", "date"]}
+
+    def __init__(self, summary_file: str = "bagger_analysis_milestones.parquet"):
+        self.summary_file = summary_file
+        self.paths = table_paths(summary_file)
+        self.delta_dir = self.paths["summary"].parent / self.DELTA_DIR
+
+    def updates(self) -> List[Path]:
+        """Update directories in the order they were written."""
+        if not self.delta_dir.exists():
+            return []
+        # Half-written updates keep their .tmp suffix and are ignored
+        return sorted(path for path in self.delta_dir.glob("update-*") if path.suffix != ".tmp")
+
+    def append(self, date_str: str, summary: pl.DataFrame, milestones: pl.DataFrame,
+               transitions: pl.DataFrame) -> Optional[Path]:
+        """Record one day's changes (nothing is written if there are none).
 
-            # Key milestone dates
-            "first_2x_date": next((m.date for m in result.milestones if m.multiple == 2), None),
-            "first_5x_date": next((m.date for m in result.milestones if m.multiple == 5), None),
+        Returns:
+            The update directory, or None if every frame was empty
+        """
+        frames = {"summary": summary, "milestones": milestones, "transitions": transitions}
+        if not any(len(frame) for frame in frames.values()):
+            return None
 
-            # How long stayed above key levels
-            "days_above_10x": next((m.maintained_for_days for m in result.milestones if m.multiple == 10), 0),
-            "days_above_100x": next((m.maintained_for_days for m in result.milestones if m.multiple == 100), 0),
-        }
+        updates = self.updates()
+        sequence = int(updates[-1].name.split("-")[1]) + 1 if updates else 0
+        update_dir = self.delta_dir / f"update-{sequence:06d}-{date_str}"
+        tmp_dir = update_dir.with_suffix(".tmp")
+        shutil.rmtree(tmp_dir, ignore_errors=True)
+        tmp_dir.mkdir(parents=True)
+        for name, frame in frames.items():
+            schema = TABLE_SCHEMAS[name]
+            frame.select(list(schema)).cast(schema).write_parquet(tmp_dir / f"{name}.parquet",
+                                                                  compression="snappy")
+        tmp_dir.replace(update_dir)
+        return update_dir
+
+    def load(self) -> Tuple[pl.DataFrame, pl.DataFrame, pl.DataFrame]:
+        """(summary, milestones, transitions) with every update applied."""
+        updates = self.updates()
+        tables = []
+        for name, schema in TABLE_SCHEMAS.items():
+            path = self.paths[name]
+            base = pl.read_parquet(path) if path.exists() else pl.DataFrame(schema=schema)
+            if not updates:
+                tables.append(base)
+                continue
+            layers = [base.select(list(schema)).cast(schema)] + [
+                pl.read_parquet(update / f"{name}.parquet") for update in updates]
+            keep = "first" if name == "transitions" else "last"
+            # A transition replayed by an interrupted compaction is kept once
+            tables.append(pl.concat(layers)
+                          .unique(subset=self.KEYS[name], keep=keep, maintain_order=True)
+                          .sort(self.KEYS[name], maintain_order=True))
+        return tables[0], tables[1], tables[2]
 
-        flattened_data.append(base_record)
+    def needs_compaction(self, max_updates: int = 20) -> bool:
+        """Whether more than ``max_updates`` updates are waiting."""
+        return len(self.updates()) > max_updates
 
-    df = pl.DataFrame(flattened_data)
-    df.write_parquet(output_file, compression='snappy')
-    print(f"Bagger analysis saved to {output_file}")
+    def compact(self) -> int:
+        """Fold every update into the base files and remove them.
 
+        The base files are replaced first; if the updates are then left
+        behind, loading them again gives the same tables.
 
-def analyze_all_tickers(
-        partitioned_data_dir: str = "stock_data_partitioned",
-        min_days: int = 252,
-        progress_interval: int = 100,
-        debug=False
-) -> List[BaggerResult]:
-    """Analyze all tickers with bagger tracking."""
+        Returns:
+            Number of updates folded in
+        """
+        updates = self.updates()
+        if not updates:
+            return 0
+        started = time.perf_counter()
+        writer = BaggerTableWriter(self.summary_file)
+        writer.write(*self.load())
+        writer.close()
+        for update in updates:
+            shutil.rmtree(update)
+        print(f"Compacted {len(updates)} daily updates into {self.paths['summary']} "
+              f"in {time.perf_counter() - started:.1f}s")
+        return len(updates)
+
+
+def _results_to_tables(results: List[BaggerResult]) -> Tuple[pl.DataFrame, pl.DataFrame, pl.DataFrame]:
+    builder = BaggerTableBuilder()
+    for result in results:
+        builder.add_result(result)
+    return builder.flush()
 
-    analyzer = TickerBaggerAnalyzer(partitioned_data_dir)
+
+def save_results_to_parquet(results: List[BaggerResult],
+                            output_file: str = "bagger_analysis_milestones.parquet"):
+    """Save results as the summary, milestones and transitions tables."""
+    if not results:
+        print("No results to save")
+        return
+
+    writer = BaggerTableWriter(output_file)
+    writer.write(*_results_to_tables(results))
+    writer.close()
+    print(f"Bagger analysis saved to {output_file} "
+          f"(with {writer.paths['milestones'].name} and {writer.paths['transitions'].name})")
+
+
+# Per-process analyzer for pool workers, created once by _init_worker
+_worker_analyzer: Optional[TickerBaggerAnalyzer] = None
+_worker_options: dict = {}
+
+
+def _init_worker(partitioned_data_dir: str, cache_dir: Optional[str],
+                 milestone_levels: Optional[List[float]], min_days: int, debug: bool) -> None:
+    global _worker_analyzer, _worker_options
+    _worker_analyzer = TickerBaggerAnalyzer(partitioned_data_dir, cache_dir=cache_dir,
+                                            milestone_levels=milestone_levels)
+    _worker_options = {"min_days": min_days, "debug": debug}
+
+
+def _cache_counts() -> Tuple[int, int]:
+    cache = _worker_analyzer.cache
+    return (cache.hits, cache.misses) if cache is not None else (0, 0)
+
+
+def _analyze_chunk(tickers: List[str]) -> Tuple[List[BaggerResult], int, int, int, int]:
+    """Analyze one chunk in a worker.
+
+    Only the small result dataclasses travel back to the parent; ticker
+    frames and the analyzer's caches stay in the worker.
+
+    Returns:
+        (results, analyzed count, failed count, cache hits, cache misses)
+    """
+    hits_before, misses_before = _cache_counts()
+    results = []
+    for ticker in tickers:
+        result = _worker_analyzer.analyze_ticker(ticker, **_worker_options)
+        if result:
+            results.append(result)
+    hits, misses = _cache_counts()
+    return results, len(results), len(tickers) - len(results), hits - hits_before, misses - misses_before
+
+
+def _analyze_chunk_tables(tickers: List[str]) -> Tuple[Tuple[pl.DataFrame, pl.DataFrame, pl.DataFrame],
+                                                       int, int, int, int]:
+    """Analyze one chunk in a worker into the three output tables.
+
+    Returns:
+        ((summary, milestones, transitions), analyzed count, failed count,
+        cache hits, cache misses)
+    """
+    hits_before, misses_before = _cache_counts()
+    builder = BaggerTableBuilder()
+    for ticker in tickers:
+        _worker_analyzer.analyze_ticker_into(builder, ticker, **_worker_options)
+    analyzed = len(builder)
+    hits, misses = _cache_counts()
+    return builder.flush(), analyzed, len(tickers) - analyzed, hits - hits_before, misses - misses_before
+
+
+def _analyze_chunks(chunk_fn, partitioned_data_dir: str, min_days: int, progress_interval: int,
+                    debug: bool, cache_dir: Optional[str], workers: int, chunk_size: int,
+                    milestone_levels: Optional[List[float]]):
+    """Run ``chunk_fn`` over every ticker, yielding each chunk's payload in ticker order.
+
+    With ``workers`` > 1 the chunks go to a spawned process pool, otherwise
+    they run in this process. Progress and the final totals are printed here.
+    """
+    global _worker_analyzer, _worker_options
+
+    analyzer = TickerBaggerAnalyzer(partitioned_data_dir, cache_dir=cache_dir,
+                                    milestone_levels=milestone_levels)
 
     print("Discovering available tickers...")
     all_tickers = analyzer.get_available_tickers()
     print(f"Found {len(all_tickers)} tickers to analyze")
 
-    results = []
+    chunks = [all_tickers[i:i + chunk_size] for i in range(0, len(all_tickers), chunk_size)]
+    analyzed_count = 0
     failed_count = 0
+    cache_hits = 0
+    cache_misses = 0
+    processed = 0
+    next_report = progress_interval
 
     print(f"Starting analysis (minimum {min_days} days required)...")
 
-    for i, ticker in enumerate(all_tickers, 1):
-        if i % progress_interval == 0:
-            success_rate = ((i - failed_count) / i) * 100
-            print(f"Processed {i:,}/{len(all_tickers):,} tickers... "
-                  f"Success rate: {success_rate:.1f}% "
-                  f"({len(results):,} successful, {failed_count:,} failed)")
-
-        result = analyzer.analyze_ticker(ticker, min_days=min_days, debug=debug)
-        if result:
-            results.append(result)
+    with contextlib.ExitStack() as stack:
+        if workers > 1:
+            print(f"Using {workers} worker processes, {len(chunks)} chunks of up to {chunk_size} tickers")
+            # Spawned rather than forked: forking after polars has started its
+            # thread pool can deadlock
+            context = multiprocessing.get_context("spawn")
+            pool = stack.enter_context(context.Pool(
+                workers, initializer=_init_worker,
+                initargs=(partitioned_data_dir, cache_dir, milestone_levels, min_days, debug)))
+            # imap keeps submission order, so output matches a sequential run
+            outputs = pool.imap(chunk_fn, chunks)
         else:
-            failed_count += 1
+            _worker_analyzer = analyzer
+            _worker_options = {"min_days": min_days, "debug": debug}
+            outputs = map(chunk_fn, chunks)
+
+        for chunk, (payload, analyzed, failed, hits, misses) in zip(chunks, outputs):
+            analyzed_count += analyzed
+            failed_count += failed
+            cache_hits += hits
+            cache_misses += misses
+            processed += len(chunk)
+            if processed >= next_report or processed == len(all_tickers):
+                success_rate = ((processed - failed_count) / processed) * 100
+                print(f"Processed {processed:,}/{len(all_tickers):,} tickers... "
+                      f"Success rate: {success_rate:.1f}% "
+                      f"({analyzed_count:,} successful, {failed_count:,} failed)")
+                next_report = (processed // progress_interval + 1) * progress_interval
+            yield payload
 
     print(f"\n✅ Analysis complete!")
-    print(f"Successfully analyzed: {len(results):,} tickers")
+    print(f"Successfully analyzed: {analyzed_count:,} tickers")
     print(f"Failed to analyze: {failed_count:,} tickers")
-    print(f"Success rate: {(len(results) / len(all_tickers)) * 100:.1f}%")
+    if all_tickers:
+        print(f"Success rate: {(analyzed_count / len(all_tickers)) * 100:.1f}%")
+    if cache_dir:
+        print(f"Arrow cache: {cache_hits:,} hits, {cache_misses:,} misses")
 
-    return results
 
+def analyze_all_tickers(
+        partitioned_data_dir: str = "stock_data_partitioned",
+        min_days: int = 252,
+        progress_interval: int = 100,
+        debug=False,
+        cache_dir: Optional[str] = None,
+        workers: int = 1,
+        chunk_size: int = 250,
+        milestone_levels: Optional[List[float]] = None
+) -> List[BaggerResult]:
+    """Analyze all tickers with bagger tracking.
 
-def print_quick_summary(results: List[BaggerResult]):
-    """Print a quick summary of the analysis results."""
+    With ``workers`` > 1 the tickers are split into chunks of ``chunk_size``
+    and analyzed in a process pool. Chunks are collected in submission
+    order, so results come back in the same (sorted) order as a sequential run.
+    """
+    results = []
+    for chunk_results in _analyze_chunks(_analyze_chunk, partitioned_data_dir, min_days,
+                                         progress_interval, debug, cache_dir, workers,
+                                         chunk_size, milestone_levels):
+        results.extend(chunk_results)
+    return results
 
-    if not results:
+
+def analyze_all_tickers_to_parquet(
+        partitioned_data_dir: str = "stock_data_partitioned",
+        output_file: str = "bagger_analysis_milestones.parquet",
+        min_days: int = 252,
+        progress_interval: int = 100,
+        debug=False,
+        cache_dir: Optional[str] = None,
+        workers: int = 1,
+        chunk_size: int = 250,
+        milestone_levels: Optional[List[float]] = None
+) -> Dict[str, int]:
+    """Analyze all tickers straight into the summary, milestones and transitions tables.
+
+    Each chunk of ``chunk_size`` tickers is analyzed into a
+    BaggerTableBuilder and written as one batch; results are packed into
+    the builder as they are produced and not kept, so memory is bounded by
+    the chunk rather than the universe.
+
+    Returns:
+        Rows written per table ("summary", "milestones", "transitions")
+    """
+    writer = BaggerTableWriter(output_file)
+    try:
+        for summary, milestones, transitions in _analyze_chunks(
+                _analyze_chunk_tables, partitioned_data_dir, min_days, progress_interval, debug,
+                cache_dir, workers, chunk_size, milestone_levels):
+            writer.write(summary, milestones, transitions)
+    except BaseException:
+        writer.close(discard=True)
+        raise
+    writer.close()
+
+    print(f"Bagger analysis saved to {writer.paths['summary']} ({writer.rows['summary']:,} tickers), "
+          f"{writer.paths['milestones']} ({writer.rows['milestones']:,} milestones) and "
+          f"{writer.paths['transitions']} ({writer.rows['transitions']:,} transitions)")
+    return writer.rows
+
+
+def print_quick_summary(results: Union[List[BaggerResult], pl.DataFrame]):
+    """Print a quick summary of the analysis results.
+
+    Args:
+        results: BaggerResults or a summary table as written by
+            analyze_all_tickers_to_parquet
+    """
+    summary = results if isinstance(results, pl.DataFrame) else _results_to_tables(results)[0]
+
+    if len(summary) == 0:
         print("No results to summarize")
         return
 
     print(f"\n{'=' * 60}")
     print(f"BAGGER ANALYSIS SUMMARY")
     print(f"{'=' * 60}")
-    print(f"Total Analyzed: {len(results):,} tickers")
+    print(f"Total Analyzed: {len(summary):,} tickers")
 
     # Current status distribution including fallen baggers
-    status_counts = defaultdict(int)
-    for result in results:
-        status_counts[result.current_bagger_type] += 1
+    status_counts = dict(summary["current_bagger_type"].value_counts().iter_rows())
 
     print(f"\nCurrent Status Distribution:")
     for status in BaggerType:
-        count = status_counts[status]
-        pct = (count / len(results)) * 100
+        count = status_counts.get(status.value, 0)
+        pct = (count / len(summary)) * 100
         print(f"  {status.value}: {count:,} ({pct:.1f}%)")
 
     # Peak achievements
-    peak_10x = sum(1 for r in results if r.max_return_multiple >= 10)
-    peak_100x = sum(1 for r in results if r.max_return_multiple >= 100)
+    peak_10x = (summary["max_return_multiple"] >= 10).sum()
+    peak_100x = (summary["max_return_multiple"] >= 100).sum()
 
     print(f"\nPeak Achievements:")
-    print(f"  Ever reached 10x+: {peak_10x:,} ({(peak_10x / len(results)) * 100:.1f}%)")
-    print(f"  Ever reached 100x+: {peak_100x:,} ({(peak_100x / len(results)) * 100:.1f}%)")
+    print(f"  Ever reached 10x+: {peak_10x:,} ({(peak_10x / len(summary)) * 100:.1f}%)")
+    print(f"  Ever reached 100x+: {peak_100x:,} ({(peak_100x / len(summary)) * 100:.1f}%)")
 
     # Current vs fallen analysis
-    current_10x = sum(1 for r in results if r.current_return_multiple >= 10)
-    current_100x = sum(1 for r in results if r.current_return_multiple >= 100)
-    fallen_multi = status_counts[BaggerType.FALLEN_MULTIBAGGER]
-    fallen_hundred = status_counts[BaggerType.FALLEN_HUNDRED_BAGGER]
+    current_10x = (summary["current_return_multiple"] >= 10).sum()
+    current_100x = (summary["current_return_multiple"] >= 100).sum()
+    fallen_multi = status_counts.get(BaggerType.FALLEN_MULTIBAGGER.value, 0)
+    fallen_hundred = status_counts.get(BaggerType.FALLEN_HUNDRED_BAGGER.value, 0)
 
     print(f"\nCurrent vs Fallen:")
     print(f"  Currently 10x+: {current_10x:,}")
@@ -579,12 +1249,14 @@ def print_quick_summary(results: List[BaggerResult]):
     print(f"  Fallen from 100x+: {fallen_hundred:,}")
 
     # Top current performers
-    current_baggers = [r for r in results if r.current_return_multiple >= 10]
-    if current_baggers:
-        top_current = sorted(current_baggers, key=lambda x: x.current_return_multiple, reverse=True)[:5]
+    top_current = (summary
+                   .filter(pl.col("current_return_multiple") >= 10)
+                   .sort("current_return_multiple", descending=True)
+                   .head(5))
+    if len(top_current):
         print(f"\nTop 5 Current Performers:")
-        for r in top_current:
-            print(f"  {r.ticker}: {r.current_return_multiple:.1f}x")
+        for ticker, multiple in top_current.select(["ticker", "current_return_multiple"]).iter_rows():
+            print(f"  {ticker}: {multiple:.1f}x")
 
 
 def main():
@@ -598,24 +1270,27 @@ def main():
     partitioned_data_dir = "stock_data_partitioned"
     min_days = 252  # Require at least 1 year of data
     output_file = "bagger_analysis_milestones.parquet"
+    cache_dir = None  # e.g. "stock_data_cache" to memory-map Arrow copies on repeat runs
+    workers = os.cpu_count() or 1
 
-    # Run analysis
-    results = analyze_all_tickers(
+    # Run analysis, streaming the summary, milestones and transitions tables to disk
+    rows = analyze_all_tickers_to_parquet(
         partitioned_data_dir=partitioned_data_dir,
+        output_file=output_file,
         min_days=min_days,
+        cache_dir=cache_dir,
+        workers=workers,
     )
 
-    if results:
+    if rows["summary"]:
         # Print quick summary
-        print_quick_summary(results)
-
-        # Save results
-        save_results_to_parquet(results, output_file)
+        print_quick_summary(pl.read_parquet(output_file))
 
         print(f"\n🎉 Analysis complete!")
         print(f"Results saved to: {output_file}")
         print(f"\nYou can now analyze the results using:")
         print(f"  df = pl.read_parquet('{output_file}')")
+        print(f"  python bagger_analysis.py  # explores the summary, milestones and transitions")
 
     else:
         print("❌ No successful analyses. Check your data directory.")
@@ -0,0 +1,81 @@
+import argparse
+import os
+import tempfile
+import time
+from concurrent.futures import ProcessPoolExecutor
+from itertools import islice
+from pathlib import Path
+
+from bulk_data import StockDataManager
+
+try:
+    import resource
+except ImportError:  # Unix only
+    resource = None
+
+
+def _run_import(method: str, csv_file: str, db_path: str) -> dict:
+    """Import ``csv_file`` into a fresh database using one import path."""
+    manager = StockDataManager(db_path=db_path)
+    started = time.perf_counter()
+    with manager.bulk_load():
+        if method == "pandas":
+            rows = manager.import_existing_csv(csv_file)
+        else:
+            rows = manager.import_csv_columnar(csv_file)
+    elapsed = time.perf_counter() - started
+
+    # ru_maxrss is reported in KB on Linux; not available on Windows
+    peak_rss_mb = (resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+                   if resource is not None else float("nan"))
+    return {"method": method, "rows": rows, "seconds": elapsed, "peak_rss_mb": peak_rss_mb}
+
+
+def _truncate_csv(csv_file: str, max_rows: int, output_file: str) -> None:
+    """Copy the header and the first ``max_rows`` data rows of a CSV."""
+    with open(csv_file, "r") as src, open(output_file, "w") as dst:
+        dst.writelines(islice(src, max_rows + 1))
+
+
+def main() -> None:
+    """Compare the pandas dict-based CSV import with the columnar Arrow import."""
+    parser = argparse.ArgumentParser(description="Benchmark StockDataManager CSV import paths")
+    parser.add_argument("--csv-file", default="us_stocks_bulk_data.csv",
+                        help="CSV to import (default: us_stocks_bulk_data.csv)")
+    parser.add_argument("--max-rows", type=int,
+                        help="Only import the first N rows of the CSV")
+    args = parser.parse_args()
+
+    if not Path(args.csv_file).exists():
+        print(f"CSV file {args.csv_file} not found")
+        return
+
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        csv_file = args.csv_file
+        if args.max_rows:
+            csv_file = os.path.join(tmp_dir, "sample.csv")
+            _truncate_csv(args.csv_file, args.max_rows, csv_file)
+
+        size_mb = Path(csv_file).stat().st_size / (1024 * 1024)
+        print(f"Benchmarking import of {csv_file} ({size_mb:,.0f} MB)")
+
+        results = []
+        for method in ("pandas", "columnar"):
+            db_path = os.path.join(tmp_dir, f"{method}.db")
+            # Each run gets its own process so peak RSS is measured separately
+            with ProcessPoolExecutor(max_workers=1) as executor:
+                results.append(executor.submit(_run_import, method, csv_file, db_path).result())
+            os.remove(db_path)
+
+    print(f"\n{'Method':<10} {'Rows':>14} {'Seconds':>10} {'Rows/sec':>12} {'Peak RSS MB':>12}")
+    for r in results:
+        rate = r["rows"] / r["seconds"] if r["seconds"] > 0 else 0.0
+        print(f"{r['method']:<10} {r['rows']:>14,} {r['seconds']:>10.1f} {rate:>12,.0f} {r['peak_rss_mb']:>12,.0f}")
+
+    baseline, columnar = results
+    if columnar["seconds"] > 0:
+        print(f"\nColumnar import speedup: {baseline['seconds'] / columnar['seconds']:.2f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,110 @@
+import argparse
+import shutil
+import tempfile
+import time
+from pathlib import Path
+
+import numpy as np
+import polars as pl
+
+from parquet import PartitionedParquetConverter
+
+
+def generate_synthetic_csv(path: str, rows: int, codes: int, seed: int = 42) -> None:
+    """Write a stock_data.csv-shaped file ordered by (date, code), like the SQLite export.
+
+    Args:
+        path: Output CSV path
+        rows: Approximate number of rows to write
+        codes: Number of distinct tickers per day
+        seed: Random seed for prices
+    """
+    rng = np.random.default_rng(seed)
+    code_names = np.array([f"SYN{i:05d}" for i in range(codes)])
+    days = max(1, rows // codes)
+    days_per_chunk = max(1, 2_000_000 // codes)
+    start = np.datetime64("1995-01-02")
+
+    print(f"Generating {days * codes:,} rows ({codes:,} codes x {days:,} days) into {path}...")
+    with open(path, "wb") as f:
+        for chunk_start in range(0, days, days_per_chunk):
+            chunk_days = min(days_per_chunk, days - chunk_start)
+            dates = (start + np.arange(chunk_start, chunk_start + chunk_days)).astype(str)
+            n = chunk_days * codes
+            close = rng.lognormal(3.0, 1.0, n)
+            chunk = pl.DataFrame({
+                "code": np.tile(code_names, chunk_days),
+                "exchange_short_name": "NYSE",
+                "date": np.repeat(dates, codes),
+                "open": close * 0.99,
+                "high": close * 1.01,
+                "low": close * 0.98,
+                "close": close,
+                "adjusted_close": close,
+                "volume": rng.integers(1_000, 1_000_000, n).astype(np.float64),
+            })
+            chunk.write_csv(f, include_header=(chunk_start == 0))
+
+
+def _time_conversion(label: str, csv_file: str, output_dir: str, convert) -> float:
+    """Run one converter into a fresh directory and return its wall time."""
+    shutil.rmtree(output_dir, ignore_errors=True)
+    converter = PartitionedParquetConverter(csv_file, output_dir)
+    started = time.perf_counter()
+    ok = convert(converter)
+    elapsed = time.perf_counter() - started
+    rows = 0
+    if ok:
+        # Only the partitions; the manifest sits next to them
+        rows = (pl.scan_parquet(f"{output_dir}/code=*/*.parquet", hive_partitioning=False)
+                .select(pl.len()).collect().item())
+    print(f"\n{label}: {elapsed:.1f}s, {rows:,} rows written")
+    return elapsed
+
+
+def main() -> None:
+    """Benchmark the single-pass and parallel partition writers against the batch/rewrite converter."""
+    parser = argparse.ArgumentParser(description="Benchmark partitioned Parquet conversion")
+    parser.add_argument("--rows", type=int, default=100_000_000, help="Synthetic rows (default: 100M)")
+    parser.add_argument("--codes", type=int, default=20_000, help="Distinct tickers (default: 20k)")
+    parser.add_argument("--batch-size", type=int, default=5_000_000)
+    parser.add_argument("--csv-file", help="Use an existing CSV instead of generating one")
+    parser.add_argument("--work-dir", help="Directory for the CSV and outputs (default: temp dir)")
+    parser.add_argument("--skip-legacy", action="store_true",
+                        help="Only run the single-pass converter (the legacy one is very slow at 100M rows)")
+    parser.add_argument("--workers", type=int, default=0,
+                        help="Also run the parallel converter with this many worker processes")
+    args = parser.parse_args()
+
+    work_dir = Path(args.work_dir or tempfile.mkdtemp(prefix="partition_bench_"))
+    work_dir.mkdir(parents=True, exist_ok=True)
+
+    csv_file = args.csv_file
+    if csv_file is None:
+        csv_file = str(work_dir / "synthetic_stock_data.csv")
+        generate_synthetic_csv(csv_file, args.rows, args.codes)
+    print(f"CSV size: {Path(csv_file).stat().st_size / 1e9:.2f} GB")
+
+    timings = {}
+    if not args.skip_legacy:
+        timings["legacy"] = _time_conversion(
+            "Legacy batch/rewrite converter", csv_file, str(work_dir / "legacy"),
+            lambda c: c.convert_to_partitioned_parquet(batch_size=args.batch_size))
+    timings["single_pass"] = _time_conversion(
+        "Single-pass converter", csv_file, str(work_dir / "single_pass"),
+        lambda c: c.convert_single_pass(batch_size=args.batch_size))
+    if args.workers:
+        timings["parallel"] = _time_conversion(
+            f"Parallel converter ({args.workers} workers)", csv_file, str(work_dir / "parallel"),
+            lambda c: c.convert_parallel(workers=args.workers, batch_size=args.batch_size))
+
+    print(f"\n{'Converter':<14} {'Seconds':>10}")
+    for label, seconds in timings.items():
+        print(f"{label:<14} {seconds:>10.1f}")
+    if "legacy" in timings and timings["single_pass"] > 0:
+        print(f"Speedup: {timings['legacy'] / timings['single_pass']:.2f}x")
+    print(f"Outputs kept in {work_dir}")
+
+
+if __name__ == "__main__":
+    main()
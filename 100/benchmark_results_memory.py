@@ -0,0 +1,115 @@
+import argparse
+import dataclasses
+import pickle
+import tempfile
+import time
+import tracemalloc
+from pathlib import Path
+
+import numpy as np
+import polars as pl
+
+from baggers import BaggerMilestone, BaggerResult, BaggerTransition, analyze_all_tickers
+
+def _plain_dataclass(cls: type) -> type:
+    """Unslotted dataclass with the same fields as ``cls``, the pre-compact layout."""
+    plain = dataclasses.make_dataclass(f"Plain{cls.__name__[len('Bagger'):]}",
+                                       [(f.name, f.type) for f in dataclasses.fields(cls)])
+    plain.__module__ = __name__  # so pickle can find it
+    return plain
+
+
+# The pre-compact layout: dict-backed dataclasses, a list of transitions and
+# a plain dict of status days
+PlainTransition = _plain_dataclass(BaggerTransition)
+PlainMilestone = _plain_dataclass(BaggerMilestone)
+PlainResult = _plain_dataclass(BaggerResult)
+
+
+def to_plain(result: BaggerResult) -> PlainResult:
+    """Copy a result into the old object-per-value layout."""
+    values = {f.name: getattr(result, f.name) for f in dataclasses.fields(BaggerResult)}
+    values["milestones"] = [PlainMilestone(**dataclasses.asdict(m)) for m in result.milestones]
+    values["transitions"] = [PlainTransition(**{f.name: getattr(t, f.name)
+                                                for f in dataclasses.fields(BaggerTransition)})
+                             for t in result.transitions]
+    values["time_in_status"] = dict(result.time_in_status)
+    return PlainResult(**values)
+
+
+def generate_synthetic_store(output_dir: str, tickers: int, days: int, seed: int = 42) -> None:
+    """Write random-walk price histories as code=<ticker>/data.parquet partitions.
+
+    Args:
+        output_dir: Partitioned store to create
+        tickers: Number of tickers
+        days: Trading days per ticker
+        seed: Random seed for the walks
+    """
+    rng = np.random.default_rng(seed)
+    dates = pl.date_range(pl.date(1995, 1, 2), pl.date(1995, 1, 2) + pl.duration(days=days - 1),
+                          eager=True)
+    print(f"Generating {tickers:,} tickers x {days:,} days into {output_dir}...")
+    for i in range(tickers):
+        # Wide daily moves so the walks cross the 10x/100x levels often
+        close = np.exp(np.cumsum(rng.normal(0.001, 0.06, days)))
+        partition = Path(output_dir) / f"code=SYN{i:05d}"
+        partition.mkdir(parents=True, exist_ok=True)
+        pl.DataFrame({"date": dates, "adjusted_close": close}).write_parquet(partition / "data.parquet")
+
+
+def measure_retained(blob: bytes) -> tuple:
+    """Bytes retained by the objects unpickled from ``blob``, and the unpickle time."""
+    tracemalloc.start()
+    before = tracemalloc.get_traced_memory()[0]
+    started = time.perf_counter()
+    objects = pickle.loads(blob)
+    elapsed = time.perf_counter() - started
+    retained = tracemalloc.get_traced_memory()[0] - before
+    tracemalloc.stop()
+    del objects
+    return retained, elapsed
+
+
+def main() -> None:
+    """Compare the memory held by compact and plain BaggerResult lists."""
+    parser = argparse.ArgumentParser(description="Benchmark the memory footprint of BaggerResult lists")
+    parser.add_argument("--data-dir", help="Analyze this store instead of a synthetic one")
+    parser.add_argument("--tickers", type=int, default=2_000, help="Synthetic tickers (default: 2k)")
+    parser.add_argument("--days", type=int, default=2_520, help="Synthetic days per ticker (default: 2520)")
+    parser.add_argument("--min-days", type=int, default=252)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory(prefix="results_memory_") as tmp_dir:
+        data_dir = args.data_dir
+        if data_dir is None:
+            data_dir = str(Path(tmp_dir) / "store")
+            generate_synthetic_store(data_dir, args.tickers, args.days)
+
+        results = analyze_all_tickers(data_dir, min_days=args.min_days)
+        if not results:
+            print("❌ No results to measure")
+            return
+
+        plain = [to_plain(r) for r in results]
+        blobs = {"plain": pickle.dumps(plain), "compact": pickle.dumps(results)}
+        del plain
+
+    transitions = sum(len(r.transitions) for r in results)
+    milestones = sum(len(r.milestones) for r in results)
+    print(f"\n{len(results):,} results, {transitions:,} transitions, {milestones:,} milestones")
+
+    measured = {}
+    print(f"\n{'Layout':<10} {'Retained MB':>12} {'Bytes/ticker':>13} {'Pickle MB':>10} {'Unpickle s':>11}")
+    for layout, blob in blobs.items():
+        retained, seconds = measure_retained(blob)
+        measured[layout] = retained
+        print(f"{layout:<10} {retained / 1e6:>12.1f} {retained / len(results):>13,.0f} "
+              f"{len(blob) / 1e6:>10.1f} {seconds:>11.2f}")
+
+    if measured["compact"] > 0:
+        print(f"\nMemory reduction: {measured['plain'] / measured['compact']:.1f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,27 +1,90 @@
+import argparse
 import asyncio
+from collections import deque
+from contextlib import asynccontextmanager, contextmanager
+import csv
 import datetime
+from itertools import repeat
 import os
 from pathlib import Path
+import queue
+import random
 import sqlite3
+import threading
+import time
 
 import aiohttp
 import pandas as pd
 from dotenv import load_dotenv
 
+from compact_schema import (
+    COMPACT_SECONDARY_INDEXES, JULIAN_DAY_EPOCH, create_compact_schema, create_compat_view,
+    is_compact, to_day_number_sql,
+)
+from eodhd.http_cache import CachingSession, ResponseCache, get_base_url
+from trading_calendar import nyse_trading_day_strs
+
 load_dotenv()
 api_token = os.environ.get("EODHD_API_TOKEN")
 
 
+STOCK_DATA_COLUMNS = [
+    "code", "exchange_short_name", "date", "open", "high", "low",
+    "close", "adjusted_close", "volume",
+]
+
+# Secondary indexes on stock_data. Bulk loads drop these and rebuild them
+# once at the end instead of maintaining them on every inserted row.
+SECONDARY_INDEXES = {
+    "idx_date": "CREATE INDEX IF NOT EXISTS idx_date ON stock_data(date)",
+}
+
+# Ingests of at least this many days drop and rebuild the secondary indexes;
+# smaller (e.g. nightly) updates keep them, since a rebuild scans the whole table
+DEFER_INDEXES_MIN_DATES = 30
+
+
+def exchange_db_path(exchange):
+    """Database file holding one exchange's partition (US keeps stock_data.db)."""
+    return "stock_data.db" if exchange == "US" else f"stock_data_{exchange}.db"
+
+
+def exchange_csv_path(exchange):
+    """CSV export path for one exchange's partition."""
+    return f"{exchange.lower()}_stocks_bulk_data.csv"
+
+
 class StockDataManager:
-    def __init__(self, db_path="stock_data.db", csv_path="us_stocks_bulk_data.csv"):
-        self.db_path = db_path
-        self.csv_path = csv_path
+    def __init__(self, db_path=None, csv_path=None, exchange="US", compact=False):
+        """Initialize the manager.
+
+        Args:
+            db_path: SQLite file (defaults to the exchange's partition file)
+            csv_path: CSV export path (defaults to the exchange's CSV)
+            exchange: EODHD exchange code of this partition
+            compact: Create new databases with the integer-keyed compact
+                schema. Existing databases keep whichever schema they have.
+        """
+        self.exchange = exchange
+        self.db_path = db_path or exchange_db_path(exchange)
+        self.csv_path = csv_path or exchange_csv_path(exchange)
+        self.compact = compact
+        self._bulk_conn = None
+        self._bulk_commit_every = 0
+        self._bulk_pending_rows = 0
+        self._bulk_rows = 0
         self.init_database()
 
     def init_database(self):
         """Initialize SQLite database with proper schema."""
         print("Initializing SQLite database...")
         with sqlite3.connect(self.db_path) as conn:
+            is_new = conn.execute("SELECT 1 FROM sqlite_master WHERE name = 'stock_data'").fetchone() is None
+            if self.compact and is_new:
+                create_compact_schema(conn)
+                create_compat_view(conn)
+            self.compact = is_compact(conn)
+
             conn.execute("""
                          CREATE TABLE IF NOT EXISTS stock_data
                          (
@@ -52,11 +115,110 @@ class StockDataManager:
                              )
                          """)
 
-            # Create index for faster queries
+            # Create indexes for faster queries (also restores them if a
+            # previous bulk load was interrupted before rebuilding)
+            for create_sql in self._secondary_indexes().values():
+                conn.execute(create_sql)
+
+            # Per-date bookkeeping so gap planning never scans stock_data
             conn.execute("""
-                         CREATE INDEX IF NOT EXISTS idx_date
-                             ON stock_data(date)
+                         CREATE TABLE IF NOT EXISTS ingested_dates
+                         (
+                             date TEXT PRIMARY KEY,
+                             row_count INTEGER NOT NULL,
+                             ingested_at TEXT
+                         )
                          """)
+            needs_sync = (conn.execute("SELECT 1 FROM ingested_dates LIMIT 1").fetchone() is None
+                          and conn.execute("SELECT 1 FROM stock_data LIMIT 1").fetchone() is not None)
+
+        if needs_sync:
+            self.sync_ingested_dates()
+
+    def _secondary_indexes(self):
+        """Secondary indexes of whichever schema this database uses."""
+        return COMPACT_SECONDARY_INDEXES if self.compact else SECONDARY_INDEXES
+
+    def sync_ingested_dates(self):
+        """Rebuild ingested_dates from stock_data (one full scan)."""
+        print("Rebuilding ingested_dates from stock_data...")
+        with sqlite3.connect(self.db_path) as conn:
+            conn.execute("DELETE FROM ingested_dates")
+            conn.execute("""
+                INSERT INTO ingested_dates (date, row_count, ingested_at)
+                SELECT date, COUNT(*), datetime('now') FROM stock_data GROUP BY date
+            """)
+            count = conn.execute("SELECT COUNT(*) FROM ingested_dates").fetchone()[0]
+        print(f"Recorded {count} ingested dates")
+
+    def get_ingested_dates(self):
+        """Get {date: row_count} for every ingested date."""
+        with sqlite3.connect(self.db_path) as conn:
+            cursor = conn.execute("SELECT date, row_count FROM ingested_dates ORDER BY date")
+            return dict(cursor.fetchall())
+
+    @contextmanager
+    def bulk_load(self, commit_every=500_000, cache_size_mb=512, defer_indexes=True):
+        """Fast-load mode for backfills.
+
+        While active, save_batch_to_db writes through one long-lived WAL
+        connection and commits every ``commit_every`` rows instead of once per
+        call. Secondary indexes are dropped on entry and rebuilt once on exit,
+        which costs a full-table scan, so only defer them for large loads.
+        The previous journal mode is restored on exit. The connection may be
+        used from a single writer thread.
+
+        Args:
+            commit_every: Rows per transaction (default: 500k)
+            cache_size_mb: SQLite page cache size for the load connection
+            defer_indexes: Drop secondary indexes during the load
+        """
+        conn = sqlite3.connect(self.db_path, check_same_thread=False)
+        previous_journal_mode = conn.execute("PRAGMA journal_mode").fetchone()[0]
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.execute("PRAGMA synchronous=NORMAL")
+        conn.execute(f"PRAGMA cache_size=-{cache_size_mb * 1024}")
+        conn.execute("PRAGMA temp_store=MEMORY")
+
+        if defer_indexes:
+            for index_name in self._secondary_indexes():
+                conn.execute(f"DROP INDEX IF EXISTS {index_name}")
+            conn.commit()
+
+        self._bulk_conn = conn
+        self._bulk_commit_every = commit_every
+        self._bulk_pending_rows = 0
+        self._bulk_rows = 0
+        started = time.perf_counter()
+        print(f"Bulk load mode enabled (WAL, commit every {commit_every:,} rows)")
+
+        try:
+            yield self
+        finally:
+            self._bulk_conn = None
+            # Rows already written are valid even if the load was interrupted
+            conn.commit()
+            load_seconds = time.perf_counter() - started
+            try:
+                if defer_indexes:
+                    print("Rebuilding secondary indexes...")
+                    index_started = time.perf_counter()
+                    for create_sql in self._secondary_indexes().values():
+                        conn.execute(create_sql)
+                    conn.commit()
+                    print(f"Indexes rebuilt in {time.perf_counter() - index_started:.1f}s")
+                if previous_journal_mode.lower() != "wal":
+                    try:
+                        conn.execute(f"PRAGMA journal_mode={previous_journal_mode}")
+                    except sqlite3.OperationalError as e:
+                        # Leaving WAL needs the only connection to the file
+                        print(f"Could not restore journal mode {previous_journal_mode}: {e}")
+            finally:
+                conn.close()
+
+            rate = self._bulk_rows / load_seconds if load_seconds > 0 else 0.0
+            print(f"Bulk load finished: {self._bulk_rows:,} rows in {load_seconds:.1f}s "
+                  f"({rate:,.0f} rows/sec)")
 
     def get_latest_date(self):
         """Get the latest date in the database."""
@@ -65,6 +227,32 @@ class StockDataManager:
             result = cursor.fetchone()[0]
             return result
 
+    def read_ticker(self, code, start_date=None, end_date=None):
+        """Read one ticker's rows, optionally limited to a date range.
+
+        On a compact database this is a single range scan of the clustered
+        (symbol_id, day) key instead of a lookup through the text index.
+        """
+        start_date = start_date or "0000-01-01"
+        end_date = end_date or "9999-12-31"
+        with sqlite3.connect(self.db_path) as conn:
+            if self.compact:
+                return pd.read_sql_query(f"""
+                    SELECT s.code, e.exchange_short_name, date(p.day + {JULIAN_DAY_EPOCH}) AS date,
+                           p.open, p.high, p.low, p.close, p.adjusted_close, p.volume
+                    FROM prices p
+                             JOIN symbols s ON s.symbol_id = p.symbol_id
+                             LEFT JOIN exchanges e ON e.exchange_id = p.exchange_id
+                    WHERE s.code = ?
+                      AND p.day BETWEEN {to_day_number_sql("?")} AND {to_day_number_sql("?")}
+                    ORDER BY p.day
+                """, conn, params=(code, start_date, end_date))
+            return pd.read_sql_query("""
+                SELECT * FROM stock_data
+                WHERE code = ? AND date BETWEEN ? AND ?
+                ORDER BY date
+            """, conn, params=(code, start_date, end_date))
+
     def get_existing_dates(self):
         """Get all existing dates to avoid duplicates."""
         with sqlite3.connect(self.db_path) as conn:
@@ -76,12 +264,12 @@ class StockDataManager:
         if not batch_data:
             return 0
 
-        # Prepare data for insertion
-        records = []
-        for entry in batch_data:
-            records.append((
+        # Prepare data for insertion; rows without an exchange_short_name
+        # are tagged with this partition's exchange
+        records = [
+            (
                 entry.get('code', ''),
-                entry.get('exchange_short_name', ''),
+                entry.get('exchange_short_name') or self.exchange,
                 entry.get('date', ''),
                 entry.get('open'),
                 entry.get('high'),
@@ -89,15 +277,44 @@ class StockDataManager:
                 entry.get('close'),
                 entry.get('adjusted_close'),
                 entry.get('volume')
-            ))
+            )
+            for entry in batch_data
+        ]
+
+        return self._insert_records(records)
+
+    def save_day(self, date_str, day_data):
+        """Save one bulk day and record its row count in ingested_dates."""
+        saved = self.save_batch_to_db(day_data)
+        self._write("""
+            INSERT OR REPLACE INTO ingested_dates (date, row_count, ingested_at)
+            VALUES (?, ?, datetime('now'))
+        """, [(date_str, saved)], count_rows=False)
+        return saved
+
+    def _insert_records(self, records):
+        """Insert stock_data row tuples."""
+        # Use INSERT OR REPLACE to handle duplicates
+        return self._write(f"""
+            INSERT OR REPLACE INTO stock_data
+            ({', '.join(STOCK_DATA_COLUMNS)})
+            VALUES ({', '.join('?' * len(STOCK_DATA_COLUMNS))})
+        """, records)
+
+    def _write(self, sql, records, count_rows=True):
+        """Run executemany, batching commits when bulk load mode is active."""
+        if self._bulk_conn is not None:
+            self._bulk_conn.executemany(sql, records)
+            if count_rows:
+                self._bulk_pending_rows += len(records)
+                self._bulk_rows += len(records)
+            if self._bulk_pending_rows >= self._bulk_commit_every:
+                self._bulk_conn.commit()
+                self._bulk_pending_rows = 0
+            return len(records)
 
         with sqlite3.connect(self.db_path) as conn:
-            # Use INSERT OR REPLACE to handle duplicates
-            conn.executemany("""
-                INSERT OR REPLACE INTO stock_data 
-                (code, exchange_short_name, date, open, high, low, close, adjusted_close, volume)
-                VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)
-            """, records)
+            conn.executemany(sql, records)
 
         return len(records)
 
@@ -129,206 +346,647 @@ class StockDataManager:
         print(f"CSV import completed. Total records imported: {total_imported}")
         return total_imported
 
+    def import_csv_columnar(self, csv_file_path, block_size_mb=16):
+        """Import a CSV by reading it in columnar Arrow batches.
+
+        Each batch's columns are zipped straight into row tuples for
+        executemany, so no per-row dicts are created. Columns missing from
+        the CSV are filled the same way save_batch_to_db fills missing keys:
+        empty strings for code and date, NULL for prices and volume, and this
+        partition's exchange for a missing or empty exchange_short_name.
+
+        Args:
+            csv_file_path: Path to the CSV file
+            block_size_mb: Size of each Arrow read block
+
+        Returns:
+            Number of records imported
+        """
+        import pyarrow as pa
+        import pyarrow.compute as pc
+        import pyarrow.csv as pv
+
+        if not Path(csv_file_path).exists():
+            print(f"CSV file {csv_file_path} not found")
+            return 0
+
+        print(f"Importing existing CSV (columnar): {csv_file_path}")
+
+        column_types = {
+            "code": pa.string(),
+            "exchange_short_name": pa.string(),
+            "date": pa.string(),
+            "open": pa.float64(),
+            "high": pa.float64(),
+            "low": pa.float64(),
+            "close": pa.float64(),
+            "adjusted_close": pa.float64(),
+            "volume": pa.float64(),
+        }
+        string_columns = {"code", "exchange_short_name", "date"}
+
+        reader = pv.open_csv(
+            csv_file_path,
+            read_options=pv.ReadOptions(block_size=block_size_mb * 1024 * 1024),
+            convert_options=pv.ConvertOptions(column_types=column_types),
+        )
+        present = set(reader.schema.names)
+
+        total_imported = 0
+        batch_count = 0
+        for batch in reader:
+            batch_count += 1
+            columns = []
+            for name in STOCK_DATA_COLUMNS:
+                if name == "exchange_short_name":
+                    if name in present:
+                        column = batch.column(name)
+                        column = pc.if_else(pc.equal(column, ""), self.exchange, column)
+                        columns.append(column.fill_null(self.exchange).to_pylist())
+                    else:
+                        columns.append(repeat(self.exchange, batch.num_rows))
+                elif name in present:
+                    columns.append(batch.column(name).to_pylist())
+                else:
+                    columns.append(repeat('' if name in string_columns else None, batch.num_rows))
+
+            imported = self._insert_records(list(zip(*columns)))
+            total_imported += imported
+            print(f"Imported {imported} records from batch {batch_count}")
+
+        print(f"CSV import completed. Total records imported: {total_imported}")
+        return total_imported
+
     def export_to_csv_incremental(self, chunk_size=50000):
         """Export database to CSV in chunks to manage memory."""
-        print("Exporting database to CSV...")
+        return self.export_streaming(self.csv_path, fmt="csv", chunk_size=chunk_size)
 
-        with sqlite3.connect(self.db_path) as conn:
-            # Get total count
-            total_count = conn.execute("SELECT COUNT(*) FROM stock_data").fetchone()[0]
-            print(f"Total records to export: {total_count}")
+    def export_streaming(self, output_path, fmt="csv", chunk_size=100_000):
+        """Stream the whole table to CSV or Parquet ordered by (date, code).
 
-            # Export in chunks
-            offset = 0
-            first_chunk = True
+        Rows come from a single forward cursor, so each row is read once and
+        memory stays at one chunk regardless of table size. For Parquet every
+        chunk becomes one row group.
 
-            while offset < total_count:
-                df = pd.read_sql_query(
-                    f"""SELECT * FROM stock_data 
-                        ORDER BY date, code 
-                        LIMIT {chunk_size} OFFSET {offset}""",
-                    conn
-                )
+        Args:
+            output_path: File to write
+            fmt: "csv" or "parquet"
+            chunk_size: Rows fetched per chunk / Parquet row group size
 
-                if len(df) == 0:
-                    break
+        Returns:
+            Number of rows exported
+        """
+        if fmt not in ("csv", "parquet"):
+            raise ValueError(f"Unsupported export format: {fmt}")
 
-                # Write to CSV
-                mode = 'w' if first_chunk else 'a'
-                header = first_chunk
-                df.to_csv(self.csv_path, mode=mode, header=header, index=False)
+        print(f"Exporting database to {fmt.upper()}: {output_path}")
+        started = time.perf_counter()
+        exported = 0
 
-                offset += chunk_size
-                first_chunk = False
-                print(f"Exported {min(offset, total_count)}/{total_count} records")
-
-        print(f"CSV export completed: {self.csv_path}")
+        with sqlite3.connect(self.db_path) as conn:
+            total_count = conn.execute("SELECT COUNT(*) FROM stock_data").fetchone()[0]
+            print(f"Total records to export: {total_count}")
 
+            if self.compact:
+                # Order on the integer day so the day index drives the scan
+                cursor = conn.execute(f"""
+                    SELECT s.code, e.exchange_short_name, date(p.day + {JULIAN_DAY_EPOCH}),
+                           p.open, p.high, p.low, p.close, p.adjusted_close, p.volume
+                    FROM prices p
+                             JOIN symbols s ON s.symbol_id = p.symbol_id
+                             LEFT JOIN exchanges e ON e.exchange_id = p.exchange_id
+                    ORDER BY p.day, s.code
+                """)
+            else:
+                cursor = conn.execute(f"""
+                    SELECT {', '.join(STOCK_DATA_COLUMNS)}
+                    FROM stock_data
+                    ORDER BY date, code
+                """)
+
+            if fmt == "csv":
+                with open(output_path, "w", newline="") as f:
+                    writer = csv.writer(f)
+                    writer.writerow(STOCK_DATA_COLUMNS)
+                    while rows := cursor.fetchmany(chunk_size):
+                        writer.writerows(rows)
+                        exported += len(rows)
+                        print(f"Exported {exported}/{total_count} records")
+            else:
+                import pyarrow as pa
+                import pyarrow.parquet as pq
+
+                schema = pa.schema([
+                    ("code", pa.string()),
+                    ("exchange_short_name", pa.string()),
+                    ("date", pa.string()),
+                    ("open", pa.float64()),
+                    ("high", pa.float64()),
+                    ("low", pa.float64()),
+                    ("close", pa.float64()),
+                    ("adjusted_close", pa.float64()),
+                    ("volume", pa.float64()),
+                ])
+                with pq.ParquetWriter(output_path, schema, compression="snappy") as writer:
+                    while rows := cursor.fetchmany(chunk_size):
+                        columns = list(zip(*rows))
+                        writer.write_table(pa.Table.from_arrays(
+                            [pa.array(col, type=field.type) for col, field in zip(columns, schema)],
+                            schema=schema
+                        ))
+                        exported += len(rows)
+                        print(f"Exported {exported}/{total_count} records")
+
+        elapsed = time.perf_counter() - started
+        rate = exported / elapsed if elapsed > 0 else 0.0
+        print(f"{fmt.upper()} export completed: {output_path} "
+              f"({exported:,} rows, {rate:,.0f} rows/sec)")
+        return exported
+
+
+class GapPlanner:
+    """Plans which NYSE trading sessions still need to be fetched.
+
+    Works from the ingested_dates bookkeeping table, so planning is O(days)
+    and never touches stock_data. A session counts as short when it has
+    fewer than ``short_day_ratio`` times the median row count of the
+    previous ``window`` ingested sessions.
+
+    Only the US partition has a holiday calendar. Other exchanges are
+    planned on weekdays, and a day that came back empty is taken to be a
+    local holiday rather than a hole.
+    """
+
+    def __init__(self, data_manager, short_day_ratio=0.5, window=20):
+        self.data_manager = data_manager
+        self.short_day_ratio = short_day_ratio
+        self.window = window
+        self.has_calendar = data_manager.exchange == "US"
+
+    def plan(self, start_date, end_date):
+        """Find missing and suspiciously short sessions in a date range.
+
+        Args:
+            start_date: First date to consider (datetime.date)
+            end_date: Last date to consider (datetime.date)
+
+        Returns:
+            Tuple of (missing dates, short dates) as sorted ISO date strings
+        """
+        ingested = self.data_manager.get_ingested_dates()
+        recent_counts = deque(maxlen=self.window)
+        missing = []
+        short = []
+
+        if self.has_calendar:
+            sessions = nyse_trading_day_strs(start_date, end_date)
+        else:
+            sessions = [d.strftime("%Y-%m-%d") for d in pd.bdate_range(start=start_date, end=end_date)]
+
+        for date_str in sessions:
+            row_count = ingested.get(date_str)
+            if row_count is None:
+                missing.append(date_str)
+                continue
+            if row_count == 0 and not self.has_calendar:
+                continue
 
-async def fetch_day_data(session, date_str, semaphore, existing_dates):
-    """Fetch bulk data for a specific date using aiohttp."""
+            if recent_counts:
+                median = sorted(recent_counts)[len(recent_counts) // 2]
+                if row_count < median * self.short_day_ratio:
+                    short.append(date_str)
+                    continue
+            elif row_count == 0:
+                short.append(date_str)
+                continue
+            recent_counts.append(row_count)
+
+        return missing, short
+
+
+# Status codes that mean "slow down and try again later"
+RETRYABLE_STATUSES = {408, 429, 500, 502, 503, 504}
+
+
+class FetchError(Exception):
+    """Raised when a bulk day could not be fetched."""
+
+    def __init__(self, date_str, reason, status=None, retryable=True, retry_after=None):
+        super().__init__(f"{date_str}: {reason}")
+        self.date_str = date_str
+        self.status = status
+        self.retryable = retryable
+        self.retry_after = retry_after
+
+
+class AdaptiveConcurrencyLimiter:
+    """AIMD concurrency limit for API requests.
+
+    The limit grows additively (about one slot per window of successful
+    requests) while latency stays under ``target_latency``, and is cut
+    multiplicatively when the API pushes back with 429/5xx responses,
+    timeouts or slow replies. Decreases are rate limited by ``cooldown`` so a
+    burst of failures from one congested window only halves the limit once.
+    """
+
+    def __init__(self, initial_limit=8, min_limit=1, max_limit=64,
+                 target_latency=5.0, decrease_factor=0.5, cooldown=2.0):
+        self.limit = float(initial_limit)
+        self.min_limit = min_limit
+        self.max_limit = max_limit
+        self.target_latency = target_latency
+        self.decrease_factor = decrease_factor
+        self.cooldown = cooldown
+        self.in_flight = 0
+        self.successes = 0
+        self.failures = 0
+        self._last_decrease = 0.0
+        self._condition = asyncio.Condition()
+
+    async def __aenter__(self):
+        async with self._condition:
+            await self._condition.wait_for(lambda: self.in_flight < int(self.limit))
+            self.in_flight += 1
+        return self
+
+    async def __aexit__(self, exc_type, exc, tb):
+        async with self._condition:
+            self.in_flight -= 1
+            self._condition.notify_all()
+
+    def on_success(self, latency):
+        """Record a healthy response and grow the limit if latency allows."""
+        self.successes += 1
+        if latency > self.target_latency:
+            self._decrease()
+        else:
+            self.limit = min(self.max_limit, self.limit + 1.0 / self.limit)
+
+    def on_backoff(self):
+        """Record API pushback (429/5xx/timeout) and shrink the limit."""
+        self.failures += 1
+        self._decrease()
+
+    def _decrease(self):
+        now = time.monotonic()
+        if now - self._last_decrease < self.cooldown:
+            return
+        self._last_decrease = now
+        self.limit = max(self.min_limit, self.limit * self.decrease_factor)
+        print(f"Backing off: concurrency limit now {int(self.limit)}")
+
+
+async def fetch_day_data(session, date_str, limiter, existing_dates, exchange="US"):
+    """Fetch bulk data for a specific date and exchange using aiohttp.
+
+    Returns the day's entries (an empty list for market holidays) and raises
+    FetchError when the request fails.
+    """
     # Skip if we already have this date
     if date_str in existing_dates:
-        print(f"Skipping {date_str} (already exists)")
+        print(f"Skipping {exchange} {date_str} (already exists)")
         return []
 
-    url = f"https://eodhd.com/api/eod-bulk-last-day/US?api_token={api_token}&date={date_str}&fmt=json"
-    print(f"Requesting data for {date_str} ...")
+    url = f"{get_base_url()}/eod-bulk-last-day/{exchange}?api_token={api_token}&date={date_str}&fmt=json"
+    print(f"Requesting {exchange} data for {date_str} ...")
 
-    async with semaphore:
+    async with limiter:
+        started = time.monotonic()
         try:
             async with session.get(url) as response:
-                if response.status == 200:
-                    try:
-                        data = await response.json()
-                        if isinstance(data, list):
-                            for entry in data:
-                                entry['date'] = date_str
-                            print(f"Data received successfully. Total entries: {len(data)}")
-                            return data
-                        else:
-                            day_entries = data.get("data", [])
-                            for entry in day_entries:
-                                entry['date'] = date_str
-                            return day_entries
-                    except Exception as e:
-                        print(f"Error parsing JSON for {date_str}: {e}")
-                else:
-                    print(f"Failed for {date_str}: HTTP {response.status}")
-        except Exception as e:
-            print(f"Request exception for {date_str}: {e}")
-    return []
+                if response.status != 200:
+                    retryable = response.status in RETRYABLE_STATUSES
+                    if retryable:
+                        limiter.on_backoff()
+                    retry_after = response.headers.get("Retry-After")
+                    raise FetchError(
+                        date_str, f"HTTP {response.status}", status=response.status,
+                        retryable=retryable,
+                        retry_after=float(retry_after) if retry_after and retry_after.isdigit() else None
+                    )
+                try:
+                    data = await response.json()
+                except Exception as e:
+                    # Usually a truncated body, worth another attempt
+                    raise FetchError(date_str, f"Error parsing JSON: {e}", status=200)
+        except (aiohttp.ClientError, asyncio.TimeoutError) as e:
+            limiter.on_backoff()
+            raise FetchError(date_str, f"Request exception: {e!r}")
+        limiter.on_success(time.monotonic() - started)
+
+    if isinstance(data, list):
+        day_entries = data
+    else:
+        day_entries = data.get("data", [])
+    for entry in day_entries:
+        entry['date'] = date_str
+    print(f"Data received for {exchange} {date_str}. Total entries: {len(day_entries)}")
+    return day_entries
+
+
+async def fetch_day_with_retry(session, date_str, limiter, existing_dates, exchange="US",
+                               max_attempts=5, base_delay=1.0, max_delay=60.0):
+    """Fetch a day, retrying retryable failures with jittered exponential backoff."""
+    for attempt in range(1, max_attempts + 1):
+        try:
+            return await fetch_day_data(session, date_str, limiter, existing_dates, exchange=exchange)
+        except FetchError as e:
+            if not e.retryable or attempt == max_attempts:
+                raise
+            # Full jitter spreads retries from one congested window apart
+            delay = e.retry_after or random.uniform(0, min(max_delay, base_delay * 2 ** (attempt - 1)))
+            print(f"Attempt {attempt}/{max_attempts} failed for {exchange} {e}; retrying in {delay:.1f}s")
+            await asyncio.sleep(delay)
+
+
+class DayWriter(threading.Thread):
+    """Background thread that commits fetched days to SQLite as they arrive.
+
+    Fetchers hand each day to the writer through a bounded queue, so network
+    I/O keeps going while the previous days are being written. When the queue
+    is full, producers wait, which keeps memory bounded during long backfills.
+    """
+
+    _STOP = object()
+
+    def __init__(self, data_manager, max_pending_days=32):
+        super().__init__(name=f"day-writer-{data_manager.exchange}", daemon=True)
+        self.data_manager = data_manager
+        self.queue = queue.Queue(maxsize=max_pending_days)
+        self.records_saved = 0
+        self.days_saved = 0
+        self.errors = []
+
+    def submit(self, date_str, day_data):
+        """Queue one day for writing, blocking while the queue is full."""
+        self.queue.put((date_str, day_data))
+
+    def run(self):
+        while True:
+            item = self.queue.get()
+            try:
+                if item is self._STOP:
+                    return
+                date_str, day_data = item
+                try:
+                    saved = self.data_manager.save_day(date_str, day_data)
+                    self.records_saved += saved
+                    self.days_saved += 1
+                    print(f"Saved {self.data_manager.exchange} {date_str}: {saved} records")
+                except Exception as e:
+                    print(f"Error saving {self.data_manager.exchange} {date_str}: {e}")
+                    self.errors.append((date_str, e))
+            finally:
+                self.queue.task_done()
+
+    def close(self):
+        """Flush everything still queued and stop the thread."""
+        self.queue.put(self._STOP)
+        self.join()
+
+
+async def ingest_dates(session, date_strs, limiter, data_manager, existing_dates,
+                       max_attempts=5, dead_letter_rounds=2, max_pending_days=32,
+                       progress_interval=50):
+    """Fetch dates continuously and stream each day to a dedicated writer thread.
+
+    Dates that exhaust their attempt budget go to a dead-letter list, which is
+    retried with a fresh budget once the main pass is done. Non-retryable
+    failures (e.g. 401/403/404) are never retried and fail straight away.
+
+    Returns:
+        Tuple of (records saved, dates that still failed after all retries)
+    """
+    exchange = data_manager.exchange
+    writer = DayWriter(data_manager, max_pending_days=max_pending_days)
+    writer.start()
+
+    fetched = 0
+    rejected = []
+
+    async def run_pass(pass_dates):
+        nonlocal fetched
+        pending = asyncio.Queue()
+        for date_str in pass_dates:
+            pending.put_nowait(date_str)
+        dead_letter = []
+
+        async def worker():
+            nonlocal fetched
+            while True:
+                try:
+                    date_str = pending.get_nowait()
+                except asyncio.QueueEmpty:
+                    return
+                try:
+                    day_data = await fetch_day_with_retry(
+                        session, date_str, limiter, existing_dates,
+                        exchange=exchange, max_attempts=max_attempts
+                    )
+                except FetchError as e:
+                    if not e.retryable:
+                        print(f"Giving up on {exchange} {e} (not retryable)")
+                        rejected.append(date_str)
+                    else:
+                        print(f"Giving up on {exchange} {e} for now")
+                        dead_letter.append(date_str)
+                    continue
+                # Empty days are submitted too so they get recorded in
+                # ingested_dates; blocks in a helper thread when the writer
+                # falls behind
+                await asyncio.to_thread(writer.submit, date_str, day_data)
+                fetched += 1
+                if fetched % progress_interval == 0:
+                    print(f"{exchange} progress: {fetched}/{len(date_strs)} dates fetched, "
+                          f"{writer.records_saved} records saved, "
+                          f"concurrency limit {int(limiter.limit)}")
+
+        # Enough workers to fill the limiter at its ceiling, without
+        # creating a task per date up front
+        num_workers = max(1, min(limiter.max_limit, len(pass_dates)))
+        await asyncio.gather(*(worker() for _ in range(num_workers)))
+        return sorted(dead_letter)
+
+    try:
+        failed = await run_pass(date_strs)
+        for round_num in range(1, dead_letter_rounds + 1):
+            if not failed:
+                break
+            print(f"\nRetrying {len(failed)} dead-lettered {exchange} dates "
+                  f"(round {round_num}/{dead_letter_rounds})...")
+            failed = await run_pass(failed)
+    finally:
+        await asyncio.to_thread(writer.close)
+
+    failed.extend(rejected)
+    failed.extend(d for d, _ in writer.errors)
+    if failed:
+        print(f"{exchange} dates still missing after retries ({len(failed)}): "
+              f"{', '.join(sorted(failed)[:20])}")
+
+    return writer.records_saved, sorted(failed)
+
+
+def open_exchanges(exchanges):
+    """Open a connection with every exchange partition attached.
+
+    The TEMP view ``all_stock_data`` unions the partitions and adds an
+    ``exchange`` column, so cross-exchange queries can filter or group on
+    ``exchange`` and ``exchange_short_name``.
+    """
+    conn = sqlite3.connect(":memory:")
+    selects = []
+    for i, exchange in enumerate(exchanges):
+        alias = f"ex{i}"
+        conn.execute(f"ATTACH DATABASE ? AS {alias}", (exchange_db_path(exchange),))
+        selects.append(f"SELECT '{exchange}' AS exchange, * FROM {alias}.stock_data")
+    conn.execute(f"CREATE TEMP VIEW all_stock_data AS {' UNION ALL '.join(selects)}")
+    return conn
+
+
+@asynccontextmanager
+async def in_thread(context_manager):
+    """Enter and exit a blocking context manager in a worker thread."""
+    value = await asyncio.to_thread(context_manager.__enter__)
+    try:
+        yield value
+    except BaseException as e:
+        if not await asyncio.to_thread(context_manager.__exit__, type(e), e, e.__traceback__):
+            raise
+    else:
+        await asyncio.to_thread(context_manager.__exit__, None, None, None)
 
 
-async def process_date_batch(session, date_batch, semaphore, data_manager, existing_dates):
-    """Process a batch of dates and save to database."""
-    print(f"\nProcessing batch of {len(date_batch)} dates...")
+def prepare_exchange(exchange, start_date, end_date):
+    """Open one exchange's partition, seed it from its CSV if empty, and plan its gaps.
 
-    # Fetch data for this batch of dates
-    tasks = [fetch_day_data(session, date_str, semaphore, existing_dates) for date_str in date_batch]
-    results = await asyncio.gather(*tasks)
+    Blocking (database setup, CSV import, planner queries); ingest_exchange
+    runs it in a worker thread.
 
-    # Flatten the results for this batch
-    batch_data = []
-    for day_data in results:
-        if day_data:
-            batch_data.extend(day_data)
+    Returns:
+        Tuple of (StockDataManager, sorted dates to fetch)
+    """
+    data_manager = StockDataManager(exchange=exchange)
 
-    # Save to database (much faster than CSV/JSON)
-    records_saved = data_manager.save_batch_to_db(batch_data)
-    print(f"Batch completed. Records saved to database: {records_saved}")
+    # Import existing CSV data if database is empty
+    if not data_manager.get_ingested_dates() and Path(data_manager.csv_path).exists():
+        print(f"Found existing CSV file for {exchange}. Importing into database...")
+        with data_manager.bulk_load():
+            data_manager.import_csv_columnar(data_manager.csv_path)
+        data_manager.sync_ingested_dates()
+
+    # Plan only real trading sessions that are missing or look incomplete
+    planner = GapPlanner(data_manager)
+    missing_dates, short_dates = planner.plan(start_date.date(), end_date.date())
+    print(f"{exchange}: {len(missing_dates)} missing sessions, "
+          f"{len(short_dates)} suspiciously short sessions to refetch")
+    return data_manager, sorted(missing_dates + short_dates)
+
+
+async def ingest_exchange(session, exchange, limiter, start_date, end_date):
+    """Plan and ingest one exchange's missing days into its own partition.
+
+    Each exchange has its own database file and writer thread, so a slow or
+    backlogged exchange never holds another exchange's write lock. Only the
+    concurrency limiter is shared. Setup, CSV seeding and the index rebuild
+    at the end of a bulk load run in worker threads, so they never stall the
+    event loop the other exchanges are fetching on.
+    """
+    data_manager, date_strs = await asyncio.to_thread(prepare_exchange, exchange, start_date, end_date)
+
+    total_records, failed_dates = 0, []
+    if date_strs:
+        print(f"{exchange} date range: {date_strs[0]} to {date_strs[-1]}")
+        # Every ingest goes through the fast-load connection, but only large
+        # backfills are worth dropping and rebuilding the indexes for. The
+        # planner already excluded complete sessions, so nothing is skipped here.
+        bulk_load = data_manager.bulk_load(defer_indexes=len(date_strs) >= DEFER_INDEXES_MIN_DATES)
+        async with in_thread(bulk_load):
+            total_records, failed_dates = await ingest_dates(
+                session, date_strs, limiter, data_manager, existing_dates=set()
+            )
 
-    return records_saved
+    return {
+        "data_manager": data_manager,
+        "dates_requested": len(date_strs),
+        "records": total_records,
+        "failed_dates": failed_dates,
+    }
 
 
-async def main():
+async def main(exchanges=("US",), cache_mode="off", cache_dir=".eodhd_cache"):
     start_date = datetime.datetime(1995, 1, 1)
     end_date = datetime.datetime.now()
 
     print(f"=== Configuration ===")
+    print(f"Exchanges: {', '.join(exchanges)}")
+    print(f"API: {get_base_url()} (cache mode: {cache_mode})")
     print(f"Start date: {start_date.strftime('%Y-%m-%d')}")
     print(f"End date: {end_date.strftime('%Y-%m-%d')}")
 
-    # Initialize data manager
-    data_manager = StockDataManager()
-
-    # Import existing CSV data if database is empty
-    existing_dates = data_manager.get_existing_dates()
-    if not existing_dates and Path("us_stocks_bulk_data.csv").exists():
-        print("Found existing CSV file. Importing into database...")
-        data_manager.import_existing_csv("us_stocks_bulk_data.csv")
-        existing_dates = data_manager.get_existing_dates()
-
-    # Check existing data
-    latest_date = data_manager.get_latest_date()
-    existing_dates = data_manager.get_existing_dates()
-
-    print(f"Existing records in database: {len(existing_dates)} unique dates")
-    if latest_date:
-        print(f"Latest date in database: {latest_date}")
-        # Start from the day after the latest date to avoid duplicates
-        try:
-            start_date = max(start_date, datetime.datetime.strptime(latest_date, '%Y-%m-%d') + datetime.timedelta(days=1))
-            print(f"Adjusted start date: {start_date.strftime('%Y-%m-%d')}")
-        except:
-            pass
-
-    # Generate business days using pandas
-    dates = pd.bdate_range(start=start_date, end=end_date)
-    date_strs = [date.strftime("%Y-%m-%d") for date in dates]
-
-    # Filter out dates we already have
-    date_strs = [d for d in date_strs if d not in existing_dates]
-
-    print(f"Dates to process: {len(date_strs)}")
-    if not date_strs:
-        print("No new dates to process!")
-        # Still export to CSV if requested
-        response = input("Export existing data to CSV? (y/n): ")
-        if response.lower() == 'y':
-            data_manager.export_to_csv_incremental()
-        return
-
-    if date_strs:
-        print(f"Date range: {date_strs[0]} to {date_strs[-1]}")
-
-    # Process dates in batches
-    batch_size = 50  # Increased batch size since DB is faster
-    total_records = 0
-
-    # Limit concurrent requests
-    semaphore = asyncio.Semaphore(15)  # Slightly increased
+    # One concurrency budget shared by every exchange, adapting to how fast
+    # the API is answering
+    limiter = AdaptiveConcurrencyLimiter(initial_limit=15, max_limit=64)
 
     async with aiohttp.ClientSession(
             timeout=aiohttp.ClientTimeout(total=30),  # Add timeout
-            connector=aiohttp.TCPConnector(limit=20)  # Connection pooling
+            connector=aiohttp.TCPConnector(limit=limiter.max_limit)  # Connection pooling
     ) as session:
-        for i in range(0, len(date_strs), batch_size):
-            batch = date_strs[i:i + batch_size]
-
-            try:
-                batch_records = await process_date_batch(
-                    session, batch, semaphore, data_manager, existing_dates
-                )
-                total_records += batch_records
-
-                print(f"Progress: {min(i + batch_size, len(date_strs))}/{len(date_strs)} dates processed")
-                print(f"Total new records this session: {total_records}")
-
-                # Smaller delay since we're using database
-                if i + batch_size < len(date_strs):
-                    await asyncio.sleep(0.5)
-
-            except Exception as e:
-                print(f"Error processing batch starting at index {i}: {e}")
-                continue
+        if cache_mode != "off":
+            # Record responses for offline runs, or replay them without the network
+            session = CachingSession(session, ResponseCache(cache_dir, mode=cache_mode))
+        summaries = await asyncio.gather(*(
+            ingest_exchange(session, exchange, limiter, start_date, end_date)
+            for exchange in exchanges
+        ))
 
     print(f"\n=== Session Summary ===")
-    print(f"New records added: {total_records}")
-    print(f"Database file: {data_manager.db_path}")
+    print(f"Requests: {limiter.successes} succeeded, {limiter.failures} pushed back, "
+          f"final concurrency limit {int(limiter.limit)}")
+    for exchange, summary in zip(exchanges, summaries):
+        print(f"{exchange}: {summary['dates_requested']} dates requested, "
+              f"{summary['records']} new records ({summary['data_manager'].db_path})")
+        if summary["failed_dates"]:
+            print(f"  Missing dates ({len(summary['failed_dates'])}), rerun to fill them: "
+                  f"{', '.join(summary['failed_dates'])}")
 
     # Ask if user wants to export to CSV
-    if total_records > 0:
+    if any(summary["records"] > 0 for summary in summaries):
         response = input("Export all data to CSV? This may take a while for large datasets (y/n): ")
         if response.lower() == 'y':
-            data_manager.export_to_csv_incremental()
+            for summary in summaries:
+                summary["data_manager"].export_to_csv_incremental()
 
     # Show sample data
     try:
-        with sqlite3.connect(data_manager.db_path) as conn:
+        with open_exchanges(exchanges) as conn:
             sample_df = pd.read_sql_query(
-                "SELECT * FROM stock_data ORDER BY date DESC, code LIMIT 5",
+                "SELECT * FROM all_stock_data ORDER BY date DESC, exchange, code LIMIT 5",
                 conn
             )
             print(f"\nSample of latest data:")
             print(sample_df)
 
-            # Show total count
-            total_count = conn.execute("SELECT COUNT(*) FROM stock_data").fetchone()[0]
-            print(f"Total records in database: {total_count}")
+            # Show total count per exchange
+            for exchange, count in conn.execute(
+                    "SELECT exchange, COUNT(*) FROM all_stock_data GROUP BY exchange"):
+                print(f"Total {exchange} records in database: {count}")
     except Exception as e:
         print(f"Error reading sample data: {e}")
 
 
 if __name__ == "__main__":
-    asyncio.run(main())
\ No newline at end of file
+    parser = argparse.ArgumentParser(description="Backfill EODHD bulk EOD data into SQLite")
+    parser.add_argument("--exchanges", default="US",
+                        help="Comma-separated EODHD exchange codes, e.g. US,LSE,TO,XETRA (default: US)")
+    parser.add_argument("--cache-mode", choices=["off", "record", "replay"], default="off",
+                        help="Record API responses to disk or replay them offline (default: off)")
+    parser.add_argument("--cache-dir", default=".eodhd_cache",
+                        help="Response cache directory (default: .eodhd_cache)")
+    args = parser.parse_args()
+
+    asyncio.run(main(
+        [e.strip().upper() for e in args.exchanges.split(",") if e.strip()],
+        cache_mode=args.cache_mode,
+        cache_dir=args.cache_dir,
+    ))
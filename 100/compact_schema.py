@@ -0,0 +1,204 @@
+import argparse
+import sqlite3
+import time
+from pathlib import Path
+
+# Dates are stored as days since 1970-01-01
+JULIAN_DAY_EPOCH = 2440587.5
+
+COMPACT_SECONDARY_INDEXES = {
+    "idx_prices_day": "CREATE INDEX IF NOT EXISTS idx_prices_day ON prices(day)",
+}
+
+
+def to_day_number_sql(expr: str) -> str:
+    """SQL converting an ISO date expression to a day number."""
+    return f"CAST(julianday({expr}) - {JULIAN_DAY_EPOCH} AS INTEGER)"
+
+
+def is_compact(conn: sqlite3.Connection) -> bool:
+    """Whether ``stock_data`` is the compatibility view over the compact schema."""
+    row = conn.execute("SELECT type FROM sqlite_master WHERE name = 'stock_data'").fetchone()
+    return row is not None and row[0] == "view"
+
+
+def create_compact_schema(conn: sqlite3.Connection) -> None:
+    """Create the integer-keyed tables (without the stock_data view).
+
+    - ``symbols`` and ``exchanges`` map the repeated strings to small ints
+    - ``prices`` is a WITHOUT ROWID table clustered on (symbol_id, day), so a
+      ticker's history is one contiguous range of the primary key
+    """
+    # Plain execute() calls rather than executescript(), which would commit
+    # the caller's transaction and break the migration's atomicity
+    conn.execute("""
+        CREATE TABLE IF NOT EXISTS symbols
+        (
+            symbol_id INTEGER PRIMARY KEY,
+            code TEXT NOT NULL UNIQUE
+        )
+    """)
+    conn.execute("""
+        CREATE TABLE IF NOT EXISTS exchanges
+        (
+            exchange_id INTEGER PRIMARY KEY,
+            exchange_short_name TEXT NOT NULL UNIQUE
+        )
+    """)
+    conn.execute("""
+        CREATE TABLE IF NOT EXISTS prices
+        (
+            symbol_id INTEGER NOT NULL,
+            day INTEGER NOT NULL,
+            exchange_id INTEGER,
+            open REAL,
+            high REAL,
+            low REAL,
+            close REAL,
+            adjusted_close REAL,
+            volume INTEGER,
+            PRIMARY KEY (symbol_id, day)
+        ) WITHOUT ROWID
+    """)
+    for create_sql in COMPACT_SECONDARY_INDEXES.values():
+        conn.execute(create_sql)
+
+
+def create_compat_view(conn: sqlite3.Connection) -> None:
+    """Expose the compact tables as ``stock_data`` so existing queries keep working.
+
+    An INSTEAD OF trigger makes the view insertable, so
+    StockDataManager.save_batch_to_db works unchanged on a compact database.
+    """
+    conn.execute(f"""
+        CREATE VIEW IF NOT EXISTS stock_data AS
+        SELECT s.code,
+               e.exchange_short_name,
+               date(p.day + {JULIAN_DAY_EPOCH}) AS date,
+               p.open,
+               p.high,
+               p.low,
+               p.close,
+               p.adjusted_close,
+               p.volume
+        FROM prices p
+                 JOIN symbols s ON s.symbol_id = p.symbol_id
+                 LEFT JOIN exchanges e ON e.exchange_id = p.exchange_id
+    """)
+    conn.execute(f"""
+        CREATE TRIGGER IF NOT EXISTS stock_data_insert
+            INSTEAD OF INSERT ON stock_data
+        BEGIN
+            -- The outer statement's OR REPLACE overrides conflict clauses
+            -- in here, so new keys are inserted without ever conflicting
+            -- (a replaced symbols row would orphan its prices)
+            INSERT INTO symbols (code)
+            SELECT NEW.code
+            WHERE NOT EXISTS (SELECT 1 FROM symbols WHERE code = NEW.code);
+            INSERT INTO exchanges (exchange_short_name)
+            SELECT COALESCE(NEW.exchange_short_name, '')
+            WHERE NOT EXISTS (SELECT 1 FROM exchanges
+                              WHERE exchange_short_name = COALESCE(NEW.exchange_short_name, ''));
+            INSERT OR REPLACE INTO prices
+            (symbol_id, day, exchange_id, open, high, low, close, adjusted_close, volume)
+            VALUES ((SELECT symbol_id FROM symbols WHERE code = NEW.code),
+                    {to_day_number_sql("NEW.date")},
+                    (SELECT exchange_id FROM exchanges
+                     WHERE exchange_short_name = COALESCE(NEW.exchange_short_name, '')),
+                    NEW.open, NEW.high, NEW.low, NEW.close, NEW.adjusted_close, NEW.volume);
+        END
+    """)
+
+
+def migrate_to_compact(db_path: str, drop_legacy: bool = False, vacuum: bool = True) -> bool:
+    """Migrate a text-keyed stock_data table to the compact schema.
+
+    The original table is renamed to ``stock_data_legacy`` (or dropped with
+    ``drop_legacy``) and replaced by the compatibility view.
+
+    Args:
+        db_path: SQLite database to migrate
+        drop_legacy: Drop the old table instead of keeping it
+        vacuum: VACUUM afterwards to return the freed pages to the filesystem
+
+    Returns:
+        True if the database was migrated, False if there was nothing to do
+    """
+    if not Path(db_path).exists():
+        print(f"Database {db_path} not found")
+        return False
+
+    started = time.perf_counter()
+    conn = sqlite3.connect(db_path)
+    try:
+        if is_compact(conn):
+            print(f"{db_path} already uses the compact schema")
+            return False
+
+        size_before = Path(db_path).stat().st_size
+        print(f"Migrating {db_path} to the compact schema...")
+
+        with conn:
+            create_compact_schema(conn)
+            # Build the prices table without its secondary index, in
+            # primary key order
+            for index_name in COMPACT_SECONDARY_INDEXES:
+                conn.execute(f"DROP INDEX IF EXISTS {index_name}")
+
+            conn.execute("INSERT OR IGNORE INTO symbols (code) "
+                         "SELECT DISTINCT code FROM stock_data ORDER BY code")
+            conn.execute("INSERT OR IGNORE INTO exchanges (exchange_short_name) "
+                         "SELECT DISTINCT COALESCE(exchange_short_name, '') FROM stock_data")
+            print(f"  {conn.execute('SELECT COUNT(*) FROM symbols').fetchone()[0]:,} symbols")
+
+            conn.execute(f"""
+                INSERT OR REPLACE INTO prices
+                (symbol_id, day, exchange_id, open, high, low, close, adjusted_close, volume)
+                SELECT s.symbol_id,
+                       {to_day_number_sql("d.date")},
+                       e.exchange_id,
+                       d.open, d.high, d.low, d.close, d.adjusted_close, d.volume
+                FROM stock_data d
+                         JOIN symbols s ON s.code = d.code
+                         JOIN exchanges e ON e.exchange_short_name = COALESCE(d.exchange_short_name, '')
+                ORDER BY s.symbol_id, d.date
+            """)
+            print(f"  {conn.execute('SELECT COUNT(*) FROM prices').fetchone()[0]:,} price rows")
+
+            for create_sql in COMPACT_SECONDARY_INDEXES.values():
+                conn.execute(create_sql)
+
+            if drop_legacy:
+                conn.execute("DROP TABLE stock_data")
+            else:
+                conn.execute("ALTER TABLE stock_data RENAME TO stock_data_legacy")
+                # Legacy indexes are only dead weight now
+                conn.execute("DROP INDEX IF EXISTS idx_date")
+            create_compat_view(conn)
+
+        if vacuum:
+            print("  Vacuuming...")
+            conn.execute("VACUUM")
+    finally:
+        conn.close()
+
+    size_after = Path(db_path).stat().st_size
+    print(f"Migration finished in {time.perf_counter() - started:.1f}s "
+          f"({size_before / 1e6:,.0f} MB -> {size_after / 1e6:,.0f} MB)")
+    return True
+
+
+def main() -> None:
+    """Migrate a stock database to the compact integer-keyed schema."""
+    parser = argparse.ArgumentParser(description="Migrate stock_data to the compact schema")
+    parser.add_argument("--db", default="stock_data.db", help="Database to migrate (default: stock_data.db)")
+    parser.add_argument("--drop-legacy", action="store_true",
+                        help="Drop the old text-keyed table instead of keeping stock_data_legacy")
+    parser.add_argument("--no-vacuum", action="store_true", help="Skip the final VACUUM")
+    args = parser.parse_args()
+
+    migrate_to_compact(args.db, drop_legacy=args.drop_legacy, vacuum=not args.no_vacuum)
+
+
+if __name__ == "__main__":
+    main()
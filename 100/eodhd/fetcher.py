@@ -1,16 +1,19 @@
 from datetime import datetime
 
-import requests
+from eodhd.http_cache import cached_get, get_base_url
 
 
 class DataFetcher:
-    def __init__(self, api_token):
+    def __init__(self, api_token, cache=None):
         self.api_token = api_token
+        self.base_url = get_base_url()
+        # Optional ResponseCache for record/replay runs
+        self.cache = cache
 
     def get_oldest_available_date(self, ticker):
         """Fetch the oldest available date for a ticker"""
-        url = f"https://eodhd.com/api/eod/{ticker}?api_token={self.api_token}&fmt=json&order=a&limit=1"
-        response = requests.get(url)
+        url = f"{self.base_url}/eod/{ticker}?api_token={self.api_token}&fmt=json&order=a&limit=1"
+        response = cached_get(url, self.cache)
         if response.status_code == 200:
             data = response.json()
             if data:
@@ -27,8 +30,8 @@ class DataFetcher:
             end_date = datetime.now().strftime('%Y-%m-%d')
 
         print(f"Fetching data for {ticker} from {start_date}...")
-        url = f"https://eodhd.com/api/eod/{ticker}?api_token={self.api_token}&fmt=json&from={start_date}&to={end_date}&period={period}"
-        response = requests.get(url)
+        url = f"{self.base_url}/eod/{ticker}?api_token={self.api_token}&fmt=json&from={start_date}&to={end_date}&period={period}"
+        response = cached_get(url, self.cache)
 
         if response.status_code == 200:
             return response.json()
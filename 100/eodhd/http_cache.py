@@ -0,0 +1,196 @@
+import hashlib
+import json
+import os
+from pathlib import Path
+from typing import Dict, Optional
+from urllib.parse import parse_qsl, urlencode, urlsplit
+
+import requests
+
+DEFAULT_BASE_URL = "https://eodhd.com/api"
+
+CACHE_MODES = ("off", "record", "replay")
+
+
+def get_base_url() -> str:
+    """API base URL, overridable with EODHD_BASE_URL (e.g. to hit the mock server)."""
+    return os.environ.get("EODHD_BASE_URL", DEFAULT_BASE_URL).rstrip("/")
+
+
+def request_key(url: str) -> str:
+    """Cache key for a request URL.
+
+    The host and the api_token are ignored and query parameters are sorted,
+    so a response recorded against eodhd.com replays for the same request
+    sent to the mock server, and the token never lands on disk.
+    """
+    parts = urlsplit(url)
+    path = parts.path
+    # Keys are relative to the API root so /api/eod/X and /eod/X agree
+    if path.startswith("/api/"):
+        path = path[len("/api"):]
+    params = sorted((k, v) for k, v in parse_qsl(parts.query) if k != "api_token")
+    return f"{path}?{urlencode(params)}"
+
+
+class CachedResponse:
+    """Response replayed from (or just written to) the cache.
+
+    Supports the parts of the aiohttp response API the fetchers use,
+    including ``async with session.get(...) as response``.
+    """
+
+    def __init__(self, status: int, body: bytes, headers: Optional[Dict[str, str]] = None):
+        self.status = status
+        self.body = body
+        self.headers = headers or {}
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, exc_type, exc, tb):
+        return False
+
+    async def read(self) -> bytes:
+        return self.body
+
+    async def text(self) -> str:
+        return self.body.decode("utf-8")
+
+    async def json(self, **kwargs):
+        return json.loads(self.body)
+
+
+class CachedSyncResponse:
+    """requests-style counterpart of CachedResponse for blocking fetchers."""
+
+    def __init__(self, status_code: int, content: bytes):
+        self.status_code = status_code
+        self.content = content
+
+    def json(self):
+        return json.loads(self.content)
+
+
+class ResponseCache:
+    """Content-addressed on-disk cache of API responses.
+
+    Bodies are stored once under ``objects/`` keyed by their SHA-256, and
+    ``requests/`` maps each request key to the body hash and status. Many
+    requests with identical payloads (e.g. empty holiday responses) share
+    one object.
+    """
+
+    def __init__(self, cache_dir: str = ".eodhd_cache", mode: str = "record"):
+        """Initialize the cache.
+
+        Args:
+            cache_dir: Directory holding the cache
+            mode: "off", "record" (fetch and store) or "replay" (never hit the network)
+        """
+        if mode not in CACHE_MODES:
+            raise ValueError(f"Unknown cache mode {mode!r}, expected one of {CACHE_MODES}")
+        self.cache_dir = Path(cache_dir)
+        self.mode = mode
+        self.hits = 0
+        self.misses = 0
+
+    def _request_path(self, key: str) -> Path:
+        digest = hashlib.sha256(key.encode("utf-8")).hexdigest()
+        return self.cache_dir / "requests" / digest[:2] / f"{digest}.json"
+
+    def _object_path(self, body_hash: str) -> Path:
+        return self.cache_dir / "objects" / body_hash[:2] / body_hash
+
+    def load(self, url: str) -> Optional[CachedResponse]:
+        """Look up a recorded response for ``url``."""
+        request_path = self._request_path(request_key(url))
+        if not request_path.exists():
+            self.misses += 1
+            return None
+
+        meta = json.loads(request_path.read_text())
+        body = self._object_path(meta["body_sha256"]).read_bytes()
+        self.hits += 1
+        return CachedResponse(meta["status"], body, {"Content-Type": meta.get("content_type", "")})
+
+    def store(self, url: str, status: int, body: bytes, content_type: str = "application/json") -> None:
+        """Record a response for ``url``."""
+        body_hash = hashlib.sha256(body).hexdigest()
+        object_path = self._object_path(body_hash)
+        if not object_path.exists():
+            object_path.parent.mkdir(parents=True, exist_ok=True)
+            tmp_path = object_path.with_suffix(".tmp")
+            tmp_path.write_bytes(body)
+            tmp_path.replace(object_path)
+
+        key = request_key(url)
+        request_path = self._request_path(key)
+        request_path.parent.mkdir(parents=True, exist_ok=True)
+        request_path.write_text(json.dumps({
+            "request": key,
+            "status": status,
+            "content_type": content_type,
+            "body_sha256": body_hash,
+        }))
+
+
+class CachingSession:
+    """Wraps an aiohttp ClientSession with record/replay caching of GETs.
+
+    Only 200 responses are recorded, so transient failures are retried on
+    the next run. In replay mode a cache miss is answered with a 404 and
+    never reaches the network.
+    """
+
+    def __init__(self, session, cache: ResponseCache):
+        self.session = session
+        self.cache = cache
+
+    def get(self, url: str, **kwargs):
+        return _CachedRequest(self, url, kwargs)
+
+
+class _CachedRequest:
+    """Async context manager returned by CachingSession.get."""
+
+    def __init__(self, owner: CachingSession, url: str, kwargs: dict):
+        self.owner = owner
+        self.url = url
+        self.kwargs = kwargs
+
+    async def __aenter__(self) -> CachedResponse:
+        cache = self.owner.cache
+        if cache.mode != "off":
+            cached = cache.load(self.url)
+            if cached is not None:
+                return cached
+            if cache.mode == "replay":
+                return CachedResponse(404, b'{"error": "not in cache"}')
+
+        async with self.owner.session.get(self.url, **self.kwargs) as response:
+            body = await response.read()
+            headers = dict(response.headers)
+            if cache.mode == "record" and response.status == 200:
+                cache.store(self.url, response.status, body,
+                            headers.get("Content-Type", "application/json"))
+            return CachedResponse(response.status, body, headers)
+
+    async def __aexit__(self, exc_type, exc, tb):
+        return False
+
+
+def cached_get(url: str, cache: Optional[ResponseCache] = None, **kwargs):
+    """Blocking GET through the cache, for the requests-based fetchers."""
+    if cache is not None and cache.mode != "off":
+        cached = cache.load(url)
+        if cached is not None:
+            return CachedSyncResponse(cached.status, cached.body)
+        if cache.mode == "replay":
+            return CachedSyncResponse(404, b'{"error": "not in cache"}')
+
+    response = requests.get(url, **kwargs)
+    if cache is not None and cache.mode == "record" and response.status_code == 200:
+        cache.store(url, response.status_code, response.content,
+                    response.headers.get("Content-Type", "application/json"))
+    return response
@@ -0,0 +1,221 @@
+import argparse
+import asyncio
+import datetime
+import hashlib
+import json
+import math
+import random
+from typing import List, Optional
+
+from aiohttp import web
+
+from eodhd.http_cache import ResponseCache
+
+EPOCH = datetime.date(1990, 1, 1)
+
+
+def _ticker_seed(ticker: str, seed: int) -> random.Random:
+    """Deterministic RNG for one synthetic ticker."""
+    digest = hashlib.sha256(f"{seed}:{ticker}".encode("utf-8")).digest()
+    return random.Random(int.from_bytes(digest[:8], "big"))
+
+
+class SyntheticMarket:
+    """Deterministic synthetic price history for a universe of fake tickers.
+
+    Every ticker has its own listing date, drift and oscillation pattern, so
+    the same request always returns the same payload and some tickers become
+    multibaggers while others fall.
+    """
+
+    def __init__(self, num_tickers: int = 5000, seed: int = 42):
+        self.seed = seed
+        self.tickers = []
+        for i in range(num_tickers):
+            code = f"SYN{i:05d}"
+            rng = _ticker_seed(code, seed)
+            self.tickers.append({
+                "code": code,
+                "listed_day": rng.randint(0, 9000),
+                "start_price": rng.uniform(1.0, 50.0),
+                "drift": rng.gauss(0.08, 0.25) / 365,
+                "amp1": rng.uniform(0.05, 0.4),
+                "freq1": rng.uniform(0.002, 0.02),
+                "phase1": rng.uniform(0, 2 * math.pi),
+                "amp2": rng.uniform(0.01, 0.05),
+                "freq2": rng.uniform(0.1, 0.5),
+                "phase2": rng.uniform(0, 2 * math.pi),
+                "exchange_short_name": rng.choice(["NYSE", "NASDAQ", "AMEX"]),
+            })
+        self._by_code = {t["code"]: t for t in self.tickers}
+
+    @staticmethod
+    def _day_number(day: datetime.date) -> int:
+        return (day - EPOCH).days
+
+    def _bar(self, ticker: dict, day: datetime.date) -> Optional[dict]:
+        t = self._day_number(day) - ticker["listed_day"]
+        if t < 0 or day.weekday() >= 5:
+            return None
+
+        log_price = (ticker["drift"] * t
+                     + ticker["amp1"] * math.sin(ticker["freq1"] * t + ticker["phase1"])
+                     + ticker["amp2"] * math.sin(ticker["freq2"] * t + ticker["phase2"]))
+        close = round(ticker["start_price"] * math.exp(log_price), 4)
+        spread = close * ticker["amp2"]
+        return {
+            "code": ticker["code"],
+            "exchange_short_name": ticker["exchange_short_name"],
+            "date": day.isoformat(),
+            "open": round(close - spread / 2, 4),
+            "high": round(close + spread, 4),
+            "low": round(close - spread, 4),
+            "close": close,
+            "adjusted_close": close,
+            "volume": 10_000 + (self._day_number(day) * 7919 + ticker["listed_day"]) % 1_000_000,
+        }
+
+    def bulk_day(self, day: datetime.date) -> List[dict]:
+        """All tickers' bars for one day (empty on weekends)."""
+        return [bar for bar in (self._bar(t, day) for t in self.tickers) if bar is not None]
+
+    def history(self, code: str, start: datetime.date, end: datetime.date) -> List[dict]:
+        """One ticker's bars between ``start`` and ``end`` inclusive."""
+        ticker = self._by_code.get(code)
+        if ticker is None:
+            return []
+        bars = []
+        day = max(start, EPOCH + datetime.timedelta(days=ticker["listed_day"]))
+        while day <= end:
+            bar = self._bar(ticker, day)
+            if bar is not None:
+                del bar["code"], bar["exchange_short_name"]
+                bars.append(bar)
+            day += datetime.timedelta(days=1)
+        return bars
+
+
+def create_app(num_tickers: int = 5000, seed: int = 42,
+               latency_ms: float = 0.0, jitter_ms: float = 0.0,
+               error_rate: float = 0.0, timeout_rate: float = 0.0, hang_seconds: float = 60.0,
+               cache_dir: Optional[str] = None, replay_only: bool = False) -> web.Application:
+    """Build the mock EODHD application.
+
+    Args:
+        num_tickers: Size of the synthetic universe
+        seed: Seed for the synthetic market
+        latency_ms: Mean added latency per request
+        jitter_ms: Standard deviation of the added latency
+        error_rate: Fraction of requests answered with 429/500/503
+        timeout_rate: Fraction of requests that hang for ``hang_seconds``
+        hang_seconds: How long a "timed out" request hangs
+        cache_dir: Serve recorded responses from this ResponseCache directory
+        replay_only: Answer cache misses with 404 instead of synthetic data
+    """
+    market = SyntheticMarket(num_tickers=num_tickers, seed=seed)
+    cache = ResponseCache(cache_dir, mode="replay") if cache_dir else None
+    fault_rng = random.Random(seed)
+    stats = {"requests": 0, "errors_injected": 0, "timeouts_injected": 0, "replayed": 0}
+
+    @web.middleware
+    async def inject_faults(request, handler):
+        if request.path == "/_stats":
+            return await handler(request)
+
+        stats["requests"] += 1
+        delay = max(0.0, fault_rng.gauss(latency_ms, jitter_ms)) / 1000
+        if delay:
+            await asyncio.sleep(delay)
+
+        roll = fault_rng.random()
+        if roll < timeout_rate:
+            stats["timeouts_injected"] += 1
+            await asyncio.sleep(hang_seconds)
+        elif roll < timeout_rate + error_rate:
+            stats["errors_injected"] += 1
+            status = fault_rng.choice([429, 500, 503])
+            headers = {"Retry-After": "1"} if status == 429 else None
+            return web.json_response({"error": "injected failure"}, status=status, headers=headers)
+
+        if cache is not None:
+            cached = cache.load(str(request.rel_url))
+            if cached is not None:
+                stats["replayed"] += 1
+                return web.Response(body=cached.body, status=cached.status,
+                                    content_type="application/json")
+            if replay_only:
+                return web.json_response({"error": "not recorded"}, status=404)
+
+        return await handler(request)
+
+    def parse_date(value: Optional[str], default: datetime.date) -> datetime.date:
+        return datetime.date.fromisoformat(value) if value else default
+
+    async def bulk_last_day(request):
+        day = parse_date(request.query.get("date"), datetime.date.today())
+        return web.json_response(market.bulk_day(day))
+
+    async def eod(request):
+        code = request.match_info["ticker"].split(".")[0]
+        start = parse_date(request.query.get("from"), EPOCH)
+        end = parse_date(request.query.get("to"), datetime.date.today())
+        bars = market.history(code, start, end)
+        if request.query.get("order") == "d":
+            bars.reverse()
+        if "limit" in request.query:
+            bars = bars[:int(request.query["limit"])]
+        return web.json_response(bars)
+
+    async def fundamentals(request):
+        code = request.match_info["ticker"].split(".")[0]
+        if code not in market._by_code:
+            return web.json_response({"error": "not found"}, status=404)
+        rng = _ticker_seed(code, seed)
+        return web.json_response({
+            "General": {"Code": code, "Name": f"Synthetic {code}", "Exchange": "US",
+                        "Sector": rng.choice(["Technology", "Healthcare", "Energy", "Financials"])},
+            "Highlights": {"MarketCapitalization": round(rng.uniform(1e7, 1e11)),
+                           "PERatio": round(rng.uniform(5, 60), 2)},
+        })
+
+    async def get_stats(request):
+        return web.Response(text=json.dumps(stats), content_type="application/json")
+
+    app = web.Application(middlewares=[inject_faults])
+    app.router.add_get("/api/eod-bulk-last-day/{exchange}", bulk_last_day)
+    app.router.add_get("/api/eod/{ticker}", eod)
+    app.router.add_get("/api/fundamentals/{ticker}", fundamentals)
+    app.router.add_get("/_stats", get_stats)
+    return app
+
+
+def main() -> None:
+    """Run the mock EODHD server."""
+    parser = argparse.ArgumentParser(description="Local mock of the EODHD API for offline benchmarks")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8080)
+    parser.add_argument("--tickers", type=int, default=5000, help="Synthetic universe size")
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--latency-ms", type=float, default=0.0, help="Mean added latency")
+    parser.add_argument("--jitter-ms", type=float, default=0.0, help="Latency standard deviation")
+    parser.add_argument("--error-rate", type=float, default=0.0, help="Fraction of 429/500/503 responses")
+    parser.add_argument("--timeout-rate", type=float, default=0.0, help="Fraction of requests that hang")
+    parser.add_argument("--hang-seconds", type=float, default=60.0)
+    parser.add_argument("--cache-dir", help="Replay recorded responses from this cache directory")
+    parser.add_argument("--replay-only", action="store_true",
+                        help="Return 404 for requests that were not recorded")
+    args = parser.parse_args()
+
+    app = create_app(
+        num_tickers=args.tickers, seed=args.seed,
+        latency_ms=args.latency_ms, jitter_ms=args.jitter_ms,
+        error_rate=args.error_rate, timeout_rate=args.timeout_rate, hang_seconds=args.hang_seconds,
+        cache_dir=args.cache_dir, replay_only=args.replay_only,
+    )
+    print(f"Mock EODHD API on http://{args.host}:{args.port}/api "
+          f"(set EODHD_BASE_URL to point the fetchers here)")
+    web.run_app(app, host=args.host, port=args.port)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,226 @@
+import argparse
+import time
+from typing import List, Optional
+
+import numpy as np
+import polars as pl
+import pyarrow.parquet as pq
+
+from bagger_engine import scan_prices
+
+# Forward multiples whose time to reach is measured from every entry date
+FORWARD_LEVELS = (2, 10, 100)
+
+
+def _sparse_max_table(values: np.ndarray, max_span: int) -> List[np.ndarray]:
+    """Range-max sparse table: ``table[j][x]`` is ``max(values[x:x + 2**j])``.
+
+    Only blocks up to ``max_span`` values are built, which is all
+    first_reach_index needs when no answer is further than that.
+    """
+    table = [values]
+    while 2 ** len(table) <= min(max_span, len(values)):
+        half = 2 ** (len(table) - 1)
+        previous = table[-1]
+        table.append(np.maximum(previous[:-half], previous[half:]))
+    return table
+
+
+def first_reach_index(table: List[np.ndarray], starts: np.ndarray, targets: np.ndarray) -> np.ndarray:
+    """First index after each start whose value is at or above its target.
+
+    Binary lifting over the sparse table: each query jumps over every block
+    of 2**j values whose max is still below the target, from the largest
+    block down, so all queries finish in log2(n) vectorized steps.
+    Callers must only ask for targets that are reached (e.g. checked against
+    a suffix max); the answer is then the first value past the last block jumped.
+
+    Args:
+        table: Output of _sparse_max_table
+        starts: Entry positions
+        targets: Value to reach for each entry
+
+    Returns:
+        Positions of the first value >= target strictly after each start
+    """
+    pos = starts.astype(np.int64)
+    for j in reversed(range(len(table))):
+        block_start = pos + 1
+        last = len(table[j]) - 1
+        # Blocks running off the end can never be jumped
+        block_max = np.where(block_start <= last, table[j][np.minimum(block_start, last)], np.inf)
+        pos = np.where(block_max < targets, pos + 2 ** j, pos)
+    return pos + 1
+
+
+def forward_multiples(prices: pl.DataFrame) -> pl.DataFrame:
+    """Best forward multiple and time to 2x/10x/100x from every entry date.
+
+    The max forward multiple is the reverse cum-max of the price over the
+    entry's own future (the entry day included). Its date is the first day
+    at or after the entry where the price equals that max, which is a
+    backward fill of the days that are their own suffix max. Days to each
+    level come from one binary-lifting pass over a range-max sparse table,
+    answered only for entries whose suffix max reaches the level. Everything
+    is O(n log n) with no per-entry Python work.
+
+    Args:
+        prices: ``code``, ``date`` and ``price`` sorted by (code, date)
+            with positive prices; several tickers may be stacked
+
+    Returns:
+        One row per entry: code, date, price, max_forward_multiple,
+        max_forward_date and days_to_<level>x (trading days, null if never reached)
+    """
+    entries = (prices
+               .with_columns(pl.col("price").cum_max(reverse=True).over("code").alias("forward_max"))
+               .with_columns([
+                   (pl.col("forward_max") / pl.col("price")).alias("max_forward_multiple"),
+                   pl.when(pl.col("price") == pl.col("forward_max")).then(pl.col("date"))
+                   .backward_fill().over("code").alias("max_forward_date"),
+               ]))
+
+    # Stacked tickers share one table: a reachable level is always reached
+    # inside the entry's own ticker, so blocks spilling into the next
+    # ticker never change an answer, and no block longer than the longest
+    # ticker is ever needed
+    price = entries["price"].to_numpy()
+    forward_max = entries["forward_max"].to_numpy()
+    table = _sparse_max_table(price, entries.group_by("code").len()["len"].max())
+    positions = np.arange(len(price))
+
+    days_to = []
+    for level in FORWARD_LEVELS:
+        targets = price * level
+        reached = forward_max >= targets
+        days = np.zeros(len(price), dtype=np.int64)
+        days[reached] = (first_reach_index(table, positions[reached], targets[reached])
+                         - positions[reached])
+        days_to.append(pl.Series(f"days_to_{level}x", days).scatter(np.flatnonzero(~reached), None))
+
+    return (entries
+            .with_columns(days_to)
+            .drop("forward_max"))
+
+
+def forward_summary(entries: pl.DataFrame) -> pl.DataFrame:
+    """Per-ticker distribution of the forward multiples over all entry dates.
+
+    Args:
+        entries: Output of forward_multiples
+
+    Returns:
+        One row per ticker, sorted by ticker
+    """
+    best = pl.col("max_forward_multiple").arg_max()
+    level_stats = []
+    for level in FORWARD_LEVELS:
+        days = pl.col(f"days_to_{level}x")
+        level_stats += [
+            (days.is_not_null().mean() * 100).alias(f"pct_entries_reaching_{level}x"),
+            days.median().alias(f"median_days_to_{level}x"),
+            days.min().alias(f"min_days_to_{level}x"),
+            pl.col("date").filter(days.is_not_null()).last().dt.to_string("%Y-%m-%d")
+            .alias(f"last_entry_reaching_{level}x"),
+        ]
+
+    return (entries
+            .group_by("code", maintain_order=True)
+            .agg([
+                pl.len().alias("entries"),
+                pl.col("date").first().dt.to_string("%Y-%m-%d").alias("first_date"),
+                pl.col("date").last().dt.to_string("%Y-%m-%d").alias("last_date"),
+                # The multiple TickerBaggerAnalyzer reports (entry on the first day)
+                pl.col("max_forward_multiple").first().alias("first_entry_max_multiple"),
+                pl.col("max_forward_multiple").max().alias("best_max_forward_multiple"),
+                pl.col("date").get(best).dt.to_string("%Y-%m-%d").alias("best_entry_date"),
+                pl.col("max_forward_date").get(best).dt.to_string("%Y-%m-%d").alias("best_exit_date"),
+                pl.col("max_forward_multiple").median().alias("median_max_forward_multiple"),
+                pl.col("max_forward_multiple").quantile(0.9).alias("p90_max_forward_multiple"),
+                *level_stats,
+            ])
+            .rename({"code": "ticker"})
+            .sort("ticker"))
+
+
+def analyze_forward_multiples(partitioned_data_dir: str = "stock_data_partitioned", min_days: int = 252,
+                              codes_per_batch: int = 250,
+                              entries_output: Optional[str] = None) -> pl.DataFrame:
+    """Run the all-entry-dates analysis over every ticker in a store.
+
+    Tickers are loaded ``codes_per_batch`` at a time, which bounds the size
+    of the sparse table (about log2(rows) copies of the batch's prices).
+
+    Args:
+        partitioned_data_dir: Partitioned or sorted store
+        min_days: Minimum number of trading days required
+        codes_per_batch: Tickers per batch
+        entries_output: Also stream the per-entry rows to this Parquet file
+
+    Returns:
+        Per-ticker summary (see forward_summary)
+    """
+    started = time.perf_counter()
+    prices = scan_prices(partitioned_data_dir)
+    codes: List[str] = (prices.select(pl.col("code").unique()).collect()
+                        .get_column("code").sort().to_list())
+
+    writer = None
+    parts = []
+    try:
+        for i in range(0, len(codes), codes_per_batch):
+            batch_codes = codes[i:i + codes_per_batch]
+            # Tickers with too few valid prices are skipped
+            batch = (prices
+                     .filter(pl.col("code").is_in(batch_codes))
+                     .select(["code", "date", pl.col("adjusted_close").alias("price")])
+                     .filter(pl.col("price").is_not_null() & (pl.col("price") > 0))
+                     .filter(pl.len().over("code") >= min_days)
+                     .sort(["code", "date"])
+                     .collect())
+            if len(batch) == 0:
+                continue
+
+            entries = forward_multiples(batch)
+            parts.append(forward_summary(entries))
+            if entries_output is not None:
+                table = entries.with_columns([
+                    pl.col("date").dt.to_string("%Y-%m-%d"),
+                    pl.col("max_forward_date").dt.to_string("%Y-%m-%d"),
+                ]).rename({"code": "ticker"}).to_arrow()
+                if writer is None:
+                    writer = pq.ParquetWriter(entries_output, table.schema, compression="snappy")
+                writer.write_table(table)
+            print(f"  {min(i + codes_per_batch, len(codes)):,}/{len(codes):,} tickers")
+    finally:
+        if writer is not None:
+            writer.close()
+
+    result = pl.concat(parts) if parts else pl.DataFrame()
+    print(f"Forward multiples for {len(result):,} tickers in {time.perf_counter() - started:.1f}s")
+    return result
+
+
+def main() -> None:
+    """Run the all-entry-dates forward multiple analysis and save the per-ticker summary."""
+    parser = argparse.ArgumentParser(description="Best forward multiple from every possible entry date")
+    parser.add_argument("--data-dir", default="stock_data_partitioned")
+    parser.add_argument("--min-days", type=int, default=252)
+    parser.add_argument("--output", default="forward_multiples.parquet")
+    parser.add_argument("--entries-output",
+                        help="Also write one row per ticker and entry date to this file (large)")
+    parser.add_argument("--codes-per-batch", type=int, default=250,
+                        help="Tickers per batch, bounds memory (default: 250)")
+    args = parser.parse_args()
+
+    result = analyze_forward_multiples(args.data_dir, args.min_days, args.codes_per_batch,
+                                       args.entries_output)
+    if len(result) == 0:
+        print("❌ No tickers analyzed. Check your data directory.")
+        return
+    result.write_parquet(args.output, compression='snappy')
+    print(f"Forward multiple summary saved to {args.output}")
+
+
+if __name__ == "__main__":
+    main()
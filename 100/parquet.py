@@ -1,8 +1,124 @@
+import argparse
+import hashlib
+import multiprocessing
+import os
+import shutil
+import sqlite3
+import time
 import traceback
+from collections import defaultdict
+from concurrent.futures import ProcessPoolExecutor, as_completed
 from pathlib import Path
-from typing import Optional
+from typing import Callable, Dict, Iterator, List, Optional, Tuple, Union
 
 import polars as pl
+import pyarrow as pa
+import pyarrow.csv as pv
+import pyarrow.parquet as pq
+
+from compact_schema import is_compact, to_day_number_sql
+
+# Fixed hash seed so every batch sends a code to the same shard
+_SHARD_SEED = 0x5EED
+
+
+def _normalize_dates(df: pl.DataFrame) -> pl.DataFrame:
+    """Parse CSV-derived text dates into a real Date column."""
+    if df.schema['date'] == pl.Utf8:
+        return df.with_columns(pl.col('date').str.to_date())
+    return df
+
+
+def _current_rss_bytes() -> int:
+    """Resident set size of this process (peak RSS where /proc is unavailable, 0 if neither is)."""
+    try:
+        with open("/proc/self/statm") as f:
+            return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+    except (OSError, ValueError):
+        pass
+    try:
+        import resource  # Unix only
+    except ImportError:
+        return 0
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * 1024
+
+
+def _convert_shard(shard_dir: str, output_dir: str, memory_budget: int) -> dict:
+    """Worker: write every code of one shard's spill files as ``code=XXX/data.parquet``.
+
+    The shard's codes are planned into groups that fit the part of the
+    budget not already taken by the worker itself. Each spill file is then
+    split once into one file per group, so every group is read exactly once.
+    The worker converts one or more consecutive groups at a time; how many is
+    halved or doubled from its measured RSS after each step, the same way the
+    reader adapts its batch size. A code is never split, so one ticker's full
+    history (its existing partition plus the new rows) is the smallest unit
+    held in memory.
+    """
+    started = time.perf_counter()
+    spill_files = sorted(Path(shard_dir).glob("batch-*.arrow"))
+    if not spill_files:
+        return {"pid": os.getpid(), "rows": 0, "codes": 0, "seconds": 0.0, "peak_rss": 0}
+
+    code_rows = (pl.scan_ipc([str(f) for f in spill_files])
+                 .group_by('code').len().sort('code').collect())
+
+    # Decoded frames plus the partition copies take roughly 3x the spill
+    # size. A freshly spawned worker may already be close to its share, so
+    # at least a quarter of the budget is planned for the data.
+    spill_bytes = sum(f.stat().st_size for f in spill_files)
+    bytes_per_row = max(1, spill_bytes // max(1, code_rows['len'].sum()))
+    headroom = max(memory_budget - _current_rss_bytes(), memory_budget // 4)
+    group_rows = max(1, headroom // (3 * bytes_per_row) // 4)
+    code_groups = code_rows.with_columns(
+        (pl.col('len').cum_sum() // group_rows).rle_id().cast(pl.UInt32).alias('_group')
+    ).select(['code', '_group'])
+    groups = code_groups['_group'].max() + 1
+
+    for spill_file in spill_files:
+        spill_df = pl.read_ipc(spill_file).join(code_groups, on='code', how='left',
+                                                maintain_order='left')
+        for (group,), group_df in spill_df.partition_by('_group', as_dict=True).items():
+            group_df.drop('_group').write_ipc(
+                Path(shard_dir) / f"group-{group:05d}-{spill_file.stem}.arrow",
+                compression='uncompressed')
+        del spill_df
+        spill_file.unlink()
+
+    rows = 0
+    codes = 0
+    peak_rss = 0
+    groups_per_step = 4
+    next_group = 0
+    while next_group < groups:
+        step_end = min(groups, next_group + groups_per_step)
+        group_files = [str(f) for group in range(next_group, step_end)
+                       for f in sorted(Path(shard_dir).glob(f"group-{group:05d}-*.arrow"))]
+        step_df = pl.read_ipc(group_files)
+        for (code,), code_data in step_df.partition_by('code', as_dict=True,
+                                                       maintain_order=True).items():
+            partition_dir = Path(output_dir) / f"code={code}"
+            partition_dir.mkdir(exist_ok=True)
+            parquet_file = partition_dir / "data.parquet"
+            if parquet_file.exists():
+                code_data = pl.concat([pl.read_parquet(parquet_file), code_data],
+                                      how="vertical_relaxed")
+            code_data.write_parquet(parquet_file, compression='snappy')
+            codes += 1
+        rows += len(step_df)
+
+        # Measured while the step's groups are still held
+        rss = _current_rss_bytes()
+        peak_rss = max(peak_rss, rss)
+        if rss > memory_budget * 0.8:
+            groups_per_step = max(1, groups_per_step // 2)
+        elif rss < memory_budget * 0.4:
+            groups_per_step *= 2
+        del step_df
+        next_group = step_end
+
+    return {"pid": os.getpid(), "rows": rows, "codes": codes,
+            "seconds": time.perf_counter() - started, "peak_rss": peak_rss}
 
 
 class PartitionedParquetConverter:
@@ -29,11 +145,14 @@ class PartitionedParquetConverter:
             'volume': pl.Float64,
         }
 
-    def convert_to_partitioned_parquet(self, batch_size: int = 5_000_000) -> bool:
+    def convert_to_partitioned_parquet(self, batch_size: int = 5_000_000,
+                                       count_rows: bool = False) -> bool:
         """Convert CSV to partitioned Parquet files by stock code.
 
         Args:
             batch_size: Number of rows to process per batch (default: 5M)
+            count_rows: Count rows up front for percentage progress. This
+                costs an extra full parse of the CSV (default: False)
 
         Returns:
             True if conversion succeeded, False otherwise
@@ -43,44 +162,40 @@ class PartitionedParquetConverter:
         try:
             Path(self.output_dir).mkdir(exist_ok=True)
 
-            print("Using streaming batch processing...")
-            lazy_df = pl.scan_csv(
-                self.csv_file,
-                schema_overrides=self.schema_overrides,
-                infer_schema_length=0
-            )
-
-            # Get total row count for progress tracking
-            total_rows = lazy_df.select(pl.len()).collect(engine="streaming").item()
-            print(f"Total rows to process: {total_rows:,}")
+            total_rows = None
+            if count_rows:
+                total_rows = (pl.scan_csv(self.csv_file, schema_overrides=self.schema_overrides,
+                                          infer_schema_length=0)
+                              .select(pl.len())
+                              .collect(engine="streaming")
+                              .item())
+                print(f"Total rows to process: {total_rows:,}")
 
+            print("Using streaming batch processing...")
             processed_rows = 0
             batch_num = 0
 
-            while processed_rows < total_rows:
+            # A forward reader parses each byte once; slicing a scan_csv
+            # re-parsed everything before the offset on every batch
+            for batch_df in self._iter_csv_batches(batch_size):
                 batch_num += 1
-                current_batch_size = min(batch_size, total_rows - processed_rows)
 
                 print(f"Processing batch {batch_num}: rows {processed_rows:,} "
-                      f"to {processed_rows + current_batch_size:,}")
-
-                # Process current batch using streaming
-                batch_df = (lazy_df
-                            .slice(processed_rows, current_batch_size)
-                            .collect(engine="streaming"))
-
-                if len(batch_df) == 0:
-                    break
+                      f"to {processed_rows + len(batch_df):,}")
 
                 self._process_batch_partitions(batch_df, batch_num)
 
                 processed_rows += len(batch_df)
-                progress = (processed_rows / total_rows) * 100
-                print(f"  Progress: {progress:.1f}% ({processed_rows:,}/{total_rows:,} rows)")
+                if total_rows:
+                    progress = (processed_rows / total_rows) * 100
+                    print(f"  Progress: {progress:.1f}% ({processed_rows:,}/{total_rows:,} rows)")
+                else:
+                    print(f"  Progress: {processed_rows:,} rows")
 
                 # Clear memory
                 del batch_df
 
+            PartitionManifest(self.output_dir).build()
             print("✅ Partitioned conversion completed!")
             return True
 
@@ -110,6 +225,216 @@ class PartitionedParquetConverter:
                 # Create new file
                 code_data.write_parquet(parquet_file, compression='snappy')
 
+    def _iter_csv_batches(self, batch_size: Union[int, Callable[[], int]]) -> Iterator[pl.DataFrame]:
+        """Stream the CSV forward in batches of roughly ``batch_size`` rows.
+
+        Every byte of the file is parsed exactly once, whatever the batch count.
+        ``batch_size`` may be a callable, re-read before every batch.
+        """
+        target_rows = batch_size if callable(batch_size) else lambda: batch_size
+        column_types = {
+            name: pa.string() if dtype == pl.Utf8 else pa.float64()
+            for name, dtype in self.schema_overrides.items()
+        }
+        reader = pv.open_csv(
+            self.csv_file,
+            read_options=pv.ReadOptions(block_size=64 * 1024 * 1024),
+            convert_options=pv.ConvertOptions(column_types=column_types),
+        )
+
+        pending = []
+        pending_rows = 0
+        for record_batch in reader:
+            pending.append(record_batch)
+            pending_rows += record_batch.num_rows
+            if pending_rows >= target_rows():
+                yield pl.from_arrow(pa.Table.from_batches(pending))
+                pending = []
+                pending_rows = 0
+        if pending:
+            yield pl.from_arrow(pa.Table.from_batches(pending))
+
+    def convert_single_pass(self, batch_size: int = 5_000_000, consolidate: bool = True) -> bool:
+        """Convert CSV to partitioned Parquet reading the CSV once.
+
+        Each batch is split by code in one pass and every code's rows are
+        written as a new part file in its ``code=XXX`` partition. Existing
+        files are never read back and rewritten. With ``consolidate``, each
+        partition's parts are merged into ``data.parquet`` at the end, so
+        every code is read and written once more.
+
+        Args:
+            batch_size: Number of rows to hold in memory per batch (default: 5M)
+            consolidate: Merge part files into one data.parquet per partition
+
+        Returns:
+            True if conversion succeeded, False otherwise
+        """
+        print(f"Converting {self.csv_file} to partitioned format (single pass)")
+        started = time.perf_counter()
+
+        try:
+            output_path = Path(self.output_dir)
+            output_path.mkdir(exist_ok=True)
+
+            processed_rows = 0
+            batch_num = 0
+            for batch_df in self._iter_csv_batches(batch_size):
+                batch_num += 1
+                partitions = batch_df.partition_by("code", as_dict=True, maintain_order=True)
+                for (code,), code_data in partitions.items():
+                    partition_dir = output_path / f"code={code}"
+                    partition_dir.mkdir(exist_ok=True)
+                    code_data.write_parquet(partition_dir / f"part-{batch_num:05d}.parquet",
+                                            compression='snappy')
+
+                processed_rows += len(batch_df)
+                rate = processed_rows / (time.perf_counter() - started)
+                print(f"  Batch {batch_num}: {len(partitions)} codes, "
+                      f"{processed_rows:,} rows so far ({rate:,.0f} rows/sec)")
+                del batch_df, partitions
+
+            if consolidate:
+                self._consolidate_parts()
+                PartitionManifest(self.output_dir).build()
+
+            elapsed = time.perf_counter() - started
+            print(f"✅ Single-pass conversion completed: {processed_rows:,} rows in {elapsed:.1f}s")
+            return True
+
+        except Exception as e:
+            print(f"❌ Error during single-pass conversion: {e}")
+            traceback.print_exc()
+            return False
+
+    def _consolidate_parts(self) -> None:
+        """Merge each partition's part files (and any existing data.parquet) into data.parquet."""
+        print("Consolidating part files...")
+        consolidated = 0
+        for partition_dir in Path(self.output_dir).iterdir():
+            if not (partition_dir.is_dir() and partition_dir.name.startswith("code=")):
+                continue
+            parts = sorted(partition_dir.glob("part-*.parquet"))
+            if not parts:
+                continue
+
+            parquet_file = partition_dir / "data.parquet"
+            if len(parts) == 1 and not parquet_file.exists():
+                parts[0].replace(parquet_file)
+            else:
+                sources = ([parquet_file] if parquet_file.exists() else []) + parts
+                pl.read_parquet(sources).write_parquet(parquet_file, compression='snappy')
+                for part in parts:
+                    part.unlink()
+            consolidated += 1
+        print(f"  Consolidated {consolidated} partitions")
+
+    def convert_parallel(self, workers: int = os.cpu_count() or 1, shards: Optional[int] = None,
+                         memory_budget_mb: int = 8192, batch_size: int = 5_000_000) -> bool:
+        """Convert CSV to partitioned Parquet with a pool of worker processes.
+
+        The CSV is read once and every batch is split by a hash of the code
+        into ``shards`` uncompressed Arrow spill files. Worker processes then
+        turn whole shards into partitions, so no two workers ever touch the
+        same code. The read batch size shrinks or grows to keep the reader's
+        RSS within a quarter of ``memory_budget_mb``, and each worker sizes
+        its code groups from its own measured RSS against an equal share of
+        the rest.
+        The budget is a soft target: RSS is checked between batches and
+        groups, and a single ticker's history is always loaded whole.
+
+        Args:
+            workers: Number of worker processes (default: all cores)
+            shards: Number of hash shards (default: 4 per worker, for load balance)
+            memory_budget_mb: Global memory budget across the reader and the workers
+            batch_size: Initial number of rows per read batch (default: 5M)
+
+        Returns:
+            True if conversion succeeded, False otherwise
+        """
+        shards = shards or workers * 4
+        memory_budget = memory_budget_mb * 1024 * 1024
+        # The reader keeps its memory while the workers run, so it gets a
+        # fixed quarter of the budget and the workers split the rest
+        reader_budget = memory_budget // 4
+        worker_budget = (memory_budget - reader_budget) // workers
+        print(f"Converting {self.csv_file} to partitioned format "
+              f"({workers} workers, {shards} shards, {memory_budget_mb:,} MB budget)")
+        started = time.perf_counter()
+
+        output_path = Path(self.output_dir)
+        spill_root = output_path / "_shards"
+        try:
+            output_path.mkdir(exist_ok=True)
+            shutil.rmtree(spill_root, ignore_errors=True)
+            for shard in range(shards):
+                (spill_root / f"shard-{shard:04d}").mkdir(parents=True)
+
+            # Phase 1: shard the CSV, adapting the batch size to measured RSS
+            current_batch_size = [batch_size]
+            processed_rows = 0
+            batch_num = 0
+            for batch_df in self._iter_csv_batches(lambda: current_batch_size[0]):
+                batch_num += 1
+                batch_df = batch_df.with_columns(
+                    (pl.col('code').hash(seed=_SHARD_SEED) % shards).alias('_shard'))
+                for (shard,), shard_df in batch_df.partition_by('_shard', as_dict=True).items():
+                    shard_df.drop('_shard').write_ipc(
+                        spill_root / f"shard-{shard:04d}" / f"batch-{batch_num:05d}.arrow",
+                        compression='uncompressed')
+                processed_rows += len(batch_df)
+                del batch_df
+
+                rss = _current_rss_bytes()
+                if rss > reader_budget * 0.8 and current_batch_size[0] > 100_000:
+                    current_batch_size[0] //= 2
+                elif rss < reader_budget * 0.4:
+                    current_batch_size[0] = min(current_batch_size[0] * 2, batch_size * 4)
+                rate = processed_rows / (time.perf_counter() - started)
+                print(f"  Batch {batch_num}: {processed_rows:,} rows sharded ({rate:,.0f} rows/sec), "
+                      f"RSS {rss / 1e6:,.0f} MB, next batch {current_batch_size[0]:,} rows")
+            shard_seconds = time.perf_counter() - started
+
+            # Phase 2: one task per shard
+            per_worker = defaultdict(lambda: {"rows": 0, "codes": 0, "seconds": 0.0,
+                                              "shards": 0, "peak_rss": 0})
+            # Forking a process that has already run polars' thread pool can
+            # deadlock, so workers are spawned fresh
+            with ProcessPoolExecutor(max_workers=workers,
+                                     mp_context=multiprocessing.get_context("spawn")) as pool:
+                futures = [pool.submit(_convert_shard, str(spill_root / f"shard-{shard:04d}"),
+                                       self.output_dir, worker_budget)
+                           for shard in range(shards)]
+                for done, future in enumerate(as_completed(futures), 1):
+                    stats = future.result()
+                    worker = per_worker[stats["pid"]]
+                    worker["rows"] += stats["rows"]
+                    worker["codes"] += stats["codes"]
+                    worker["seconds"] += stats["seconds"]
+                    worker["shards"] += 1
+                    worker["peak_rss"] = max(worker["peak_rss"], stats["peak_rss"])
+                    if done % max(1, shards // 10) == 0 or done == shards:
+                        print(f"  {done}/{shards} shards written")
+
+            shutil.rmtree(spill_root)
+            PartitionManifest(self.output_dir).build()
+
+            elapsed = time.perf_counter() - started
+            print(f"\n{'Worker':>8} {'Shards':>7} {'Codes':>8} {'Rows':>14} "
+                  f"{'Rows/sec':>12} {'Peak RSS MB':>12}")
+            for pid, worker in sorted(per_worker.items()):
+                rate = worker["rows"] / worker["seconds"] if worker["seconds"] else 0
+                print(f"{pid:>8} {worker['shards']:>7} {worker['codes']:>8,} {worker['rows']:>14,} "
+                      f"{rate:>12,.0f} {worker['peak_rss'] / 1e6:>12,.0f}")
+            print(f"✅ Parallel conversion completed: {processed_rows:,} rows in {elapsed:.1f}s "
+                  f"(sharding {shard_seconds:.1f}s, writing {elapsed - shard_seconds:.1f}s)")
+            return True
+
+        except Exception as e:
+            print(f"❌ Error during parallel conversion: {e}")
+            traceback.print_exc()
+            return False
+
     def verify_partitioned_data(self, sample_symbol: Optional[str] = None) -> None:
         """Verify the converted partitioned Parquet data.
 
@@ -119,25 +444,44 @@ class PartitionedParquetConverter:
         print(f"\n--- Verifying Partitioned Data ---")
 
         try:
-            df = pl.scan_parquet(f"{self.output_dir}/**/data.parquet")
-            total_rows = df.select(pl.len()).collect().item()
-            print(f"Total rows in Parquet: {total_rows:,}")
-
-            # Count partitions
+            # Includes appended days that have not been compacted yet
+            store = PartitionDeltaStore(self.output_dir)
+            df = store.scan()
             output_path = Path(self.output_dir)
-            partition_dirs = [d for d in output_path.iterdir()
-                              if d.is_dir() and d.name.startswith('code=')]
-            print(f"Number of partitions: {len(partition_dirs)}")
+
+            if PartitionManifest.exists(self.output_dir):
+                # Counts come from the manifest; only the deltas are scanned
+                manifest = PartitionManifest(self.output_dir)
+                total_rows = manifest.load()['row_count'].sum()
+                delta_files = store.delta_files()
+                delta_rows = (pl.scan_parquet([str(f) for f in delta_files]).select(pl.len())
+                              .collect().item() if delta_files else 0)
+                print(f"Total rows in Parquet: {total_rows:,} "
+                      f"(+{delta_rows:,} appended rows not yet compacted)")
+            else:
+                total_rows = df.select(pl.len()).collect().item()
+                print(f"Total rows in Parquet: {total_rows:,}")
+
+            # Count partitions (the manifest or the sorted layout's index list
+            # them without a directory walk)
+            if PartitionManifest.exists(self.output_dir):
+                sample_partitions = [f"code={code}" for code in manifest.codes()]
+            elif SortedParquetDataset.exists(self.output_dir):
+                sample_partitions = [f"code={code}"
+                                     for code in SortedParquetDataset(self.output_dir).codes()]
+            else:
+                sample_partitions = sorted([d.name for d in output_path.iterdir()
+                                            if d.is_dir() and d.name.startswith('code=')])
+            print(f"Number of partitions: {len(sample_partitions)}")
 
             # Show sample partition names
-            sample_partitions = sorted([d.name for d in partition_dirs])
-            if len(partition_dirs) <= 10:
+            if len(sample_partitions) <= 10:
                 for partition in sample_partitions:
                     print(f"  - {partition}")
             else:
                 for partition in sample_partitions[:5]:
                     print(f"  - {partition}")
-                print(f"  ... and {len(partition_dirs) - 5} more partitions")
+                print(f"  ... and {len(sample_partitions) - 5} more partitions")
 
             # Show sample data if requested
             if sample_symbol:
@@ -152,16 +496,862 @@ class PartitionedParquetConverter:
             print(f"❌ Error during verification: {e}")
 
 
+class SQLitePartitionedConverter:
+    """Streams the SQLite stock_data table straight into partitioned Parquet.
+
+    Skips the CSV round trip: rows are read in (code, date) order through
+    one cursor, so each ticker arrives contiguously and is written once as a
+    date-sorted ``code=XXX/data.parquet`` with typed columns (``date`` is a
+    real Date). Memory is bounded by one fetch chunk plus the largest ticker.
+    """
+
+    SCHEMA = {
+        'code': pl.Utf8,
+        'exchange_short_name': pl.Utf8,
+        'date': pl.Date,
+        'open': pl.Float64,
+        'high': pl.Float64,
+        'low': pl.Float64,
+        'close': pl.Float64,
+        'adjusted_close': pl.Float64,
+        'volume': pl.Float64,
+    }
+
+    def __init__(self, db_path: str = "stock_data.db", output_dir: str = "stock_data_partitioned"):
+        """Initialize the converter with input and output paths.
+
+        Args:
+            db_path: SQLite database written by bulk_data.py
+            output_dir: Directory for partitioned output (default: "stock_data_partitioned")
+        """
+        self.db_path = db_path
+        self.output_dir = output_dir
+
+    def _query(self, conn: sqlite3.Connection) -> str:
+        """Query returning rows in (code, date) order without a sort step."""
+        is_view = conn.execute(
+            "SELECT type FROM sqlite_master WHERE name = 'stock_data'").fetchone() == ("view",)
+        if is_view:
+            # Compact schema: walk the clustered (symbol_id, day) key; day is
+            # already a day number, which is exactly how Date is stored
+            return """
+                SELECT s.code, e.exchange_short_name, p.day,
+                       p.open, p.high, p.low, p.close, p.adjusted_close, p.volume
+                FROM prices p
+                         JOIN symbols s ON s.symbol_id = p.symbol_id
+                         LEFT JOIN exchanges e ON e.exchange_id = p.exchange_id
+                ORDER BY p.symbol_id, p.day
+            """
+        # The (code, date) primary key index already yields this order
+        return """
+            SELECT code, exchange_short_name, date,
+                   open, high, low, close, adjusted_close, volume
+            FROM stock_data
+            ORDER BY code, date
+        """
+
+    def _to_frame(self, rows: list) -> pl.DataFrame:
+        """Build a typed frame from fetched row tuples."""
+        df = pl.DataFrame(
+            rows,
+            schema={**self.SCHEMA, 'date': pl.Int32 if isinstance(rows[0][2], int) else pl.Utf8},
+            orient="row",
+        )
+        if df.schema['date'] == pl.Utf8:
+            return df.with_columns(pl.col('date').str.to_date())
+        return df.with_columns(pl.col('date').cast(pl.Date))
+
+    def read_day(self, date_str: str) -> Optional[pl.DataFrame]:
+        """All tickers' rows for one date, or None if the date has no rows."""
+        with sqlite3.connect(self.db_path) as conn:
+            if is_compact(conn):
+                rows = conn.execute(f"""
+                    SELECT s.code, e.exchange_short_name, p.day,
+                           p.open, p.high, p.low, p.close, p.adjusted_close, p.volume
+                    FROM prices p
+                             JOIN symbols s ON s.symbol_id = p.symbol_id
+                             LEFT JOIN exchanges e ON e.exchange_id = p.exchange_id
+                    WHERE p.day = {to_day_number_sql("?")}
+                """, (date_str,)).fetchall()
+            else:
+                rows = conn.execute("""
+                    SELECT code, exchange_short_name, date,
+                           open, high, low, close, adjusted_close, volume
+                    FROM stock_data
+                    WHERE date = ?
+                """, (date_str,)).fetchall()
+        return self._to_frame(rows) if rows else None
+
+    def _write_partition(self, code_data: pl.DataFrame) -> None:
+        code = code_data['code'][0]
+        partition_dir = Path(self.output_dir) / f"code={code}"
+        partition_dir.mkdir(exist_ok=True)
+        code_data.write_parquet(partition_dir / "data.parquet", compression='snappy')
+
+    def iter_code_frames(self, chunk_size: int = 1_000_000) -> Iterator[pl.DataFrame]:
+        """Yield each ticker's full, date-sorted history as one frame.
+
+        Args:
+            chunk_size: Rows fetched from SQLite per chunk (default: 1M)
+        """
+        started = time.perf_counter()
+        processed_rows = 0
+        carry = None  # rows of a ticker that may continue in the next chunk
+
+        with sqlite3.connect(self.db_path) as conn:
+            cursor = conn.execute(self._query(conn))
+            while rows := cursor.fetchmany(chunk_size):
+                chunk_df = self._to_frame(rows)
+                if carry is not None:
+                    chunk_df = pl.concat([carry, chunk_df])
+
+                # Every code except the chunk's last one is complete
+                last_code = chunk_df['code'][-1]
+                complete = chunk_df.filter(pl.col('code') != last_code)
+                carry = chunk_df.filter(pl.col('code') == last_code)
+
+                yield from complete.partition_by('code', maintain_order=True)
+
+                processed_rows += len(rows)
+                rate = processed_rows / (time.perf_counter() - started)
+                print(f"  {processed_rows:,} rows read ({rate:,.0f} rows/sec)")
+
+        if carry is not None and len(carry) > 0:
+            yield carry
+
+    def convert(self, chunk_size: int = 1_000_000) -> bool:
+        """Convert the database to partitioned Parquet.
+
+        Args:
+            chunk_size: Rows fetched from SQLite per chunk (default: 1M)
+
+        Returns:
+            True if conversion succeeded, False otherwise
+        """
+        print(f"Converting {self.db_path} to partitioned format in {self.output_dir}")
+        started = time.perf_counter()
+
+        try:
+            Path(self.output_dir).mkdir(exist_ok=True)
+            processed_rows = 0
+            written_codes = 0
+
+            for code_data in self.iter_code_frames(chunk_size):
+                self._write_partition(code_data)
+                processed_rows += len(code_data)
+                written_codes += 1
+
+            PartitionManifest(self.output_dir).build()
+            elapsed = time.perf_counter() - started
+            print(f"✅ SQLite conversion completed: {processed_rows:,} rows, "
+                  f"{written_codes:,} partitions in {elapsed:.1f}s")
+            return True
+
+        except Exception as e:
+            print(f"❌ Error during SQLite conversion: {e}")
+            traceback.print_exc()
+            return False
+
+
+class SortedParquetDataset:
+    """A few large Parquet files sorted by (code, date) plus a per-ticker index.
+
+    Alternative to one ``code=XXX`` directory per ticker. Each ticker starts a
+    new row group, so ``_index.parquet`` can map every code to a file and a
+    row group range: loading one ticker is an index lookup plus one ranged
+    read, and a whole-universe scan reads a handful of files sequentially.
+    """
+
+    INDEX_FILE = "_index.parquet"
+
+    def __init__(self, dataset_dir: str = "stock_data_sorted"):
+        """Initialize the dataset.
+
+        Args:
+            dataset_dir: Directory holding the ``part-NNNNN.parquet`` files and the index
+        """
+        self.dataset_dir = Path(dataset_dir)
+        self._index = None  # code -> (file, first row group, end row group)
+        self._files = {}  # open pq.ParquetFile handles, metadata parsed once
+
+    @classmethod
+    def exists(cls, dataset_dir: str) -> bool:
+        """Whether ``dataset_dir`` holds a sorted dataset."""
+        return (Path(dataset_dir) / cls.INDEX_FILE).exists()
+
+    def files(self) -> List[Path]:
+        """Data files in code order."""
+        return sorted(self.dataset_dir.glob("part-*.parquet"))
+
+    def write(self, code_frames: Iterator[pl.DataFrame], rows_per_file: int = 50_000_000,
+              row_group_size: int = 1_000_000) -> int:
+        """Write per-ticker frames (in code order) as the dataset, replacing any previous one.
+
+        The new files are written to a temp directory and swapped in at the
+        end, so the frames may be read from the dataset being replaced. A
+        directory that already holds ``code=XXX`` partitions is refused: the
+        loaders would prefer the sorted files and silently ignore them.
+
+        Args:
+            code_frames: Each ticker's date-sorted history, one frame per ticker
+            rows_per_file: Start a new file once this many rows are written
+            row_group_size: Maximum rows per row group (long histories span several)
+
+        Returns:
+            Number of tickers written
+        """
+        if next(self.dataset_dir.glob("code=*"), None) is not None:
+            raise ValueError(f"{self.dataset_dir} holds code=XXX partitions; "
+                             f"write the sorted dataset to its own directory")
+
+        tmp_dir = self.dataset_dir / ".tmp"
+        shutil.rmtree(tmp_dir, ignore_errors=True)
+        tmp_dir.mkdir(parents=True)
+
+        schema = pl.DataFrame(schema=SQLitePartitionedConverter.SCHEMA).to_arrow().schema
+        index_rows = []
+        writer = None
+        file_name = None
+        file_rows = 0
+        row_groups = 0
+
+        try:
+            for code_data in code_frames:
+                if writer is None or file_rows >= rows_per_file:
+                    if writer is not None:
+                        writer.close()
+                    file_name = f"part-{len(list(tmp_dir.glob('part-*.parquet'))):05d}.parquet"
+                    writer = pq.ParquetWriter(tmp_dir / file_name, schema, compression='snappy')
+                    file_rows = 0
+                    row_groups = 0
+
+                table = (code_data
+                         .select([pl.col(name).cast(dtype)
+                                  for name, dtype in SQLitePartitionedConverter.SCHEMA.items()])
+                         .to_arrow()
+                         .cast(schema))
+                # One write_table call per ticker starts a fresh row group
+                writer.write_table(table, row_group_size=row_group_size)
+                groups = -(-len(table) // row_group_size)
+                index_rows.append((code_data['code'][0], file_name, row_groups,
+                                   row_groups + groups, len(table)))
+                row_groups += groups
+                file_rows += len(table)
+        finally:
+            if writer is not None:
+                writer.close()
+
+        pl.DataFrame(index_rows, schema={'code': pl.Utf8, 'file': pl.Utf8, 'rg_start': pl.Int32,
+                                         'rg_end': pl.Int32, 'rows': pl.Int64},
+                     orient="row").sort('code').write_parquet(tmp_dir / self.INDEX_FILE)
+
+        # Swap in the new files
+        self.close()
+        for old_file in self.files():
+            old_file.unlink()
+        for new_file in tmp_dir.iterdir():
+            new_file.replace(self.dataset_dir / new_file.name)
+        tmp_dir.rmdir()
+        PartitionManifest(self.dataset_dir).build()
+        return len(index_rows)
+
+    def convert_from_sqlite(self, db_path: str, chunk_size: int = 1_000_000) -> bool:
+        """Build the dataset from the SQLite stock_data table in one streaming pass."""
+        print(f"Converting {db_path} to a sorted dataset in {self.dataset_dir}")
+        started = time.perf_counter()
+        try:
+            source = SQLitePartitionedConverter(db_path, str(self.dataset_dir))
+            codes = self.write(source.iter_code_frames(chunk_size))
+            print(f"✅ Sorted dataset written: {codes:,} tickers in {len(self.files())} files "
+                  f"in {time.perf_counter() - started:.1f}s")
+            return True
+        except Exception as e:
+            print(f"❌ Error during sorted conversion: {e}")
+            traceback.print_exc()
+            return False
+
+    def convert_from_partitioned(self, partitioned_dir: str) -> bool:
+        """Repack an existing ``code=XXX/data.parquet`` tree into the sorted layout."""
+        print(f"Repacking {partitioned_dir} into a sorted dataset in {self.dataset_dir}")
+        started = time.perf_counter()
+        try:
+            partition_files = sorted(Path(partitioned_dir).glob("code=*/data.parquet"))
+            codes = self.write(_normalize_dates(pl.read_parquet(f)).sort('date')
+                               for f in partition_files)
+            print(f"✅ Sorted dataset written: {codes:,} tickers in {len(self.files())} files "
+                  f"in {time.perf_counter() - started:.1f}s")
+            return True
+        except Exception as e:
+            print(f"❌ Error during sorted conversion: {e}")
+            traceback.print_exc()
+            return False
+
+    def _load_index(self) -> Dict[str, tuple]:
+        if self._index is None:
+            index = pl.read_parquet(self.dataset_dir / self.INDEX_FILE)
+            self._index = {code: (file, rg_start, rg_end) for code, file, rg_start, rg_end
+                           in index.select(['code', 'file', 'rg_start', 'rg_end']).iter_rows()}
+        return self._index
+
+    def codes(self) -> List[str]:
+        """All tickers in the dataset, sorted."""
+        return sorted(self._load_index())
+
+    def file_for(self, code: str) -> Optional[Path]:
+        """Data file holding ``code``, if any."""
+        entry = self._load_index().get(code)
+        return self.dataset_dir / entry[0] if entry is not None else None
+
+    def load(self, code: str) -> Optional[pl.DataFrame]:
+        """Read one ticker's rows via the index."""
+        entry = self._load_index().get(code)
+        if entry is None:
+            return None
+        file_name, rg_start, rg_end = entry
+        parquet_file = self._files.get(file_name)
+        if parquet_file is None:
+            parquet_file = pq.ParquetFile(self.dataset_dir / file_name)
+            self._files[file_name] = parquet_file
+        return pl.from_arrow(parquet_file.read_row_groups(list(range(rg_start, rg_end))))
+
+    def scan(self) -> pl.LazyFrame:
+        """Sequential lazy scan over the whole universe."""
+        return pl.scan_parquet([str(f) for f in self.files()])
+
+    def close(self) -> None:
+        """Drop cached file handles and the loaded index."""
+        for parquet_file in self._files.values():
+            parquet_file.close()
+        self._files = {}
+        self._index = None
+
+
+class PartitionManifest:
+    """Per-ticker catalog of a partitioned or sorted store, kept in ``_manifest.parquet``.
+
+    One row per code with its row count, date range, adjusted_close range,
+    byte size and a BLAKE2b hash of its bytes. Tickers can be listed and
+    filtered without opening a single data file, and the sizes and hashes
+    give cheap integrity checks. The converters rebuild it after writing;
+    appended deltas are not included until they are compacted.
+    """
+
+    MANIFEST_FILE = "_manifest.parquet"
+    SCHEMA = {
+        'code': pl.Utf8,
+        'file': pl.Utf8,
+        'rg_start': pl.Int32,
+        'rg_end': pl.Int32,
+        'row_count': pl.Int64,
+        'first_date': pl.Date,
+        'last_date': pl.Date,
+        'min_adjusted_close': pl.Float64,
+        'max_adjusted_close': pl.Float64,
+        'file_size': pl.Int64,
+        'content_hash': pl.Utf8,
+    }
+
+    def __init__(self, data_dir: str = "stock_data_partitioned"):
+        """Initialize the manifest.
+
+        Args:
+            data_dir: Directory of a partitioned or sorted store
+        """
+        self.data_dir = Path(data_dir)
+        self.path = self.data_dir / self.MANIFEST_FILE
+        self._df = None
+
+    @classmethod
+    def exists(cls, data_dir: str) -> bool:
+        """Whether ``data_dir`` has a manifest."""
+        return (Path(data_dir) / cls.MANIFEST_FILE).exists()
+
+    def _locations(self) -> Iterator[tuple]:
+        """(code, file, first row group, end row group) for every code in the store.
+
+        Row groups are None for per-ticker files, which are covered whole.
+        """
+        if SortedParquetDataset.exists(self.data_dir):
+            index = pl.read_parquet(self.data_dir / SortedParquetDataset.INDEX_FILE)
+            yield from index.select(['code', 'file', 'rg_start', 'rg_end']).iter_rows()
+            return
+        for parquet_file in sorted(self.data_dir.glob("code=*/data.parquet")):
+            code = parquet_file.parent.name.replace("code=", "")
+            yield code, f"code={code}/data.parquet", None, None
+
+    @staticmethod
+    def _byte_range(parquet_file: pq.ParquetFile, path: Path,
+                    rg_start: Optional[int], rg_end: Optional[int]) -> Tuple[int, int]:
+        """Byte span of a row group range, or of the whole file."""
+        if rg_start is None:
+            return 0, path.stat().st_size
+        start, end = None, 0
+        for rg in range(rg_start, rg_end):
+            row_group = parquet_file.metadata.row_group(rg)
+            for col in range(row_group.num_columns):
+                column = row_group.column(col)
+                offset = column.data_page_offset
+                if column.has_dictionary_page and column.dictionary_page_offset:
+                    offset = min(offset, column.dictionary_page_offset)
+                start = offset if start is None else min(start, offset)
+                end = max(end, offset + column.total_compressed_size)
+        return start, end
+
+    @staticmethod
+    def _hash_range(path: Path, start: int, end: int) -> str:
+        digest = hashlib.blake2b(digest_size=16)
+        with open(path, "rb") as f:
+            f.seek(start)
+            remaining = end - start
+            while remaining > 0:
+                block = f.read(min(remaining, 1024 * 1024))
+                if not block:
+                    break
+                digest.update(block)
+                remaining -= len(block)
+        return digest.hexdigest()
+
+    def _entry(self, code: str, file_name: str,
+               rg_start: Optional[int], rg_end: Optional[int]) -> dict:
+        path = self.data_dir / file_name
+        parquet_file = pq.ParquetFile(path)
+        try:
+            if rg_start is None:
+                table = parquet_file.read(columns=['date', 'adjusted_close'])
+            else:
+                table = parquet_file.read_row_groups(list(range(rg_start, rg_end)),
+                                                     columns=['date', 'adjusted_close'])
+            start, end = self._byte_range(parquet_file, path, rg_start, rg_end)
+        finally:
+            parquet_file.close()
+
+        df = _normalize_dates(pl.from_arrow(table))
+        return {
+            'code': code,
+            'file': file_name,
+            'rg_start': rg_start,
+            'rg_end': rg_end,
+            'row_count': len(df),
+            'first_date': df['date'].min(),
+            'last_date': df['date'].max(),
+            'min_adjusted_close': df['adjusted_close'].min(),
+            'max_adjusted_close': df['adjusted_close'].max(),
+            'file_size': end - start,
+            'content_hash': self._hash_range(path, start, end),
+        }
+
+    def build(self, codes: Optional[List[str]] = None) -> pl.DataFrame:
+        """Rebuild the manifest from the data files.
+
+        Args:
+            codes: Only refresh these codes and keep the other entries (default: all)
+
+        Returns:
+            The new manifest
+        """
+        started = time.perf_counter()
+        refresh = set(codes) if codes is not None and self.exists(self.data_dir) else None
+        entries = [self._entry(*location) for location in self._locations()
+                   if refresh is None or location[0] in refresh]
+        df = pl.DataFrame(entries, schema=self.SCHEMA)
+        if refresh is not None:
+            df = pl.concat([self.load().filter(~pl.col('code').is_in(list(refresh))), df])
+        df = df.sort('code')
+
+        tmp_path = self.path.with_suffix(".tmp")
+        df.write_parquet(tmp_path)
+        tmp_path.replace(self.path)
+        self._df = df
+        print(f"Manifest updated: {len(entries):,} of {len(df):,} codes refreshed "
+              f"in {time.perf_counter() - started:.1f}s")
+        return df
+
+    def load(self) -> pl.DataFrame:
+        """The manifest as a frame (read once)."""
+        if self._df is None:
+            self._df = pl.read_parquet(self.path)
+        return self._df
+
+    def codes(self) -> List[str]:
+        """All codes in the store, sorted."""
+        return self.load()['code'].to_list()
+
+    def row_counts(self) -> Dict[str, int]:
+        """Rows per code."""
+        return dict(self.load().select(['code', 'row_count']).iter_rows())
+
+    def check(self, deep: bool = False) -> List[str]:
+        """Compare the manifest with the data files.
+
+        The default check only reads file sizes and Parquet footers; ``deep``
+        re-hashes every code's bytes.
+
+        Args:
+            deep: Also verify the content hashes
+
+        Returns:
+            A description of every mismatch (empty if the store is intact)
+        """
+        problems = []
+        manifest = self.load()
+        listed = set(manifest['code'].to_list())
+        on_disk = {location[0] for location in self._locations()}
+        problems.extend(f"{code}: not in the manifest" for code in sorted(on_disk - listed))
+
+        for row in manifest.iter_rows(named=True):
+            path = self.data_dir / row['file']
+            if not path.exists():
+                problems.append(f"{row['code']}: {row['file']} is missing")
+                continue
+            try:
+                parquet_file = pq.ParquetFile(path)
+            except Exception as e:
+                problems.append(f"{row['code']}: {row['file']} is unreadable ({e})")
+                continue
+            try:
+                if row['rg_start'] is None:
+                    rows = parquet_file.metadata.num_rows
+                else:
+                    rows = sum(parquet_file.metadata.row_group(rg).num_rows
+                               for rg in range(row['rg_start'], row['rg_end']))
+                start, end = self._byte_range(parquet_file, path, row['rg_start'], row['rg_end'])
+            finally:
+                parquet_file.close()
+
+            if rows != row['row_count']:
+                problems.append(f"{row['code']}: {rows} rows, manifest says {row['row_count']}")
+            if end - start != row['file_size']:
+                problems.append(f"{row['code']}: {end - start} bytes, manifest says {row['file_size']}")
+            elif deep and self._hash_range(path, start, end) != row['content_hash']:
+                problems.append(f"{row['code']}: content hash mismatch")
+        return problems
+
+
+class PartitionDeltaStore:
+    """Daily delta files layered on top of the per-ticker base partitions.
+
+    Each appended day is written once as ``_delta/date=YYYY-MM-DD.parquet``,
+    sorted by code with small row groups, so the row group statistics act as
+    a code index and a single ticker's rows can be read without scanning the
+    whole file. Readers merge base and delta rows (delta wins on the same
+    date) until ``compact`` folds the deltas into the base files.
+    """
+
+    DELTA_DIR = "_delta"
+    ROW_GROUP_SIZE = 4096
+
+    def __init__(self, output_dir: str = "stock_data_partitioned"):
+        """Initialize the store.
+
+        Args:
+            output_dir: Directory holding the ``code=XXX/data.parquet`` partitions
+        """
+        self.output_dir = Path(output_dir)
+        self.delta_dir = self.output_dir / self.DELTA_DIR
+
+    def delta_files(self) -> List[Path]:
+        """Delta files in date order."""
+        if not self.delta_dir.exists():
+            return []
+        return sorted(self.delta_dir.glob("date=*.parquet"))
+
+    def append_day(self, date_str: str, day_df: pl.DataFrame) -> Path:
+        """Write one day's rows as a delta file, replacing an earlier append of that day.
+
+        Args:
+            date_str: Trading date (YYYY-MM-DD)
+            day_df: Rows for that date, in the SQLitePartitionedConverter schema
+
+        Returns:
+            Path of the written delta file
+        """
+        self.delta_dir.mkdir(parents=True, exist_ok=True)
+        delta_path = self.delta_dir / f"date={date_str}.parquet"
+        tmp_path = delta_path.with_suffix(".tmp")
+        day_df.sort("code").write_parquet(tmp_path, compression='snappy', statistics=True,
+                                          row_group_size=self.ROW_GROUP_SIZE)
+        tmp_path.replace(delta_path)
+        return delta_path
+
+    def append_from_sqlite(self, db_path: str, date_str: str) -> int:
+        """Append one date straight from the SQLite database.
+
+        Args:
+            db_path: SQLite database written by bulk_data.py
+            date_str: Trading date (YYYY-MM-DD)
+
+        Returns:
+            Number of rows appended
+        """
+        day_df = SQLitePartitionedConverter(db_path, str(self.output_dir)).read_day(date_str)
+        if day_df is None:
+            print(f"No rows for {date_str} in {db_path}")
+            return 0
+
+        self.append_day(date_str, day_df)
+        return len(day_df)
+
+    def load_deltas(self) -> Dict[str, pl.DataFrame]:
+        """Read every delta file once and split the rows by code."""
+        files = self.delta_files()
+        if not files:
+            return {}
+        deltas = pl.concat([pl.read_parquet(f) for f in files], how="vertical_relaxed")
+        return {code: df for (code,), df in
+                deltas.partition_by('code', as_dict=True, maintain_order=True).items()}
+
+    def code_mtimes(self) -> Dict[str, float]:
+        """Newest modification time of the delta files holding each code's rows.
+
+        Only the code column is read, so this stays cheap next to load_deltas.
+        """
+        mtimes: Dict[str, float] = {}
+        for delta_file in self.delta_files():
+            mtime = delta_file.stat().st_mtime
+            for code in pl.read_parquet(delta_file, columns=['code'])['code'].unique():
+                mtimes[code] = max(mtimes.get(code, 0.0), mtime)
+        return mtimes
+
+    def read_code_deltas(self, code: str) -> Optional[pl.DataFrame]:
+        """Delta rows for one code, using the row group statistics to skip the rest."""
+        files = self.delta_files()
+        if not files:
+            return None
+        df = (pl.scan_parquet([str(f) for f in files])
+              .filter(pl.col('code') == code)
+              .collect())
+        return df if len(df) > 0 else None
+
+    @staticmethod
+    def merge(base: Optional[pl.DataFrame], delta: Optional[pl.DataFrame]) -> Optional[pl.DataFrame]:
+        """Combine base and delta rows for one code, delta rows winning per date.
+
+        The delta is cast to the base schema, since CSV-derived base files
+        keep the date as text while deltas carry a real Date.
+        """
+        if delta is None or len(delta) == 0:
+            return base
+        if base is None:
+            return delta.sort('date')
+        delta = delta.select([pl.col(name).cast(dtype) for name, dtype in base.schema.items()])
+        return (pl.concat([base, delta])
+                .unique(subset='date', keep='last', maintain_order=True)
+                .sort('date'))
+
+    def scan(self) -> pl.LazyFrame:
+        """Lazy scan over base partitions and deltas, deduplicated on (code, date)."""
+        if SortedParquetDataset.exists(self.output_dir):
+            base_files = SortedParquetDataset(self.output_dir).files()
+        else:
+            base_files = sorted(self.output_dir.glob("code=*/data.parquet"))
+        delta_files = self.delta_files()
+        if not base_files:
+            return pl.scan_parquet([str(f) for f in delta_files])
+
+        base = pl.scan_parquet([str(f) for f in base_files], hive_partitioning=False)
+        if not delta_files:
+            return base
+
+        schema = base.collect_schema()
+        delta = (pl.scan_parquet([str(f) for f in delta_files])
+                 .select([pl.col(name).cast(dtype) for name, dtype in schema.items()]))
+        return (pl.concat([base, delta])
+                .unique(subset=['code', 'date'], keep='last', maintain_order=True))
+
+    def needs_compaction(self, max_files: int = 20, max_bytes: int = 256 * 1024 * 1024) -> bool:
+        """Whether the deltas have passed the file count or size threshold."""
+        files = self.delta_files()
+        return len(files) > max_files or sum(f.stat().st_size for f in files) > max_bytes
+
+    def compact(self, max_files: int = 20, max_bytes: int = 256 * 1024 * 1024,
+                force: bool = False) -> bool:
+        """Fold the delta files into the base partitions.
+
+        Every touched ``data.parquet`` is rewritten through a temp file and
+        renamed into place, and the deltas are deleted only afterwards, so an
+        interrupted compaction just leaves deltas that are re-applied (the
+        merge is idempotent) on the next run.
+
+        Args:
+            max_files: Compact once there are more delta files than this
+            max_bytes: Compact once the deltas are larger than this
+            force: Compact regardless of the thresholds
+
+        Returns:
+            True if the deltas were compacted, False if below the thresholds
+        """
+        files = self.delta_files()
+        if not files:
+            print("No delta files to compact")
+            return False
+        if not force and not self.needs_compaction(max_files, max_bytes):
+            print(f"{len(files)} delta files, below the compaction threshold")
+            return False
+
+        started = time.perf_counter()
+        print(f"Compacting {len(files)} delta files into {self.output_dir}...")
+
+        deltas = self.load_deltas()
+        if SortedParquetDataset.exists(self.output_dir):
+            # The sorted layout has no per-ticker files, so it is rewritten
+            # in one sequential pass
+            dataset = SortedParquetDataset(self.output_dir)
+            codes = sorted(set(dataset.codes()) | set(deltas))
+            dataset.write(self.merge(dataset.load(code), deltas.get(code)) for code in codes)
+            deltas = {}
+        for code, delta in deltas.items():
+            partition_dir = self.output_dir / f"code={code}"
+            base_file = partition_dir / "data.parquet"
+            base = pl.read_parquet(base_file) if base_file.exists() else None
+            merged = self.merge(base, delta)
+
+            partition_dir.mkdir(exist_ok=True)
+            tmp_path = partition_dir / "data.parquet.tmp"
+            merged.write_parquet(tmp_path, compression='snappy')
+            tmp_path.replace(base_file)
+
+        if deltas:
+            PartitionManifest(self.output_dir).build(codes=list(deltas))
+        for f in files:
+            f.unlink()
+
+        print(f"✅ Compacted {len(files)} days in {time.perf_counter() - started:.1f}s")
+        return True
+
+
+class TickerArrowCache:
+    """Uncompressed Arrow IPC copies of each ticker's hot columns.
+
+    Only ``date`` (as int32 days), ``adjusted_close``, ``close`` and ``volume``
+    are kept. Files are memory-mapped on read, so repeated analyses skip
+    Parquet decompression and reuse the OS page cache. An entry is stale once
+    its source file, or a delta file holding its rows, is newer than it.
+    """
+
+    COLUMNS = ['date', 'adjusted_close', 'close', 'volume']
+
+    def __init__(self, cache_dir: str = "stock_data_cache"):
+        """Initialize the cache.
+
+        Args:
+            cache_dir: Directory for the ``<code>.arrow`` files
+        """
+        self.cache_dir = Path(cache_dir)
+        self.cache_dir.mkdir(parents=True, exist_ok=True)
+        self.hits = 0
+        self.misses = 0
+
+    def _path(self, code: str) -> Path:
+        return self.cache_dir / f"{code}.arrow"
+
+    def get(self, code: str, source_mtime: float) -> Optional[pl.DataFrame]:
+        """Memory-map a cached ticker, or None if missing or older than ``source_mtime``."""
+        path = self._path(code)
+        try:
+            if path.stat().st_mtime < source_mtime:
+                self.misses += 1
+                return None
+        except FileNotFoundError:
+            self.misses += 1
+            return None
+
+        self.hits += 1
+        # Arrow reads straight out of the mapping and polars wraps those
+        # buffers; Int32 -> Date only reinterprets them
+        with pa.memory_map(str(path)) as source:
+            table = pa.ipc.open_file(source).read_all()
+        return pl.from_arrow(table).with_columns(pl.col('date').cast(pl.Date))
+
+    def put(self, code: str, df: pl.DataFrame) -> None:
+        """Write a ticker's hot columns."""
+        hot = (_normalize_dates(df)
+               .select(self.COLUMNS)
+               .with_columns(pl.col('date').cast(pl.Int32)))
+        path = self._path(code)
+        tmp_path = path.with_suffix(".tmp")
+        hot.write_ipc(tmp_path, compression='uncompressed')
+        tmp_path.replace(path)
+
+
 def main() -> None:
     """Main function to run the partitioned conversion process."""
-    # Configuration
-    csv_file = "stock_data.csv"
-    output_dir = "stock_data_partitioned"
+    parser = argparse.ArgumentParser(description="Convert stock CSV data to partitioned Parquet")
+    parser.add_argument("--csv-file", default="stock_data.csv")
+    parser.add_argument("--db", help="Convert straight from this SQLite database instead of a CSV")
+    parser.add_argument("--output-dir",
+                        help="Default: stock_data_partitioned, or stock_data_sorted with --layout sorted")
+    parser.add_argument("--mode", choices=["batched", "single-pass", "parallel"], default="single-pass",
+                        help="single-pass streams the CSV once and never rewrites partitions; "
+                             "parallel shards it across worker processes")
+    parser.add_argument("--batch-size", type=int, default=5_000_000)
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 1,
+                        help="Worker processes for --mode parallel")
+    parser.add_argument("--memory-budget-mb", type=int, default=8192,
+                        help="Soft RSS budget for --mode parallel, shared by the reader and "
+                             "the workers; checked between batches, one ticker is never split")
+    parser.add_argument("--layout", choices=["partitioned", "sorted"], default="partitioned",
+                        help="sorted writes a few (code, date)-sorted files plus a ticker index")
+    parser.add_argument("--from-partitioned", metavar="DIR",
+                        help="With --layout sorted, repack an existing partitioned directory")
+    parser.add_argument("--append-day", nargs="+", metavar="DATE",
+                        help="Append these dates from --db as delta files instead of converting")
+    parser.add_argument("--compact", action="store_true",
+                        help="Fold delta files into the base partitions once past the thresholds")
+    parser.add_argument("--force", action="store_true", help="With --compact, ignore the thresholds")
+    parser.add_argument("--max-delta-files", type=int, default=20)
+    parser.add_argument("--max-delta-mb", type=int, default=256)
+    parser.add_argument("--build-manifest", action="store_true",
+                        help="(Re)build the manifest of an existing store and exit")
+    parser.add_argument("--check-manifest", action="store_true",
+                        help="Compare the store against its manifest and exit")
+    parser.add_argument("--deep", action="store_true", help="With --check-manifest, re-hash every code")
+    args = parser.parse_args()
+    if args.output_dir is None:
+        args.output_dir = "stock_data_sorted" if args.layout == "sorted" else "stock_data_partitioned"
+
+    if args.build_manifest or args.check_manifest:
+        manifest = PartitionManifest(args.output_dir)
+        if args.build_manifest:
+            manifest.build()
+        if args.check_manifest:
+            problems = manifest.check(deep=args.deep)
+            for problem in problems:
+                print(f"  ❌ {problem}")
+            print(f"{len(problems)} problems found in {len(manifest.codes()):,} codes")
+        return
 
-    converter = PartitionedParquetConverter(csv_file, output_dir)
+    if args.append_day or args.compact:
+        store = PartitionDeltaStore(args.output_dir)
+        for date_str in args.append_day or []:
+            started = time.perf_counter()
+            rows = store.append_from_sqlite(args.db or "stock_data.db", date_str)
+            print(f"Appended {rows:,} rows for {date_str} in {time.perf_counter() - started:.1f}s")
+        if args.compact:
+            store.compact(max_files=args.max_delta_files,
+                          max_bytes=args.max_delta_mb * 1024 * 1024, force=args.force)
+        return
 
-    print("Converting CSV to partitioned Parquet format...")
-    success = converter.convert_to_partitioned_parquet()
+    converter = PartitionedParquetConverter(args.csv_file, args.output_dir)
+
+    if args.layout == "sorted":
+        dataset = SortedParquetDataset(args.output_dir)
+        if args.from_partitioned:
+            success = dataset.convert_from_partitioned(args.from_partitioned)
+        elif args.db:
+            success = dataset.convert_from_sqlite(args.db)
+        else:
+            parser.error("--layout sorted needs --db or --from-partitioned")
+    elif args.db:
+        success = SQLitePartitionedConverter(args.db, args.output_dir).convert()
+    elif args.mode == "parallel":
+        success = converter.convert_parallel(workers=args.workers, batch_size=args.batch_size,
+                                             memory_budget_mb=args.memory_budget_mb)
+    elif args.mode == "single-pass":
+        print("Converting CSV to partitioned Parquet format...")
+        success = converter.convert_single_pass(batch_size=args.batch_size)
+    else:
+        print("Converting CSV to partitioned Parquet format...")
+        success = converter.convert_to_partitioned_parquet(batch_size=args.batch_size)
 
     if success:
         converter.verify_partitioned_data(sample_symbol="AADBX")
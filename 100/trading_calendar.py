@@ -0,0 +1,104 @@
+import datetime
+from functools import lru_cache
+from typing import List
+
+# One-off NYSE closures that don't follow the regular holiday rules
+SPECIAL_CLOSURES = {
+    datetime.date(1994, 4, 27),   # President Nixon funeral
+    datetime.date(2001, 9, 11),   # September 11 attacks
+    datetime.date(2001, 9, 12),
+    datetime.date(2001, 9, 13),
+    datetime.date(2001, 9, 14),
+    datetime.date(2004, 6, 11),   # President Reagan funeral
+    datetime.date(2007, 1, 2),    # President Ford funeral
+    datetime.date(2012, 10, 29),  # Hurricane Sandy
+    datetime.date(2012, 10, 30),
+    datetime.date(2018, 12, 5),   # President G.H.W. Bush funeral
+    datetime.date(2025, 1, 9),    # President Carter funeral
+}
+
+
+def _easter_sunday(year: int) -> datetime.date:
+    """Gregorian Easter Sunday (anonymous Gregorian algorithm)."""
+    a = year % 19
+    b, c = divmod(year, 100)
+    d, e = divmod(b, 4)
+    f = (b + 8) // 25
+    g = (b - f + 1) // 3
+    h = (19 * a + b - d - g + 15) % 30
+    i, k = divmod(c, 4)
+    l = (32 + 2 * e + 2 * i - h - k) % 7
+    m = (a + 11 * h + 22 * l) // 451
+    month, day = divmod(h + l - 7 * m + 114, 31)
+    return datetime.date(year, month, day + 1)
+
+
+def _nth_weekday(year: int, month: int, weekday: int, n: int) -> datetime.date:
+    """The n-th given weekday (Mon=0) of a month."""
+    first = datetime.date(year, month, 1)
+    offset = (weekday - first.weekday()) % 7
+    return first + datetime.timedelta(days=offset + 7 * (n - 1))
+
+
+def _last_weekday(year: int, month: int, weekday: int) -> datetime.date:
+    """The last given weekday (Mon=0) of a month."""
+    next_month = datetime.date(year + month // 12, month % 12 + 1, 1)
+    last = next_month - datetime.timedelta(days=1)
+    return last - datetime.timedelta(days=(last.weekday() - weekday) % 7)
+
+
+def _observed(day: datetime.date) -> datetime.date:
+    """Move a Saturday holiday to Friday and a Sunday holiday to Monday."""
+    if day.weekday() == 5:
+        return day - datetime.timedelta(days=1)
+    if day.weekday() == 6:
+        return day + datetime.timedelta(days=1)
+    return day
+
+
+@lru_cache(maxsize=None)
+def nyse_holidays(year: int) -> frozenset:
+    """Full-day NYSE closures for a year (regular holidays plus special closures)."""
+    holidays = set()
+
+    # New Year's Day: NYSE doesn't close on Dec 31 when Jan 1 is a Saturday
+    new_year = datetime.date(year, 1, 1)
+    if new_year.weekday() != 5:
+        holidays.add(_observed(new_year))
+
+    if year >= 1998:
+        holidays.add(_nth_weekday(year, 1, 0, 3))  # Martin Luther King Jr. Day
+    holidays.add(_nth_weekday(year, 2, 0, 3))  # Washington's Birthday
+    holidays.add(_easter_sunday(year) - datetime.timedelta(days=2))  # Good Friday
+    holidays.add(_last_weekday(year, 5, 0))  # Memorial Day
+    if year >= 2022:
+        holidays.add(_observed(datetime.date(year, 6, 19)))  # Juneteenth
+    holidays.add(_observed(datetime.date(year, 7, 4)))  # Independence Day
+    holidays.add(_nth_weekday(year, 9, 0, 1))  # Labor Day
+    holidays.add(_nth_weekday(year, 11, 3, 4))  # Thanksgiving
+    holidays.add(_observed(datetime.date(year, 12, 25)))  # Christmas
+
+    holidays.update(d for d in SPECIAL_CLOSURES if d.year == year)
+    return frozenset(holidays)
+
+
+def is_trading_day(day: datetime.date) -> bool:
+    """Whether NYSE holds a regular session on ``day``."""
+    return day.weekday() < 5 and day not in nyse_holidays(day.year)
+
+
+def nyse_trading_days(start: datetime.date, end: datetime.date) -> List[datetime.date]:
+    """All NYSE trading sessions between ``start`` and ``end`` inclusive."""
+    days = []
+    day = start
+    while day <= end:
+        if is_trading_day(day):
+            days.append(day)
+        day += datetime.timedelta(days=1)
+    return days
+
+
+def nyse_trading_day_strs(start: datetime.date, end: datetime.date) -> List[str]:
+    """Trading sessions between ``start`` and ``end`` as ISO date strings."""
+    return [day.isoformat() for day in nyse_trading_days(start, end)]
+